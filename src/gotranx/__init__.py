@@ -1,24 +1,69 @@
 from importlib.metadata import metadata
 
-from . import cli
-from . import exceptions
-from . import load
-from . import ode
-from . import ode_component
-from . import parser
-from . import codegen
-from . import transformer
-from . import units
-from . import sympytools
-from . import schemes
-from . import templates
-from . import myokit
-from .load import load_ode
-from .schemes import get_scheme
-from .ode import ODE
-from .ode_component import Component
-from .parser import Parser
-from .transformer import TreeToODE
+from importlib import import_module as _import_module
+from typing import TYPE_CHECKING as _TYPE_CHECKING
+
+if _TYPE_CHECKING:
+    from . import cli
+    from . import exceptions
+    from . import load
+    from . import ode
+    from . import ode_component
+    from . import parser
+    from . import codegen
+    from . import transformer
+    from . import units
+    from . import sympytools
+    from . import schemes
+    from . import templates
+    from . import myokit
+    from .load import load_ode, load_odes
+    from .schemes import get_scheme
+    from .ode import ODE
+    from .ode_component import Component
+    from .parser import Parser
+    from .transformer import TreeToODE
+
+# Submodules and their dependencies (sympy, lark, pint, myokit, ...)
+# are imported the first time they are used to make `import gotranx` fast
+_submodules = {
+    "cli",
+    "exceptions",
+    "load",
+    "ode",
+    "ode_component",
+    "parser",
+    "codegen",
+    "transformer",
+    "units",
+    "sympytools",
+    "schemes",
+    "templates",
+    "myokit",
+}
+_attributes = {
+    "load_ode": "load",
+    "load_odes": "load",
+    "get_scheme": "schemes",
+    "ODE": "ode",
+    "Component": "ode_component",
+    "Parser": "parser",
+    "TreeToODE": "transformer",
+}
+
+
+def __getattr__(name: str):
+    if name in _submodules:
+        return _import_module(f".{name}", __name__)
+    if name in _attributes:
+        value = getattr(_import_module(f".{_attributes[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _submodules | set(_attributes))
 
 
 meta = metadata("gotranx")
@@ -38,6 +83,7 @@ __all__ = [
     "exceptions",
     "load",
     "load_ode",
+    "load_odes",
     "ode_component",
     "Component",
     "ode",
@@ -1,18 +1,51 @@
 from __future__ import annotations
 
+from enum import Enum
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
 import attr
 import lark
-import pint
 import sympy as sp
 from structlog import get_logger
 
+from .cache import hash_key
 from .expressions import build_expression
-from .units import ureg
+from .profiling import stage
+from .sympytools import fingerprint
+from .units import get_unit_registry
 from . import exceptions
 
+if TYPE_CHECKING:
+    import pint
+
 logger = get_logger()
 
 
+@lru_cache(maxsize=None)
+def make_symbol(name: str) -> sp.Symbol:
+    """Create the symbol for an atom. Symbols are interned, so that
+    all atoms (and expressions) with the same name share the same symbol
+
+    Parameters
+    ----------
+    name : str
+        The name of the symbol
+
+    Returns
+    -------
+    sp.Symbol
+        The symbol
+    """
+    return sp.Symbol(
+        name=name,
+        real=True,
+        imaginary=False,
+        commutative=True,
+        finite=True,
+    )
+
+
 def _set_symbol(instance, name: str) -> None:
     """Helper function to set the symbol attribute of a frozen instance
 
@@ -23,21 +56,13 @@ def _set_symbol(instance, name: str) -> None:
     name : str
         The name of the symbol
     """
-    object.__setattr__(
-        instance,
-        "symbol",
-        sp.Symbol(
-            name=name,
-            real=True,
-            imaginary=False,
-            commutative=True,
-            finite=True,
-        ),
-    )
+    object.__setattr__(instance, "symbol", make_symbol(name))
 
 
+@lru_cache(maxsize=None)
 def unit_from_string(unit_str: str | None) -> pint.Unit | None:
-    """Create a pint unit from a string
+    """Create a pint unit from a string. The result is cached,
+    since most models only use a handful of different units
 
     Parameters
     ----------
@@ -50,6 +75,9 @@ def unit_from_string(unit_str: str | None) -> pint.Unit | None:
         It the unit is valid, return the pint unit, else None
     """
     if unit_str is not None:
+        import pint
+
+        ureg = get_unit_registry()
         try:
             unit = ureg.Unit(unit_str)
         except pint.UndefinedUnitError:
@@ -66,18 +94,22 @@ def unit_from_string(unit_str: str | None) -> pint.Unit | None:
     return unit
 
 
-def _set_unit(instance, unit_str: str) -> None:
+class _Unit(Enum):
+    # Marker for a unit that is not parsed yet
+    unparsed = 0
+
+
+def _set_unit(instance, unit: pint.Unit | None | _Unit) -> None:
     """Helper function to set the unit attribute of a frozen instance
-    by parsing a string representation of the unit
 
     Parameters
     ----------
     instance : Any
         The instance to set the unit attribute on
-    unit_str : str
-        The string representation of the unit
+    unit : pint.Unit | None | _Unit
+        The unit
     """
-    object.__setattr__(instance, "unit", unit_from_string(unit_str))
+    object.__setattr__(instance, "_unit", unit)
 
 
 @attr.s(frozen=True, slots=True)
@@ -98,15 +130,40 @@ class Atom:
     components: tuple[str, ...] = attr.ib(default=("",))
     description: str | None = attr.ib(None)
     symbol: sp.Symbol = attr.ib(None)
-    unit_str: str | None = attr.ib(None, repr=False)
-    unit: pint.Unit | None = attr.ib(None)
+    unit_str: str | None = attr.ib(None)
+    # The unit is parsed from unit_str the first time it is used, see the `unit` property.
+    # It is not compared since it is given by unit_str
+    _unit: pint.Unit | None | _Unit = attr.ib(None, eq=False, repr=False)
 
     def __attrs_post_init__(self):
-        if self.unit is None:
-            _set_unit(self, unit_str=self.unit_str)
+        if self._unit is None:
+            _set_unit(self, _Unit.unparsed if self.unit_str is not None else None)
         if self.symbol is None:
             _set_symbol(self, name=self.name)
 
+    @property
+    def unit(self) -> pint.Unit | None:
+        """The unit of the atom, parsed from `unit_str`"""
+        if self._unit is _Unit.unparsed:
+            _set_unit(self, unit_from_string(self.unit_str))
+        return self._unit
+
+    def _fingerprint_value(self) -> str:
+        return fingerprint(self.value)
+
+    @property
+    def fingerprint(self) -> str:
+        """A hash of the type, name, components, description,
+        unit and value of the atom"""
+        return hash_key(
+            type(self).__name__,
+            self.name,
+            *self.components,
+            repr(self.description),
+            repr(self.unit_str),
+            self._fingerprint_value(),
+        )
+
     def is_stateful(self, lookup: dict[str, Atom]) -> bool:
         return isinstance(self, State) or isinstance(self, TimeDependentState)
 
@@ -134,7 +191,7 @@ class State(Atom):
             components=self.components,
             description=self.description,
             unit_str=self.unit_str,
-            unit=self.unit,
+            unit=self._unit,
         )
 
 
@@ -169,8 +226,112 @@ class Expression:
                 deps.add(str(tree.children[0]))
         return frozenset(deps)
 
-    def resolve(self, symbols: dict[str, sp.Symbol]):
-        return build_expression(self.tree, symbols=symbols)
+    def resolve(
+        self,
+        symbols: dict[str, sp.Symbol],
+        intern_table: dict[sp.Basic, sp.Basic] | None = None,
+    ):
+        return build_expression(self.tree, symbols=symbols, intern_table=intern_table)
+
+
+def _tree_fingerprint(tree: lark.Tree) -> str:
+    # Same as `sympytools.fingerprint`, but for the expression tree
+    parts = []
+    stack: list[lark.Tree | lark.Token] = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, lark.Tree):
+            parts.append(f"{node.data}/{len(node.children)}")
+            stack.extend(reversed(node.children))
+        else:
+            parts.append(f"{node.type}:{node}")
+    return ",".join(parts)
+
+
+class LazyExpression:
+    """A sympy expression that is built from an expression
+    tree the first time it is used.
+
+    Parameters
+    ----------
+    tree : lark.Tree | None
+        The expression tree
+    symbols : dict[str, sp.Symbol] | None
+        The symbols used to build the expression
+    expr : sp.Expr | None, optional
+        The expression, if it is already known, by default None
+    intern_table : dict[sp.Basic, sp.Basic] | None, optional
+        Table of subexpressions shared with other expressions, see
+        `gotranx.expressions.build_expression`, by default None
+    """
+
+    __slots__ = ("tree", "symbols", "_expr", "intern_table", "_fingerprint")
+
+    def __init__(
+        self,
+        tree: lark.Tree | None,
+        symbols: dict[str, sp.Symbol] | None,
+        expr: sp.Expr | None = None,
+        intern_table: dict[sp.Basic, sp.Basic] | None = None,
+    ) -> None:
+        self.tree = tree
+        self.symbols = symbols
+        self._expr = expr
+        self.intern_table = intern_table
+        self._fingerprint: str | None = None
+
+    @property
+    def is_resolved(self) -> bool:
+        """True if the sympy expression has been built"""
+        return self._expr is not None
+
+    def get(self) -> sp.Expr:
+        """Get the sympy expression, and build it if needed"""
+        if self._expr is None:
+            with stage("build expressions"):
+                self._expr = build_expression(
+                    self.tree, symbols=self.symbols, intern_table=self.intern_table
+                )
+            # Keep the fingerprint of the tree, so that it
+            # does not change when the expression is built
+            if self._fingerprint is None:
+                self._fingerprint = "tree:" + _tree_fingerprint(self.tree)
+            # These are not needed anymore
+            self.tree = self.symbols = self.intern_table = None
+        return self._expr
+
+    @property
+    def fingerprint(self) -> str:
+        """A canonical string representation of the expression. If the
+        expression is built from a tree, this is given by the tree, so
+        that it can be computed without building the sympy expression."""
+        if self._fingerprint is None:
+            if self.tree is not None:
+                self._fingerprint = "tree:" + _tree_fingerprint(self.tree)
+            else:
+                self._fingerprint = "sympy:" + fingerprint(self.get())
+        return self._fingerprint
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LazyExpression):
+            return NotImplemented
+        return self is other or self.get() == other.get()
+
+    def __repr__(self) -> str:
+        return repr(self.get())
+
+    def __getstate__(self):
+        expr = self.get()
+        return (None, None, expr, None, self._fingerprint)
+
+    def __setstate__(self, state) -> None:
+        self.tree, self.symbols, self._expr, self.intern_table, self._fingerprint = state
+
+
+def _as_lazy_expression(expr: sp.Expr | LazyExpression) -> LazyExpression:
+    if isinstance(expr, LazyExpression):
+        return expr
+    return LazyExpression(tree=None, symbols=None, expr=expr)
 
 
 @attr.s(frozen=True, kw_only=True, slots=True)
@@ -225,9 +386,18 @@ class Assignment(Atom):
     """Assignments are object of the form `name = value`."""
 
     value: Expression | None = attr.ib()
-    expr: sp.Expr = attr.ib(sp.S.Zero)
+    # The sympy expression is built lazily, see the `expr` property
+    _expr: LazyExpression = attr.ib(sp.S.Zero, converter=_as_lazy_expression, hash=False)
     comment: Comment | None = attr.ib(None)
 
+    @property
+    def expr(self) -> sp.Expr:
+        """The sympy expression of the assignment"""
+        return self._expr.get()
+
+    def _fingerprint_value(self) -> str:
+        return self._expr.fingerprint
+
     def is_stateful(self, lookup: dict[str, Atom]) -> bool:
         # If the assignment depends on a state it is stateful
         # This is also recursive
@@ -310,7 +480,7 @@ class Assignment(Atom):
                 value=self.value,
                 components=self.components,
                 unit_str=self.unit_str,
-                unit=self.unit,
+                unit=self._unit,
                 expr=new_expr,
                 symbol=self.symbol,
                 description=self.description,
@@ -320,7 +490,11 @@ class Assignment(Atom):
         # Do not make a copy if no singularities
         return self
 
-    def resolve_expression(self, symbols: dict[str, sp.Symbol]) -> Assignment:
+    def resolve_expression(
+        self,
+        symbols: dict[str, sp.Symbol],
+        intern_table: dict[sp.Basic, sp.Basic] | None = None,
+    ) -> Assignment:
         """Resolve the expression of the assignment by
         building the sympy expression from the expression tree
 
@@ -328,6 +502,9 @@ class Assignment(Atom):
         ----------
         symbols : dict[str, sp.Symbol]
             A dictionary of all symbols in the model
+        intern_table : dict[sp.Basic, sp.Basic] | None, optional
+            Table used to share identical subexpressions between
+            assignments, by default None
 
         Returns
         -------
@@ -339,21 +516,31 @@ class Assignment(Atom):
         exceptions.ResolveExpressionError
             If the expression is not set
         """
-        if self.value is None:
-            raise exceptions.ResolveExpressionError(name=self.name)
-        expr = self.value.resolve(symbols)
         return type(self)(
             name=self.name,
             value=self.value,
             components=self.components,
             unit_str=self.unit_str,
-            unit=self.unit,
-            expr=expr,
+            unit=self._unit,
+            expr=self._lazy_expression(symbols, intern_table),
             symbol=self.symbol,
             description=self.description,
             comment=self.comment,
         )
 
+    def _lazy_expression(
+        self,
+        symbols: dict[str, sp.Symbol],
+        intern_table: dict[sp.Basic, sp.Basic] | None = None,
+    ) -> LazyExpression:
+        if self.value is None:
+            raise exceptions.ResolveExpressionError(name=self.name)
+        if not self.value.dependencies.issubset(symbols):
+            # Build the expression right away to raise
+            # a MissingSymbolError with the line number
+            self.value.resolve(symbols)
+        return LazyExpression(tree=self.value.tree, symbols=symbols, intern_table=intern_table)
+
     def to_intermediate(self) -> Intermediate:
         """Convert the Assignment to an Intermediate"""
         return Intermediate(
@@ -361,8 +548,8 @@ class Assignment(Atom):
             value=self.value,
             components=self.components,
             unit_str=self.unit_str,
-            unit=self.unit,
-            expr=self.expr,
+            unit=self._unit,
+            expr=self._expr,
             description=self.description,
             symbol=self.symbol,
             comment=self.comment,
@@ -381,9 +568,9 @@ class Assignment(Atom):
             value=self.value,
             components=self.components,
             unit_str=self.unit_str,
-            unit=self.unit,
+            unit=self._unit,
             state=state,
-            expr=self.expr,
+            expr=self._expr,
             description=self.description,
             symbol=self.symbol,
             comment=self.comment,
@@ -399,7 +586,7 @@ class Assignment(Atom):
             value=self.value,
             components=self.components,
             unit_str=self.unit_str,
-            unit=self.unit,
+            unit=self._unit,
             expr=self.expr.simplify(),
             description=self.description,
             symbol=self.symbol,
@@ -421,18 +608,19 @@ class StateDerivative(Assignment):
 
     state: State = attr.ib()
 
-    def resolve_expression(self, symbols: dict[str, sp.Symbol]) -> Assignment:
-        if self.value is None:
-            raise exceptions.ResolveExpressionError(name=self.name)
-        expr = self.value.resolve(symbols)
+    def resolve_expression(
+        self,
+        symbols: dict[str, sp.Symbol],
+        intern_table: dict[sp.Basic, sp.Basic] | None = None,
+    ) -> Assignment:
         return StateDerivative(
             name=self.name,
             value=self.value,
             components=self.components,
             unit_str=self.unit_str,
-            unit=self.unit,
+            unit=self._unit,
             symbol=self.symbol,
-            expr=expr,
+            expr=self._lazy_expression(symbols, intern_table),
             state=self.state,
             description=self.description,
             comment=self.comment,
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import io
+import os
+import pickle
+import sys
+import threading
+from functools import lru_cache
+from hashlib import sha256
+from pathlib import Path
+from typing import Any
+
+import sympy
+from structlog import get_logger
+
+logger = get_logger()
+
+
+def get_cache_dir() -> Path | None:
+    """Get the directory used by gotranx to store cached data
+
+    The directory can be set with the environment variable
+    ``GOTRANX_CACHE_DIR``. Otherwise ``$XDG_CACHE_HOME/gotranx``
+    (or ``~/.cache/gotranx``) is used.
+
+    Returns
+    -------
+    Path | None
+        Path to the cache directory, or None if the
+        directory could not be created
+    """
+    if (path := os.environ.get("GOTRANX_CACHE_DIR")) is not None:
+        cache_dir = Path(path)
+    else:
+        cache_dir = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "gotranx"
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        logger.debug(f"Unable to create cache directory {cache_dir}")
+        return None
+    return cache_dir
+
+
+DEFAULT_MAX_SIZE = 256 * 1024**2  # 256 MB
+
+
+def get_max_cache_size() -> int:
+    """Get the maximum size of each of the caches in bytes
+
+    The size can be set in megabytes with the environment
+    variable ``GOTRANX_CACHE_MAX_SIZE``, by default 256 MB
+
+    Returns
+    -------
+    int
+        The maximum size in bytes
+    """
+    if (size := os.environ.get("GOTRANX_CACHE_MAX_SIZE")) is not None:
+        try:
+            return int(float(size) * 1024**2)
+        except ValueError:
+            logger.warning(f"Invalid GOTRANX_CACHE_MAX_SIZE {size!r}")
+    return DEFAULT_MAX_SIZE
+
+
+@lru_cache(maxsize=None)
+def source_fingerprint() -> str:
+    """Get a hash of the source code of gotranx. Unlike the version
+    this also changes when an editable install of gotranx is modified,
+    which makes sure that cached ODEs and generated code are never outdated.
+    """
+    package = Path(__file__).parent
+    return hash_key(*(p.read_bytes() for p in sorted(package.rglob("*.py"))))
+
+
+def hash_key(*parts: str | bytes) -> str:
+    """Create a cache key from a number of strings
+
+    Parameters
+    ----------
+    parts : str | bytes
+        The content that should be part of the key
+
+    Returns
+    -------
+    str
+        A hexadecimal sha256 digest
+    """
+    h = sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        h.update(part)
+        # Separate the parts so that ("ab", "c") and ("a", "bc") differ
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _rebuild_sympy(func, args):
+    # Expressions are built with evaluate=False, so we need to make
+    # sure they are not evaluated (and altered) when unpickled
+    try:
+        return func(*args, evaluate=False)
+    except TypeError:
+        return func(*args)
+
+
+def _rebuild_unit(unit_str: str):
+    from .units import get_unit_registry
+
+    return get_unit_registry().Unit(unit_str)
+
+
+class _Pickler(pickle.Pickler):
+    def reducer_override(self, obj):
+        if isinstance(obj, sympy.Basic) and obj.args and not obj.is_Atom:
+            return _rebuild_sympy, (obj.func, obj.args)
+        # If pint is not imported there are no units to pickle
+        pint = sys.modules.get("pint")
+        if pint is not None and isinstance(obj, pint.Unit):
+            return _rebuild_unit, (str(obj),)
+        return NotImplemented
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize an object (e.g a `gotranx.ode.ODE`) to bytes
+
+    Unevaluated sympy expressions are kept as they are, and pint units
+    are recreated in the gotranx unit registry when loaded again.
+
+    Parameters
+    ----------
+    obj : Any
+        The object to serialize
+
+    Returns
+    -------
+    bytes
+        The serialized object
+    """
+    f = io.BytesIO()
+    _Pickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(obj)
+    return f.getvalue()
+
+
+def loads(data: bytes) -> Any:
+    """Load an object serialized with `dumps`
+
+    Parameters
+    ----------
+    data : bytes
+        The serialized object
+
+    Returns
+    -------
+    Any
+        The object
+    """
+    return pickle.loads(data)
+
+
+class DiskCache:
+    """A content addressed cache of objects stored on disk
+
+    Each object is stored in a separate file named after its key.
+    When the total size of the cache exceeds ``max_size`` the least
+    recently used entries are removed.
+
+    Parameters
+    ----------
+    directory : str | Path
+        The directory where the entries are stored
+    max_size : int | None, optional
+        Maximum size of the cache in bytes. By default
+        the size given by `get_max_cache_size`
+    """
+
+    suffix = ".pkl"
+
+    def __init__(self, directory: str | Path, max_size: int | None = None) -> None:
+        self.directory = Path(directory)
+        self.max_size = get_max_cache_size() if max_size is None else max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({str(self.directory)!r}, max_size={self.max_size})"
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def _entries(self) -> list[Path]:
+        return list(self.directory.glob(f"*{self.suffix}"))
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get an object from the cache
+
+        Parameters
+        ----------
+        key : str
+            The key of the object
+        default : Any, optional
+            Value returned if the key is not in the cache, by default None
+
+        Returns
+        -------
+        Any
+            The cached object or the default value
+        """
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return default
+
+        try:
+            value = loads(data)
+        except Exception:
+            logger.debug(f"Removing invalid cache entry {path}")
+            path.unlink(missing_ok=True)
+            return default
+
+        # Mark the entry as recently used. The entry might have been
+        # evicted by another process after we read it
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store an object in the cache
+
+        Parameters
+        ----------
+        key : str
+            The key of the object
+        value : Any
+            The object to store
+        """
+        path = self._path(key)
+        # Unique for each process and thread writing the same key
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(dumps(value))
+            # Atomic, so that concurrent readers never see partial files
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.debug(f"Unable to write cache entry {path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        self.evict()
+
+    @property
+    def size(self) -> int:
+        """Total size of the cache in bytes"""
+        return sum(p.stat().st_size for p in self._entries())
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until
+        the cache is smaller than the maximum size"""
+        entries = []
+        for p in self._entries():
+            try:
+                entries.append((p.stat(), p))
+            except OSError:
+                continue
+
+        size = sum(stat.st_size for stat, _ in entries)
+        for stat, p in sorted(entries, key=lambda x: x[0].st_mtime):
+            if size <= self.max_size:
+                break
+            logger.debug(f"Evicting cache entry {p}")
+            p.unlink(missing_ok=True)
+            size -= stat.st_size
+
+    def clear(self) -> None:
+        """Remove all entries in the cache"""
+        for p in self._entries():
+            p.unlink(missing_ok=True)
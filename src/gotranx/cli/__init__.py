@@ -1,4 +1,5 @@
 import typing
+from importlib import import_module as _import_module
 from pathlib import Path
 import warnings
 
@@ -6,11 +7,30 @@ import warnings
 import typer
 
 from ..schemes import Scheme, get_scheme
-from ..codegen import PythonFormat, CFormat
-from ..codegen.base import Shape
-from . import gotran2c, gotran2py, gotran2julia, gotran2md, gotran2mtk, gotran2ufl
+from ..codegen.python import Format as PythonFormat
+from ..codegen.c import Format as CFormat
+from ..codegen.base import Precision, Shape
+from . import gotran2c, gotran2py
 from . import utils
 
+if typing.TYPE_CHECKING:
+    from . import gotran2julia, gotran2md, gotran2mtk, gotran2ufl  # noqa: F401
+
+# The remaining backends are imported in their commands (or when first
+# accessed as attributes of this module) to keep the startup time low
+_submodules = {"gotran2julia", "gotran2md", "gotran2mtk", "gotran2ufl"}
+
+
+def __getattr__(name: str):
+    if name in _submodules:
+        return _import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _submodules)
+
+
 app = typer.Typer()
 
 
@@ -237,6 +257,67 @@ def ode2py(
         "--remove-unused",
         help="Remove unused variables",
     ),
+    use_cse: bool = typer.Option(
+        False,
+        "--cse",
+        help="Use common subexpression elimination",
+    ),
+    precompute: bool = typer.Option(
+        False,
+        "--precompute",
+        help="Compute the expressions that only depend on the parameters in a separate function",
+    ),
+    strength_reduction: bool = typer.Option(
+        False,
+        "--strength-reduction",
+        help="Rewrite the expressions to be cheaper to evaluate, e.g x*x instead of x**2",
+    ),
+    precision: Precision = typer.Option(
+        Precision.double,
+        "--precision",
+        help="Floating point precision of the generated code",
+    ),
+    monitored: typing.Annotated[
+        typing.List[str],
+        typer.Option(
+            "--monitored",
+            help=(
+                "Intermediates to monitor. Generates a function that only computes these, "
+                "and versions of the right hand side and the schemes that also return them"
+            ),
+        ),
+    ] = [],
+    jobs: int = typer.Option(
+        1,
+        "-j",
+        "--jobs",
+        help="Number of processes used to generate the functions",
+    ),
+    cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse the code from previous runs with the same ODE and options",
+    ),
+    cache_ode: bool = typer.Option(
+        False,
+        "--cache-ode",
+        help="Reuse the parsed ODE from previous runs with the same file",
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print the time spent in each stage of the code generation",
+    ),
+    profile_output: typing.Optional[Path] = typer.Option(
+        None,
+        "--profile-output",
+        help="Write the profile as json to this file",
+    ),
+    profile_memory: bool = typer.Option(
+        False,
+        "--profile-memory",
+        help="Include the peak memory of each stage in the profile (slow)",
+    ),
     version: bool = typer.Option(
         None,
         "--version",
@@ -275,6 +356,20 @@ def ode2py(
         1e-8,
         help="Delta value for the rush larsen schemes",
     ),
+    frozen_parameters: typing.Annotated[
+        typing.List[str],
+        typer.Option(
+            "--frozen-parameters",
+            help="Parameters that are replaced by their values in the generated code",
+        ),
+    ] = [],
+    free_parameters: typing.Annotated[
+        typing.List[str],
+        typer.Option(
+            "--free-parameters",
+            help="Freeze all parameters except these",
+        ),
+    ] = [],
     format: PythonFormat = typer.Option(
         PythonFormat.black,
         "--format",
@@ -299,27 +394,51 @@ def ode2py(
 
     config_data = utils.read_config(config)
     verbose = config_data.get("verbose", verbose)
+    cache = config_data.get("cache", cache)
+    cache_ode = config_data.get("cache_ode", cache_ode)
+    profile = config_data.get("profile", profile)
+    profile_output = config_data.get("profile_output", profile_output)
+    profile_memory = config_data.get("profile_memory", profile_memory)
     delta = config_data.get("delta", delta)
     stiff_states = config_data.get("stiff_states", stiff_states)
     scheme = config_data.get("scheme", scheme)
+    use_cse = config_data.get("cse", use_cse)
+    precompute = config_data.get("precompute", precompute)
+    strength_reduction = config_data.get("strength_reduction", strength_reduction)
+    precision = Precision(config_data.get("precision", precision))
+    monitored = config_data.get("monitored", monitored)
+    jobs = config_data.get("jobs", jobs)
+    frozen_parameters = config_data.get("frozen_parameters", frozen_parameters)
+    free_parameters = config_data.get("free_parameters", free_parameters)
     shape = Shape(config_data.get("shape", shape))
     scheme = utils.validate_scheme(scheme)
     py_config = config_data.get("python", {})
     format = PythonFormat(py_config.get("format", format))
     backend = gotran2py.Backend(py_config.get("backend", backend))
 
-    gotran2py.main(
-        fname=fname,
-        outname=outname,
-        scheme=scheme,
-        remove_unused=remove_unused,
-        verbose=verbose,
-        stiff_states=stiff_states,
-        delta=delta,
-        format=format,
-        backend=backend,
-        shape=shape,
-    )
+    with utils.profile_report(profile, profile_output, profile_memory):
+        gotran2py.main(
+            fname=fname,
+            outname=outname,
+            scheme=scheme,
+            remove_unused=remove_unused,
+            verbose=verbose,
+            stiff_states=stiff_states,
+            delta=delta,
+            format=format,
+            backend=backend,
+            shape=shape,
+            use_cse=use_cse,
+            precompute=precompute,
+            strength_reduction=strength_reduction,
+            precision=precision,
+            monitored=monitored,
+            workers=jobs,
+            frozen_parameters=frozen_parameters,
+            free_parameters=free_parameters,
+            cache=cache,
+            cache_ode=cache_ode,
+        )
 
 
 @app.command()
@@ -349,6 +468,78 @@ def ode2c(
         "--remove-unused",
         help="Remove unused variables",
     ),
+    use_cse: bool = typer.Option(
+        False,
+        "--cse",
+        help="Use common subexpression elimination",
+    ),
+    precompute: bool = typer.Option(
+        False,
+        "--precompute",
+        help="Compute the expressions that only depend on the parameters in a separate function",
+    ),
+    strength_reduction: bool = typer.Option(
+        False,
+        "--strength-reduction",
+        help="Rewrite the expressions to be cheaper to evaluate, e.g x*x instead of x**2",
+    ),
+    precision: Precision = typer.Option(
+        Precision.double,
+        "--precision",
+        help="Floating point precision of the generated code",
+    ),
+    double_states: typing.Annotated[
+        typing.List[str],
+        typer.Option(
+            "--double-states",
+            help=(
+                "States that are stored and updated in double precision in single "
+                "precision code. Their derivatives are still computed in single precision, "
+                "and the whole state array is stored in double precision"
+            ),
+        ),
+    ] = [],
+    monitored: typing.Annotated[
+        typing.List[str],
+        typer.Option(
+            "--monitored",
+            help=(
+                "Intermediates to monitor. Generates a function that only computes these, "
+                "and versions of the right hand side and the schemes that also return them"
+            ),
+        ),
+    ] = [],
+    jobs: int = typer.Option(
+        1,
+        "-j",
+        "--jobs",
+        help="Number of processes used to generate the functions",
+    ),
+    cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse the code from previous runs with the same ODE and options",
+    ),
+    cache_ode: bool = typer.Option(
+        False,
+        "--cache-ode",
+        help="Reuse the parsed ODE from previous runs with the same file",
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print the time spent in each stage of the code generation",
+    ),
+    profile_output: typing.Optional[Path] = typer.Option(
+        None,
+        "--profile-output",
+        help="Write the profile as json to this file",
+    ),
+    profile_memory: bool = typer.Option(
+        False,
+        "--profile-memory",
+        help="Include the peak memory of each stage in the profile (slow)",
+    ),
     version: bool = typer.Option(
         None,
         "--version",
@@ -387,6 +578,20 @@ def ode2c(
         1e-8,
         help="Delta value for the rush larsen schemes",
     ),
+    frozen_parameters: typing.Annotated[
+        typing.List[str],
+        typer.Option(
+            "--frozen-parameters",
+            help="Parameters that are replaced by their values in the generated code",
+        ),
+    ] = [],
+    free_parameters: typing.Annotated[
+        typing.List[str],
+        typer.Option(
+            "--free-parameters",
+            help="Freeze all parameters except these",
+        ),
+    ] = [],
     format: CFormat = typer.Option(
         CFormat.clang_format,
         "--format",
@@ -399,24 +604,50 @@ def ode2c(
 
     config_data = utils.read_config(config)
     verbose = config_data.get("verbose", verbose)
+    cache = config_data.get("cache", cache)
+    cache_ode = config_data.get("cache_ode", cache_ode)
+    profile = config_data.get("profile", profile)
+    profile_output = config_data.get("profile_output", profile_output)
+    profile_memory = config_data.get("profile_memory", profile_memory)
     delta = config_data.get("delta", delta)
     stiff_states = config_data.get("stiff_states", stiff_states)
     scheme = config_data.get("scheme", scheme)
+    use_cse = config_data.get("cse", use_cse)
+    precompute = config_data.get("precompute", precompute)
+    strength_reduction = config_data.get("strength_reduction", strength_reduction)
+    precision = Precision(config_data.get("precision", precision))
+    double_states = config_data.get("double_states", double_states)
+    monitored = config_data.get("monitored", monitored)
+    jobs = config_data.get("jobs", jobs)
+    frozen_parameters = config_data.get("frozen_parameters", frozen_parameters)
+    free_parameters = config_data.get("free_parameters", free_parameters)
     scheme = utils.validate_scheme(scheme)
     c_config = config_data.get("c", {})
     to = c_config.get("to", to)
     format = CFormat(c_config.get("format", format))
 
-    gotran2c.main(
-        fname=fname,
-        suffix=to,
-        outname=outname,
-        scheme=scheme,
-        remove_unused=remove_unused,
-        verbose=verbose,
-        stiff_states=stiff_states,
-        delta=delta,
-    )
+    with utils.profile_report(profile, profile_output, profile_memory):
+        gotran2c.main(
+            fname=fname,
+            suffix=to,
+            outname=outname,
+            scheme=scheme,
+            remove_unused=remove_unused,
+            verbose=verbose,
+            stiff_states=stiff_states,
+            delta=delta,
+            use_cse=use_cse,
+            precompute=precompute,
+            strength_reduction=strength_reduction,
+            precision=precision,
+            double_states=double_states,
+            monitored=monitored,
+            workers=jobs,
+            frozen_parameters=frozen_parameters,
+            free_parameters=free_parameters,
+            cache=cache,
+            cache_ode=cache_ode,
+        )
 
 
 @app.command()
@@ -441,6 +672,62 @@ def ode2julia(
         "--remove-unused",
         help="Remove unused variables",
     ),
+    use_cse: bool = typer.Option(
+        False,
+        "--cse",
+        help="Use common subexpression elimination",
+    ),
+    precompute: bool = typer.Option(
+        False,
+        "--precompute",
+        help="Compute the expressions that only depend on the parameters in a separate function",
+    ),
+    strength_reduction: bool = typer.Option(
+        False,
+        "--strength-reduction",
+        help="Rewrite the expressions to be cheaper to evaluate, e.g x*x instead of x**2",
+    ),
+    monitored: typing.Annotated[
+        typing.List[str],
+        typer.Option(
+            "--monitored",
+            help=(
+                "Intermediates to monitor. Generates a function that only computes these, "
+                "and versions of the right hand side and the schemes that also return them"
+            ),
+        ),
+    ] = [],
+    jobs: int = typer.Option(
+        1,
+        "-j",
+        "--jobs",
+        help="Number of processes used to generate the functions",
+    ),
+    cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse the code from previous runs with the same ODE and options",
+    ),
+    cache_ode: bool = typer.Option(
+        False,
+        "--cache-ode",
+        help="Reuse the parsed ODE from previous runs with the same file",
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print the time spent in each stage of the code generation",
+    ),
+    profile_output: typing.Optional[Path] = typer.Option(
+        None,
+        "--profile-output",
+        help="Write the profile as json to this file",
+    ),
+    profile_memory: bool = typer.Option(
+        False,
+        "--profile-memory",
+        help="Include the peak memory of each stage in the profile (slow)",
+    ),
     version: bool = typer.Option(
         None,
         "--version",
@@ -496,23 +783,43 @@ def ode2julia(
 
     config_data = utils.read_config(config)
     verbose = config_data.get("verbose", verbose)
+    cache = config_data.get("cache", cache)
+    cache_ode = config_data.get("cache_ode", cache_ode)
+    profile = config_data.get("profile", profile)
+    profile_output = config_data.get("profile_output", profile_output)
+    profile_memory = config_data.get("profile_memory", profile_memory)
     delta = config_data.get("delta", delta)
     stiff_states = config_data.get("stiff_states", stiff_states)
     scheme = config_data.get("scheme", scheme)
+    use_cse = config_data.get("cse", use_cse)
+    precompute = config_data.get("precompute", precompute)
+    strength_reduction = config_data.get("strength_reduction", strength_reduction)
+    monitored = config_data.get("monitored", monitored)
+    jobs = config_data.get("jobs", jobs)
     scheme = utils.validate_scheme(scheme)
     # c_config = config_data.get("c", {})
     # format = CFormat(c_config.get("format", format))
 
-    gotran2julia.main(
-        fname=fname,
-        outname=outname,
-        scheme=scheme,
-        remove_unused=remove_unused,
-        verbose=verbose,
-        stiff_states=stiff_states,
-        delta=delta,
-        type_stable=type_stable,
-    )
+    from . import gotran2julia
+
+    with utils.profile_report(profile, profile_output, profile_memory):
+        gotran2julia.main(
+            fname=fname,
+            outname=outname,
+            scheme=scheme,
+            remove_unused=remove_unused,
+            verbose=verbose,
+            stiff_states=stiff_states,
+            delta=delta,
+            type_stable=type_stable,
+            use_cse=use_cse,
+            precompute=precompute,
+            strength_reduction=strength_reduction,
+            monitored=monitored,
+            workers=jobs,
+            cache=cache,
+            cache_ode=cache_ode,
+        )
 
 
 @app.command()
@@ -537,6 +844,31 @@ def ode2mtk(
         "--remove-unused",
         help="Remove unused variables",
     ),
+    cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse the code from previous runs with the same ODE and options",
+    ),
+    cache_ode: bool = typer.Option(
+        False,
+        "--cache-ode",
+        help="Reuse the parsed ODE from previous runs with the same file",
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print the time spent in each stage of the code generation",
+    ),
+    profile_output: typing.Optional[Path] = typer.Option(
+        None,
+        "--profile-output",
+        help="Write the profile as json to this file",
+    ),
+    profile_memory: bool = typer.Option(
+        False,
+        "--profile-memory",
+        help="Include the peak memory of each stage in the profile (slow)",
+    ),
     version: bool = typer.Option(
         None,
         "--version",
@@ -569,13 +901,23 @@ def ode2mtk(
 
     config_data = utils.read_config(config)
     verbose = config_data.get("verbose", verbose)
+    cache = config_data.get("cache", cache)
+    cache_ode = config_data.get("cache_ode", cache_ode)
+    profile = config_data.get("profile", profile)
+    profile_output = config_data.get("profile_output", profile_output)
+    profile_memory = config_data.get("profile_memory", profile_memory)
     remove_unused = config_data.get("remove_unused", remove_unused)
-    gotran2mtk.main(
-        fname=fname,
-        outname=outname,
-        remove_unused=remove_unused,
-        verbose=verbose,
-    )
+    from . import gotran2mtk
+
+    with utils.profile_report(profile, profile_output, profile_memory):
+        gotran2mtk.main(
+            fname=fname,
+            outname=outname,
+            remove_unused=remove_unused,
+            verbose=verbose,
+            cache=cache,
+            cache_ode=cache_ode,
+        )
 
 
 @app.command()
@@ -652,11 +994,29 @@ def ode2md(
         "--pdf",
         help="Generate PDF output",
     ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print the time spent in each stage of the code generation",
+    ),
+    profile_output: typing.Optional[Path] = typer.Option(
+        None,
+        "--profile-output",
+        help="Write the profile as json to this file",
+    ),
+    profile_memory: bool = typer.Option(
+        False,
+        "--profile-memory",
+        help="Include the peak memory of each stage in the profile (slow)",
+    ),
 ):
     if fname is None:
         return typer.echo("No file specified")
 
-    gotran2md.main(fname=fname, outname=outname, verbose=verbose, pdf=pdf)
+    from . import gotran2md
+
+    with utils.profile_report(profile, profile_output, profile_memory):
+        gotran2md.main(fname=fname, outname=outname, verbose=verbose, pdf=pdf)
 
 
 @app.command()
@@ -681,6 +1041,31 @@ def ode2ufl(
         "--remove-unused",
         help="Remove unused variables",
     ),
+    cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse the code from previous runs with the same ODE and options",
+    ),
+    cache_ode: bool = typer.Option(
+        False,
+        "--cache-ode",
+        help="Reuse the parsed ODE from previous runs with the same file",
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print the time spent in each stage of the code generation",
+    ),
+    profile_output: typing.Optional[Path] = typer.Option(
+        None,
+        "--profile-output",
+        help="Write the profile as json to this file",
+    ),
+    profile_memory: bool = typer.Option(
+        False,
+        "--profile-memory",
+        help="Include the peak memory of each stage in the profile (slow)",
+    ),
     version: bool = typer.Option(
         None,
         "--version",
@@ -737,6 +1122,11 @@ def ode2ufl(
 
     config_data = utils.read_config(config)
     verbose = config_data.get("verbose", verbose)
+    cache = config_data.get("cache", cache)
+    cache_ode = config_data.get("cache_ode", cache_ode)
+    profile = config_data.get("profile", profile)
+    profile_output = config_data.get("profile_output", profile_output)
+    profile_memory = config_data.get("profile_memory", profile_memory)
     delta = config_data.get("delta", delta)
     stiff_states = config_data.get("stiff_states", stiff_states)
     scheme = config_data.get("scheme", scheme)
@@ -745,14 +1135,19 @@ def ode2ufl(
     py_config = config_data.get("python", {})
     format = PythonFormat(py_config.get("format", format))
 
-    gotran2ufl.main(
-        fname=fname,
-        outname=outname,
-        scheme=scheme,
-        remove_unused=remove_unused,
-        verbose=verbose,
-        stiff_states=stiff_states,
-        delta=delta,
-        format=format,
-        shape=shape,
-    )
+    from . import gotran2ufl
+
+    with utils.profile_report(profile, profile_output, profile_memory):
+        gotran2ufl.main(
+            fname=fname,
+            outname=outname,
+            scheme=scheme,
+            remove_unused=remove_unused,
+            verbose=verbose,
+            stiff_states=stiff_states,
+            delta=delta,
+            format=format,
+            shape=shape,
+            cache=cache,
+            cache_ode=cache_ode,
+        )
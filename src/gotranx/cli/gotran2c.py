@@ -1,18 +1,28 @@
 from __future__ import annotations
 from pathlib import Path
+import functools
 import logging
 import structlog
 
+from ..codegen.base import Precision
 from ..codegen.c import CCodeGenerator, Format, get_formatter
+from ..cache import DiskCache
 from ..load import load_ode
 from ..schemes import Scheme
 from ..ode import ODE
 
-from .utils import add_schemes
+from .utils import (
+    cached_code,
+    format_code,
+    function_tasks,
+    generate_code,
+    get_frozen_parameters,
+)
 
 logger = structlog.get_logger()
 
 
+@cached_code("c")
 def get_code(
     ode: ODE,
     scheme: list[Scheme] | None = None,
@@ -21,6 +31,17 @@ def get_code(
     missing_values: dict[str, int] | None = None,
     delta: float = 1e-8,
     stiff_states: list[str] | None = None,
+    *,
+    use_cse: bool = False,
+    precompute: bool = False,
+    strength_reduction: bool = False,
+    precision: Precision = Precision.double,
+    double_states: list[str] | None = None,
+    monitored: list[str] | None = None,
+    workers: int | None = 1,
+    frozen_parameters: list[str] | None = None,
+    free_parameters: list[str] | None = None,
+    cache: bool | DiskCache = False,
 ) -> str:
     """Generate the Python code for the ODE
 
@@ -41,48 +62,85 @@ def get_code(
     stiff_states : list[str] | None, optional
         Stiff states, by default None. Only applicable for
         the hybrid rush larsen scheme
+    use_cse : bool, optional
+        Use common subexpression elimination, by default False
+    precompute : bool, optional
+        Compute the assignments that only depend on the parameters in
+        a separate function, by default False
+    strength_reduction : bool, optional
+        Rewrite the expressions to be cheaper to evaluate, e.g ``x*x``
+        instead of ``pow(x, 2)``, by default False
+    precision : Precision, optional
+        Floating point precision of the generated code, by default Precision.double
+    double_states : list[str] | None, optional
+        States that are kept in double precision when generating single
+        precision code. The arrays of states and computed values are then
+        stored in double precision, and these states are read and updated
+        (i.e ``x + dt*dx_dt``) in double precision. Everything else, including
+        the derivatives of these states, is computed in single precision, by
+        default None
+    monitored : list[str] | None, optional
+        If given, also generate a function that only computes these
+        intermediates, and versions of the right hand side and the
+        schemes that store them in a second array, by default None
+    workers : int | None, optional
+        Number of processes used to generate the functions. If None use
+        the number of CPUs, and if 1 generate them in the current process.
+        By default 1
+    frozen_parameters : list[str] | None, optional
+        Parameters that are replaced by their values in the generated
+        code, by default None
+    free_parameters : list[str] | None, optional
+        If given, all parameters except these are frozen, by default None
+    cache : bool | gotranx.cache.DiskCache, optional
+        Return the cached code if the same code has been generated before,
+        see `gotranx.cli.utils.cached_code`. By default False
 
     Returns
     -------
     str
         The C code
     """
-    codegen = CCodeGenerator(ode, remove_unused=remove_unused, format=Format.none)
-    formatter = get_formatter(format=format)
+    factory = functools.partial(
+        CCodeGenerator,
+        ode,
+        remove_unused=remove_unused,
+        format=Format.none,
+        frozen_parameters=get_frozen_parameters(ode, frozen_parameters, free_parameters),
+        precompute=precompute,
+        strength_reduction=strength_reduction,
+        precision=precision,
+        double_states=double_states,
+    )
+    codegen = factory()
 
-    if missing_values is not None:
-        _missing_values = codegen.missing_values(missing_values)
-    else:
-        _missing_values = ""
+    tasks = function_tasks(
+        scheme=scheme,
+        missing_values=missing_values,
+        delta=delta,
+        stiff_states=stiff_states,
+        use_cse=use_cse,
+        precompute=precompute,
+        monitored=monitored,
+    )
 
     comp = [
         codegen.imports(),
         f"int NUM_STATES = {len(ode.states)};",
         f"int NUM_PARAMS = {len(ode.parameters)};",
         f"int NUM_MONITORED = {len(ode.state_derivatives) + len(ode.intermediates)};",
+        f"int NUM_PRECOMPUTED = {len(codegen.precomputed_index)};" if precompute else "",
         codegen.parameter_index(),
         codegen.state_index(),
         codegen.monitor_index(),
+        codegen.monitored_index(monitored) if monitored else "",
         codegen.missing_index(),
         codegen.initial_parameter_values(),
         codegen.initial_state_values(),
-        codegen.rhs(),
-        codegen.monitor_values(),
-        _missing_values,
-    ] + add_schemes(
-        codegen,
-        scheme=scheme,
-        delta=delta,
-        stiff_states=stiff_states,
-    )
-
-    code = codegen._format("\n".join(comp))
-
-    if format != Format.none:
-        logger.debug("Applying formatter", format=format)
-        code = formatter(code)
+    ] + generate_code(factory, tasks, workers=workers, codegen=codegen)
 
-    return code
+    format = Format(format)
+    return format_code("\n".join(comp), format.value, get_formatter(format=format), cache)
 
 
 def main(
@@ -96,12 +154,24 @@ def main(
     missing_values: dict[str, int] | None = None,
     delta: float = 1e-8,
     stiff_states: list[str] | None = None,
+    *,
+    use_cse: bool = False,
+    precompute: bool = False,
+    strength_reduction: bool = False,
+    precision: Precision = Precision.double,
+    double_states: list[str] | None = None,
+    monitored: list[str] | None = None,
+    workers: int | None = 1,
+    frozen_parameters: list[str] | None = None,
+    free_parameters: list[str] | None = None,
+    cache: bool = False,
+    cache_ode: bool = False,
 ) -> None:
     loglevel = logging.DEBUG if verbose else logging.INFO
     structlog.configure(
         wrapper_class=structlog.make_filtering_bound_logger(loglevel),
     )
-    ode = load_ode(fname)
+    ode = load_ode(fname, cache=cache_ode)
     code = get_code(
         ode,
         scheme=scheme,
@@ -110,6 +180,16 @@ def main(
         missing_values=missing_values,
         delta=delta,
         stiff_states=stiff_states,
+        use_cse=use_cse,
+        precompute=precompute,
+        strength_reduction=strength_reduction,
+        precision=precision,
+        double_states=double_states,
+        monitored=monitored,
+        workers=workers,
+        frozen_parameters=frozen_parameters,
+        free_parameters=free_parameters,
+        cache=cache,
     )
     out = fname if outname is None else Path(outname)
     out_name = out.with_suffix(suffix=suffix)
@@ -1,18 +1,21 @@
 from __future__ import annotations
 from pathlib import Path
+import functools
 import logging
 import structlog
 
 from ..codegen.julia import JuliaCodeGenerator  # , Format, get_formatter
+from ..cache import DiskCache
 from ..load import load_ode
 from ..schemes import Scheme
 from ..ode import ODE
 
-from .utils import add_schemes
+from .utils import cached_code, function_tasks, generate_code
 
 logger = structlog.get_logger()
 
 
+@cached_code("julia")
 def get_code(
     ode: ODE,
     scheme: list[Scheme] | None = None,
@@ -22,6 +25,13 @@ def get_code(
     delta: float = 1e-8,
     stiff_states: list[str] | None = None,
     type_stable: bool = False,
+    *,
+    use_cse: bool = False,
+    precompute: bool = False,
+    strength_reduction: bool = False,
+    monitored: list[str] | None = None,
+    workers: int | None = 1,
+    cache: bool | DiskCache = False,
 ) -> str:
     """Generate the Julia code for the ODE
 
@@ -44,42 +54,65 @@ def get_code(
         the hybrid rush larsen scheme
     type_stable : bool, optional
         Add TYPE to the function signature, by default False
+    use_cse : bool, optional
+        Use common subexpression elimination, by default False
+    precompute : bool, optional
+        Compute the assignments that only depend on the parameters in
+        a separate function, by default False
+    strength_reduction : bool, optional
+        Rewrite the expressions to be cheaper to evaluate, e.g ``x*x``
+        instead of ``pow(x, 2)``, by default False
+    monitored : list[str] | None, optional
+        If given, also generate a function that only computes these
+        intermediates, and versions of the right hand side and the
+        schemes that store them in a second array, by default None
+    workers : int | None, optional
+        Number of processes used to generate the functions. If None use
+        the number of CPUs, and if 1 generate them in the current process.
+        By default 1
+    cache : bool | gotranx.cache.DiskCache, optional
+        Return the cached code if the same code has been generated before,
+        see `gotranx.cli.utils.cached_code`. By default False
 
     Returns
     -------
     str
         The Julia code
     """
-    codegen = JuliaCodeGenerator(
-        ode, remove_unused=remove_unused, type_stable=type_stable
+    factory = functools.partial(
+        JuliaCodeGenerator,
+        ode,
+        remove_unused=remove_unused,
+        type_stable=type_stable,
+        precompute=precompute,
+        strength_reduction=strength_reduction,
     )  # , format=Format.none)
+    codegen = factory()
     # formatter = get_formatter(format=format)
-
-    if missing_values is not None:
-        _missing_values = codegen.missing_values(missing_values)
-    else:
-        _missing_values = ""
+    tasks = function_tasks(
+        scheme=scheme,
+        missing_values=missing_values,
+        delta=delta,
+        stiff_states=stiff_states,
+        use_cse=use_cse,
+        precompute=precompute,
+        monitored=monitored,
+    )
 
     comp = [
         codegen.imports(),
         f"const NUM_STATES = {len(ode.states)};",
         f"const NUM_PARAMS = {len(ode.parameters)};",
         f"const NUM_MONITORED = {len(ode.state_derivatives) + len(ode.intermediates)};",
+        f"const NUM_PRECOMPUTED = {len(codegen.precomputed_index)};" if precompute else "",
         codegen.parameter_index(),
         codegen.state_index(),
         codegen.monitor_index(),
+        codegen.monitored_index(monitored) if monitored else "",
         codegen.missing_index(),
         codegen.initial_parameter_values(),
         codegen.initial_state_values(),
-        codegen.rhs(),
-        codegen.monitor_values(),
-        _missing_values,
-    ] + add_schemes(
-        codegen,
-        scheme=scheme,
-        delta=delta,
-        stiff_states=stiff_states,
-    )
+    ] + generate_code(factory, tasks, workers=workers, codegen=codegen)
 
     code = codegen._format("\n".join(comp))
 
@@ -96,12 +129,20 @@ def main(
     delta: float = 1e-8,
     stiff_states: list[str] | None = None,
     type_stable: bool = False,
+    *,
+    use_cse: bool = False,
+    precompute: bool = False,
+    strength_reduction: bool = False,
+    monitored: list[str] | None = None,
+    workers: int | None = 1,
+    cache: bool = False,
+    cache_ode: bool = False,
 ) -> None:
     loglevel = logging.DEBUG if verbose else logging.INFO
     structlog.configure(
         wrapper_class=structlog.make_filtering_bound_logger(loglevel),
     )
-    ode = load_ode(fname)
+    ode = load_ode(fname, cache=cache_ode)
     code = get_code(
         ode,
         scheme=scheme,
@@ -111,6 +152,12 @@ def main(
         delta=delta,
         stiff_states=stiff_states,
         type_stable=type_stable,
+        use_cse=use_cse,
+        precompute=precompute,
+        strength_reduction=strength_reduction,
+        monitored=monitored,
+        workers=workers,
+        cache=cache,
     )
     out = fname if outname is None else Path(outname)
     out_name = out.with_suffix(suffix=".jl")
@@ -5,15 +5,20 @@ import logging
 import structlog
 
 from ..codegen.mtk import MTKCodeGenerator
+from ..cache import DiskCache
 from ..load import load_ode
 from ..ode import ODE
+from .utils import cached_code
 
 logger = structlog.get_logger()
 
 
+@cached_code("mtk")
 def get_code(
     ode: ODE,
     remove_unused: bool = False,
+    *,
+    cache: bool | DiskCache = False,
 ) -> str:
     """Generate ModelingToolkit.jl code for the ODE."""
     codegen = MTKCodeGenerator(ode, remove_unused=remove_unused)
@@ -25,15 +30,19 @@ def main(
     outname: Path | str | None = None,
     remove_unused: bool = False,
     verbose: bool = False,
+    *,
+    cache: bool = False,
+    cache_ode: bool = False,
 ) -> None:
     loglevel = logging.DEBUG if verbose else logging.INFO
     structlog.configure(
         wrapper_class=structlog.make_filtering_bound_logger(loglevel),
     )
-    ode = load_ode(fname)
+    ode = load_ode(fname, cache=cache_ode)
     code = get_code(
         ode,
         remove_unused=remove_unused,
+        cache=cache,
     )
     out = fname if outname is None else Path(outname)
     out_name = out.with_suffix(suffix=".jl")
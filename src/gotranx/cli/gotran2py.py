@@ -1,17 +1,24 @@
 from __future__ import annotations
 from pathlib import Path
+import functools
 import logging
 import enum
 import structlog
 
-from ..codegen.base import Shape
-from ..codegen.jax import JaxCodeGenerator
+from ..codegen.base import Precision, Shape
 from ..codegen.python import PythonCodeGenerator, get_formatter, Format
+from ..cache import DiskCache
 from ..load import load_ode
 from ..schemes import Scheme
 from ..ode import ODE
 
-from .utils import add_schemes
+from .utils import (
+    cached_code,
+    format_code,
+    function_tasks,
+    generate_code,
+    get_frozen_parameters,
+)
 
 logger = structlog.get_logger()
 
@@ -21,6 +28,7 @@ class Backend(str, enum.Enum):
     jax = "jax"
 
 
+@cached_code("python")
 def get_code(
     ode: ODE,
     scheme: list[Scheme] | None = None,
@@ -31,6 +39,16 @@ def get_code(
     stiff_states: list[str] | None = None,
     backend: Backend = Backend.numpy,
     shape: Shape = Shape.dynamic,
+    *,
+    use_cse: bool = False,
+    precompute: bool = False,
+    strength_reduction: bool = False,
+    precision: Precision = Precision.double,
+    monitored: list[str] | None = None,
+    workers: int | None = 1,
+    frozen_parameters: list[str] | None = None,
+    free_parameters: list[str] | None = None,
+    cache: bool | DiskCache = False,
 ) -> str:
     """Generate the Python code for the ODE
 
@@ -55,6 +73,32 @@ def get_code(
         The backend, by default Backend.numpy
     shape : Shape, optional
         The shape of the output arrays, by default Shape.dynamic
+    use_cse : bool, optional
+        Use common subexpression elimination, by default False
+    precompute : bool, optional
+        Compute the assignments that only depend on the parameters in
+        a separate function, by default False
+    strength_reduction : bool, optional
+        Rewrite the expressions to be cheaper to evaluate, e.g ``x*x``
+        instead of ``pow(x, 2)``, by default False
+    precision : Precision, optional
+        Floating point precision of the generated code, by default Precision.double
+    monitored : list[str] | None, optional
+        If given, also generate a function that only computes these
+        intermediates, and versions of the right hand side and the
+        schemes that store them in a second array, by default None
+    workers : int | None, optional
+        Number of processes used to generate the functions. If None use
+        the number of CPUs, and if 1 generate them in the current process.
+        By default 1
+    frozen_parameters : list[str] | None, optional
+        Parameters that are replaced by their values in the generated
+        code, by default None
+    free_parameters : list[str] | None, optional
+        If given, all parameters except these are frozen, by default None
+    cache : bool | gotranx.cache.DiskCache, optional
+        Return the cached code if the same code has been generated before,
+        see `gotranx.cli.utils.cached_code`. By default False
 
 
     Returns
@@ -65,46 +109,47 @@ def get_code(
     if backend == Backend.numpy:
         CodeGenerator = PythonCodeGenerator
     elif backend == Backend.jax:
+        from ..codegen.jax import JaxCodeGenerator
+
         CodeGenerator = JaxCodeGenerator
     else:
         raise ValueError(f"Unknown backend {backend}")
 
-    codegen = CodeGenerator(
+    factory = functools.partial(
+        CodeGenerator,
         ode,
         format=Format.none,
         remove_unused=remove_unused,
         shape=shape,
+        frozen_parameters=get_frozen_parameters(ode, frozen_parameters, free_parameters),
+        precompute=precompute,
+        strength_reduction=strength_reduction,
+        precision=precision,
+    )
+    codegen = factory()
+
+    tasks = function_tasks(
+        scheme=scheme,
+        missing_values=missing_values,
+        delta=delta,
+        stiff_states=stiff_states,
+        use_cse=use_cse,
+        precompute=precompute,
+        monitored=monitored,
     )
-    formatter = get_formatter(format=format)
-    if missing_values is not None:
-        _missing_values = codegen.missing_values(missing_values)
-    else:
-        _missing_values = ""
 
     comp = [
         codegen.imports(),
         codegen.parameter_index(),
         codegen.state_index(),
         codegen.monitor_index(),
+        codegen.monitored_index(monitored) if monitored else "",
         codegen.missing_index(),
         codegen.initial_parameter_values(),
         codegen.initial_state_values(),
-        codegen.rhs(),
-        codegen.monitor_values(),
-        _missing_values,
-    ] + add_schemes(
-        codegen,
-        scheme=scheme,
-        delta=delta,
-        stiff_states=stiff_states,
-    )
-    code = codegen._format("\n".join(comp))
-
-    if format != Format.none:
-        # Run the formatter only once
-        logger.debug("Applying formatter", format=format)
-        code = formatter(code)
-    return code
+    ] + generate_code(factory, tasks, workers=workers, codegen=codegen)
+    format = Format(format)
+    return format_code("\n".join(comp), format.value, get_formatter(format=format), cache)
 
 
 def main(
@@ -119,13 +164,24 @@ def main(
     suffix: str = ".py",
     backend: Backend = Backend.numpy,
     shape: Shape = Shape.dynamic,
+    *,
+    use_cse: bool = False,
+    precompute: bool = False,
+    strength_reduction: bool = False,
+    precision: Precision = Precision.double,
+    monitored: list[str] | None = None,
+    workers: int | None = 1,
+    frozen_parameters: list[str] | None = None,
+    free_parameters: list[str] | None = None,
+    cache: bool = False,
+    cache_ode: bool = False,
 ) -> None:
     loglevel = logging.DEBUG if verbose else logging.INFO
     structlog.configure(
         wrapper_class=structlog.make_filtering_bound_logger(loglevel),
     )
 
-    ode = load_ode(fname)
+    ode = load_ode(fname, cache=cache_ode)
 
     code = get_code(
         ode,
@@ -136,6 +192,15 @@ def main(
         delta=delta,
         backend=backend,
         shape=shape,
+        use_cse=use_cse,
+        precompute=precompute,
+        strength_reduction=strength_reduction,
+        precision=precision,
+        monitored=monitored,
+        workers=workers,
+        frozen_parameters=frozen_parameters,
+        free_parameters=free_parameters,
+        cache=cache,
     )
     out = fname if outname is None else Path(outname)
     out_name = out.with_suffix(suffix=suffix)
@@ -6,15 +6,17 @@ import structlog
 from ..codegen.base import Shape
 from ..codegen.ufl import UFLCodeGenerator
 from ..codegen.python import get_formatter, Format
+from ..cache import DiskCache
 from ..load import load_ode
 from ..schemes import Scheme
 from ..ode import ODE
 
-from .utils import add_schemes
+from .utils import add_schemes, cached_code, format_code
 
 logger = structlog.get_logger()
 
 
+@cached_code("ufl")
 def get_code(
     ode: ODE,
     scheme: list[Scheme] | None = None,
@@ -24,6 +26,8 @@ def get_code(
     delta: float = 1e-8,
     stiff_states: list[str] | None = None,
     shape: Shape = Shape.dynamic,
+    *,
+    cache: bool | DiskCache = False,
 ) -> str:
     """Generate the UFL code for the ODE"""
     codegen = UFLCodeGenerator(
@@ -32,7 +36,6 @@ def get_code(
         remove_unused=remove_unused,
         shape=shape,
     )
-    formatter = get_formatter(format=format)
     if missing_values is not None:
         _missing_values = codegen.missing_values(missing_values)
     else:
@@ -55,13 +58,8 @@ def get_code(
         delta=delta,
         stiff_states=stiff_states,
     )
-    code = codegen._format("\n".join(comp))
-
-    if format != Format.none:
-        # Run the formatter only once
-        logger.debug("Applying formatter", format=format)
-        code = formatter(code)
-    return code
+    format = Format(format)
+    return format_code("\n".join(comp), format.value, get_formatter(format=format), cache)
 
 
 def main(
@@ -75,13 +73,16 @@ def main(
     delta: float = 1e-8,
     suffix: str = ".py",
     shape: Shape = Shape.dynamic,
+    *,
+    cache: bool = False,
+    cache_ode: bool = False,
 ) -> None:
     loglevel = logging.DEBUG if verbose else logging.INFO
     structlog.configure(
         wrapper_class=structlog.make_filtering_bound_logger(loglevel),
     )
 
-    ode = load_ode(fname)
+    ode = load_ode(fname, cache=cache_ode)
 
     code = get_code(
         ode,
@@ -91,6 +92,7 @@ def main(
         stiff_states=stiff_states,
         delta=delta,
         shape=shape,
+        cache=cache,
     )
     out = fname if outname is None else Path(outname)
     out_name = out.with_suffix(suffix=suffix)
@@ -1,30 +1,184 @@
 from __future__ import annotations
-from typing import Any
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import functools
+import inspect
+import typing
+from typing import Any, Callable, Iterator, NamedTuple, TypeVar
+from importlib import metadata
 from pathlib import Path
 
+import structlog
 import typer
 
+from ..cache import DiskCache, dumps, get_cache_dir, hash_key, loads, source_fingerprint
 from ..codegen import CodeGenerator
+from ..ode import ODE
+from ..profiling import profile, stage
 from ..schemes import Scheme, get_scheme
 
+logger = structlog.get_logger()
 
-def add_schemes(
-    codegen: CodeGenerator,
+F = TypeVar("F", bound=Callable[..., str])
+
+
+class Task(NamedTuple):
+    """A call to one of the methods of a code generator
+    that generates a function (e.g `rhs` or `scheme`). For
+    the `scheme` method the first argument is the name of the scheme"""
+
+    method: str
+    args: tuple[Any, ...] = ()
+    kwargs: dict[str, Any] = {}
+
+
+def scheme_tasks(
     scheme: list[Scheme] | None = None,
     delta: float = 1e-8,
     stiff_states: list[str] | None = None,
-) -> list[str]:
-    comp = []
+    use_cse: bool = False,
+    monitored: list[str] | None = None,
+) -> list[Task]:
+    tasks = []
     if scheme is not None:
         for s in scheme:
-            kwargs: dict[str, Any] = {}
+            kwargs: dict[str, Any] = {"use_cse": use_cse}
             if "rush_larsen" in s.value:
                 kwargs["delta"] = delta
             if s.value == "hybrid_rush_larsen":
                 kwargs["stiff_states"] = stiff_states
 
-            comp.append(codegen.scheme(get_scheme(s.value), **kwargs))
-    return comp
+            tasks.append(Task("scheme", (s.value,), kwargs))
+            if monitored:
+                tasks.append(Task("scheme", (s.value,), {**kwargs, "monitored": monitored}))
+    return tasks
+
+
+def function_tasks(
+    scheme: list[Scheme] | None = None,
+    missing_values: dict[str, int] | None = None,
+    delta: float = 1e-8,
+    stiff_states: list[str] | None = None,
+    use_cse: bool = False,
+    precompute: bool = False,
+    monitored: list[str] | None = None,
+) -> list[Task]:
+    """Get the tasks for generating the precompute function (if
+    `precompute` is True), the right hand side, the monitored values,
+    the missing values (if given) and the schemes"""
+    tasks = []
+    if precompute:
+        tasks.append(Task("precompute", kwargs={"use_cse": use_cse}))
+    tasks.append(Task("rhs", kwargs={"use_cse": use_cse}))
+    if monitored:
+        tasks.append(Task("rhs", kwargs={"use_cse": use_cse, "monitored": monitored}))
+    tasks.append(Task("monitor_values", kwargs={"use_cse": use_cse}))
+    if monitored:
+        tasks.append(Task("monitored_values", (monitored,), {"use_cse": use_cse}))
+    if missing_values is not None:
+        tasks.append(Task("missing_values", (missing_values,), {"use_cse": use_cse}))
+    return tasks + scheme_tasks(
+        scheme=scheme,
+        delta=delta,
+        stiff_states=stiff_states,
+        use_cse=use_cse,
+        monitored=monitored,
+    )
+
+
+def add_schemes(
+    codegen: CodeGenerator,
+    scheme: list[Scheme] | None = None,
+    delta: float = 1e-8,
+    stiff_states: list[str] | None = None,
+    use_cse: bool = False,
+    monitored: list[str] | None = None,
+) -> list[str]:
+    tasks = scheme_tasks(
+        scheme=scheme,
+        delta=delta,
+        stiff_states=stiff_states,
+        use_cse=use_cse,
+        monitored=monitored,
+    )
+    return [run_task(codegen, task) for task in tasks]
+
+
+def run_task(codegen: CodeGenerator, task: Task) -> str:
+    args = task.args
+    if task.method == "scheme":
+        # Get the scheme right before it is used, since
+        # get_scheme sets the name of the scheme function
+        args = (get_scheme(args[0]), *args[1:])
+    with stage(f"generate {task.method}"):
+        return getattr(codegen, task.method)(*args, **task.kwargs)
+
+
+# The code generator used by the tasks in each worker process
+_worker_codegen: CodeGenerator | None = None
+
+
+def _init_worker(factory: bytes) -> None:
+    global _worker_codegen
+    _worker_codegen = loads(factory)()
+
+
+def _run_task(task: Task) -> str:
+    assert _worker_codegen is not None, "Worker is not initialized"
+    return run_task(_worker_codegen, task)
+
+
+def generate_code(
+    factory: Callable[[], CodeGenerator],
+    tasks: list[Task],
+    workers: int | None = 1,
+    codegen: CodeGenerator | None = None,
+) -> list[str]:
+    """Generate the code for several functions, possibly in parallel
+    using a pool of processes
+
+    Parameters
+    ----------
+    factory : Callable[[], CodeGenerator]
+        Function that creates the code generator, e.g a `functools.partial`
+        of the code generator class. It is sent to each worker process, and
+        must therefore be possible to pickle.
+    tasks : list[Task]
+        The functions to generate
+    workers : int | None, optional
+        Number of processes to use. If None use the number of CPUs, and if 1
+        generate the code in the current process. By default 1
+    codegen : CodeGenerator | None, optional
+        Code generator to use when the code is generated in the current
+        process. If not provided it is created using the factory
+
+    Returns
+    -------
+    list[str]
+        The code for each of the tasks, in the same order as the tasks
+    """
+    if workers == 1 or len(tasks) <= 1:
+        codegen = codegen or factory()
+        return [run_task(codegen, task) for task in tasks]
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(dumps(factory),)
+    ) as executor:
+        return list(executor.map(_run_task, tasks))
+
+
+def get_frozen_parameters(
+    ode: ODE,
+    frozen_parameters: list[str] | None = None,
+    free_parameters: list[str] | None = None,
+) -> list[str]:
+    """Get the names of the parameters to freeze. If free parameters
+    are given, all the other parameters are frozen as well."""
+    frozen = list(frozen_parameters or [])
+    if free_parameters:
+        free = set(free_parameters)
+        frozen += [p.name for p in ode.parameters if p.name not in free and p.name not in frozen]
+    return frozen
 
 
 def find_pyproject_toml_config() -> Path | None:
@@ -77,3 +231,172 @@ def validate_scheme(scheme: list[Scheme] | list[str]) -> list[Scheme]:
         else:
             lst.append(s)
     return lst
+
+
+def get_code_cache() -> DiskCache | None:
+    """Get the default cache for generated code
+
+    Returns
+    -------
+    DiskCache | None
+        The cache, or None if no cache directory is available
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    return DiskCache(cache_dir / "code")
+
+
+def get_format_cache() -> DiskCache | None:
+    """Get the default cache for formatted code
+
+    Returns
+    -------
+    DiskCache | None
+        The cache, or None if no cache directory is available
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    return DiskCache(cache_dir / "formatted")
+
+
+@functools.lru_cache
+def _formatter_version(format: str) -> str:
+    try:
+        return metadata.version(format)
+    except metadata.PackageNotFoundError:
+        return ""
+
+
+def format_code(
+    code: str,
+    format: str,
+    formatter: Callable[[str], str],
+    cache: bool | DiskCache = False,
+) -> str:
+    """Format the code for a complete output file. This should be the
+    only time the formatter is run on the code, i.e the code generator
+    should be created without a formatter.
+
+    Parameters
+    ----------
+    code : str
+        The unformatted code
+    format : str
+        Name of the formatter, e.g "black" or "clang-format"
+    formatter : Callable[[str], str]
+        The formatter
+    cache : bool | DiskCache, optional
+        If True, use the default cache (see `get_format_cache`) to
+        reuse the output from previous runs with the same unformatted
+        code. You can also pass your own `gotranx.cache.DiskCache`.
+        By default False
+
+    Returns
+    -------
+    str
+        The formatted code
+    """
+    if format == "none":
+        return code
+
+    if cache is True:
+        cache = get_format_cache() or False
+    key = hash_key(format, _formatter_version(format), code)
+    if cache is not False and (formatted := cache.get(key)) is not None:
+        logger.debug(f"Using cached {format} output from {cache}")
+        return formatted
+
+    logger.debug("Applying formatter", format=format)
+    with stage("format"):
+        formatted = formatter(code)
+    if cache is not False:
+        cache.set(key, formatted)
+    return formatted
+
+
+def cached_code(backend: str) -> Callable[[F], F]:
+    """Decorator for `get_code` functions with a `cache` argument, that
+    returns the cached code if it exists. If `cache` is True the default
+    cache (see `get_code_cache`) is used, and you can also pass your own
+    `gotranx.cache.DiskCache`.
+
+    The code is cached using the content of the ODE, the backend, the
+    other arguments to `get_code` and the source code of gotranx as key.
+
+    Parameters
+    ----------
+    backend : str
+        Name of the backend
+    """
+
+    def decorator(get_code: F) -> F:
+        signature = inspect.signature(get_code)
+
+        @functools.wraps(get_code)
+        def wrapper(*args, **kwargs) -> str:
+            with stage("get_code"):
+                return cached(*args, **kwargs)
+
+        def cached(*args, **kwargs) -> str:
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            options = dict(arguments.arguments)
+            cache = options.pop("cache")
+            if cache is True:
+                cache = get_code_cache() or False
+            if cache is False:
+                return get_code(*args, **kwargs)
+
+            ode = options.pop("ode")
+            # The number of processes does not change the code
+            options.pop("workers", None)
+            key = hash_key(
+                ode.fingerprint,
+                backend,
+                repr(sorted(options.items())),
+                source_fingerprint(),
+            )
+            code = cache.get(key)
+            if code is None:
+                code = get_code(*args, **kwargs)
+                cache.set(key, code)
+            else:
+                logger.info(f"Using cached {backend} code from {cache}")
+            return code
+
+        return typing.cast(F, wrapper)
+
+    return decorator
+
+
+@contextmanager
+def profile_report(
+    enabled: bool = False, output: Path | None = None, trace_memory: bool = False
+) -> Iterator[None]:
+    """Profile the stages run inside the context (see `gotranx.profiling`),
+    and print a summary or write the report to a json file
+
+    Parameters
+    ----------
+    enabled : bool, optional
+        Profile and print a summary, by default False
+    output : Path | None, optional
+        Write the report as json to this file instead of printing
+        the summary, by default None
+    trace_memory : bool, optional
+        Also trace the peak memory of each stage, by default False
+    """
+    if not (enabled or output is not None or trace_memory):
+        yield
+        return
+
+    with profile(trace_memory=trace_memory) as report:
+        yield
+
+    if output is None:
+        typer.echo(report.summary())
+    else:
+        report.dump(output)
+        logger.info(f"Wrote profile to {output}")
@@ -1,15 +1,57 @@
-from . import base
-from . import c
-from . import python
-from . import ode
-
-from .c import CCodeGenerator, GotranCCodePrinter, Format as CFormat
-from .python import PythonCodeGenerator, GotranPythonCodePrinter, Format as PythonFormat
-from .jax import JaxCodeGenerator
-from .base import CodeGenerator, Func, RHSArgument, SchemeArgument
-from .ode import GotranODECodePrinter, BaseGotranODECodePrinter
-from .julia import JuliaCodeGenerator, GotranJuliaCodePrinter
-from .mtk import MTKCodeGenerator
+from importlib import import_module as _import_module
+from typing import TYPE_CHECKING as _TYPE_CHECKING
+
+if _TYPE_CHECKING:
+    from . import base
+    from . import c
+    from . import python
+    from . import ode
+
+    from .c import CCodeGenerator, GotranCCodePrinter, Format as CFormat
+    from .python import PythonCodeGenerator, GotranPythonCodePrinter, Format as PythonFormat
+    from .jax import JaxCodeGenerator
+    from .base import CodeGenerator, Func, RHSArgument, SchemeArgument
+    from .ode import GotranODECodePrinter, BaseGotranODECodePrinter
+    from .julia import JuliaCodeGenerator, GotranJuliaCodePrinter
+    from .mtk import MTKCodeGenerator
+
+# The backends are imported when first used, so that using one
+# backend does not require importing all the others
+_submodules = {"base", "c", "python", "ode", "jax", "julia", "mtk", "markdown", "ufl"}
+_attributes = {
+    "CCodeGenerator": ("c", "CCodeGenerator"),
+    "GotranCCodePrinter": ("c", "GotranCCodePrinter"),
+    "CFormat": ("c", "Format"),
+    "PythonCodeGenerator": ("python", "PythonCodeGenerator"),
+    "GotranPythonCodePrinter": ("python", "GotranPythonCodePrinter"),
+    "PythonFormat": ("python", "Format"),
+    "JaxCodeGenerator": ("jax", "JaxCodeGenerator"),
+    "CodeGenerator": ("base", "CodeGenerator"),
+    "Func": ("base", "Func"),
+    "RHSArgument": ("base", "RHSArgument"),
+    "SchemeArgument": ("base", "SchemeArgument"),
+    "GotranODECodePrinter": ("ode", "GotranODECodePrinter"),
+    "BaseGotranODECodePrinter": ("ode", "BaseGotranODECodePrinter"),
+    "JuliaCodeGenerator": ("julia", "JuliaCodeGenerator"),
+    "GotranJuliaCodePrinter": ("julia", "GotranJuliaCodePrinter"),
+    "MTKCodeGenerator": ("mtk", "MTKCodeGenerator"),
+}
+
+
+def __getattr__(name: str):
+    if name in _submodules:
+        return _import_module(f".{name}", __name__)
+    if name in _attributes:
+        module, attr = _attributes[name]
+        value = getattr(_import_module(f".{module}", __name__), attr)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _submodules | set(_attributes))
+
 
 __all__ = [
     "base",
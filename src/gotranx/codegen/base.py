@@ -10,9 +10,12 @@ from sympy.printing.codeprinter import CodePrinter
 import structlog
 
 from .. import templates
-from ..ode import ODE
+from ..ode import ODE, DependencyClass
 from .. import atoms
+from .. import exceptions
 from .. import schemes
+from .. import sympytools
+from ..profiling import stage
 
 logger = structlog.get_logger()
 
@@ -98,31 +101,420 @@ def _print_Piecewise(
     return tuple(conds), tuple(exprs)
 
 
+def _evaluate(expr) -> sympy.Expr:
+    """Evaluate an (unevaluated) expression, so that constant
+    subexpressions are folded into numbers"""
+    expr = sympy.sympify(expr).doit().evalf()
+    if expr.is_Float and float(expr).is_integer():
+        # Use integers when possible, so that e.g 1 * x becomes x
+        return sympy.Integer(int(expr))
+    return expr
+
+
+Equation = typing.Tuple[sympy.Expr, sympy.Expr, bool]
+
+
+def _cse_symbols(reserved: typing.Container[str]) -> typing.Iterator[sympy.Symbol]:
+    i = 0
+    while True:
+        name = f"cse_{i}"
+        i += 1
+        if name not in reserved:
+            yield sympy.Symbol(name)
+
+
+def eliminate_common_subexpressions(
+    equations: typing.Sequence[Equation], reserved: typing.Container[str] = ()
+) -> tuple[list[Equation], int]:
+    """Perform common subexpression elimination (CSE) on a list of equations
+
+    Each common subexpression is assigned to a new variable right
+    before the first equation that uses it. Subexpressions inside
+    conditionals are left alone, so that e.g a division that is
+    guarded by a conditional is never evaluated unconditionally.
+
+    Parameters
+    ----------
+    equations : typing.Sequence[Equation]
+        The equations given as (lhs, rhs, use_variable_prefix),
+        where the equations are sorted by dependencies
+    reserved : typing.Container[str], optional
+        Names that cannot be used for new variables, by default ()
+
+    Returns
+    -------
+    tuple[list[Equation], int]
+        The new equations, and the number of operations that were eliminated
+    """
+    # Hide the conditionals from the CSE
+    conditionals: dict[sympy.Basic, sympy.Dummy] = {}
+    for _, rhs, _ in equations:
+        traversal = sympy.preorder_traversal(rhs)
+        for node in traversal:
+            if isinstance(node, sympy.Piecewise):
+                conditionals.setdefault(node, sympy.Dummy())
+                traversal.skip()
+    # sympy.cse does not handle unevaluated expressions correctly
+    hidden = [rhs.xreplace(conditionals).doit() for _, rhs, _ in equations]
+    restore = {v: k for k, v in conditionals.items()}
+
+    with stage("cse"):
+        replacements, reduced = sympy.cse(hidden, symbols=_cse_symbols(reserved), order="none")
+    num_eliminated = sympy.count_ops(hidden) - sympy.count_ops(
+        [rhs for _, rhs in replacements] + reduced
+    )
+    replacement_exprs = {lhs: rhs.xreplace(restore) for lhs, rhs in replacements}
+    order = {lhs: i for i, (lhs, _) in enumerate(replacements)}
+
+    new_equations: list[Equation] = []
+    for (lhs, _, use_variable_prefix), rhs in zip(equations, reduced):
+        rhs = rhs.xreplace(restore)
+        # Assign all the (not yet assigned) subexpressions used in rhs
+        needed: set[sympy.Symbol] = set()
+        stack = [s for s in rhs.free_symbols if s in replacement_exprs]
+        while stack:
+            symbol = stack.pop()
+            if symbol in needed:
+                continue
+            needed.add(symbol)
+            stack.extend(
+                s for s in replacement_exprs[symbol].free_symbols if s in replacement_exprs
+            )
+        for symbol in sorted(needed, key=order.__getitem__):
+            new_equations.append((symbol, replacement_exprs.pop(symbol), True))
+        new_equations.append((lhs, rhs, use_variable_prefix))
+
+    return new_equations, num_eliminated
+
+
 class Shape(str, Enum):
     dynamic = "dynamic"
     single = "single"
     multiple = "multiple"
 
 
+class Precision(str, Enum):
+    double = "double"
+    single = "single"
+
+
 class CodeGenerator(abc.ABC):
     variable_prefix = ""
+    # Whether the generated code can use expm1
+    _has_expm1 = True
 
     def __init__(
         self,
         ode: ODE,
         remove_unused: bool = False,
         shape: Shape = Shape.dynamic,
+        frozen_parameters: typing.Mapping[str, float] | typing.Iterable[str] | None = None,
+        precompute: bool = False,
+        strength_reduction: bool = False,
+        precision: Precision | str = Precision.double,
     ) -> None:
         self.ode = ode
         self.remove_unused = remove_unused
+        #: Rewrite the expressions to be cheaper to evaluate before they
+        #: are printed (see `gotranx.sympytools.strength_reduce`)
+        self.strength_reduction = strength_reduction
+        #: Floating point precision of the generated code
+        self.precision = Precision(precision)
         self._missing_variables = ode.missing_variables
         self._shape = shape
+        self._constants = self._fold_constants(frozen_parameters or ())
+        #: Names of the parameters that are replaced by their values
+        self.frozen_parameters = frozenset(
+            p.name for p in self.ode.parameters if p.symbol in self._constants
+        )
+        #: Number of operations eliminated by CSE in each generated function
+        self.cse_statistics: dict[str, int] = {}
+        # Printed assignments, so that each assignment is only printed once
+        # even if it is part of several of the generated functions
+        self._printed: dict[tuple[sympy.Basic, sympy.Basic, bool], str] = {}
+
+        # Variables that are needed to compute the right hand side
+        self._condition = self._live_condition(x.name for x in self.ode.state_derivatives)
+
+        # Whether the right hand side and the schemes take the precomputed
+        # values as an argument. This is independent of the model, so that
+        # the generated functions have the same signature for all models
+        self._precompute = precompute
+        # Assignments that are computed once in the precompute function
+        self._hoisted: dict[sympy.Basic, str] = {}
+        #: Index of each of the values returned by the precompute function
+        self.precomputed_index: dict[str, int] = {}
+        if precompute:
+            self._find_precomputed()
+
+    def _fold_constants(
+        self, frozen_parameters: typing.Mapping[str, float] | typing.Iterable[str]
+    ) -> dict[sympy.Symbol, sympy.Expr]:
+        """Get the values of the frozen parameters, and of the intermediates
+        that become constant when the frozen parameters are replaced by their values
+
+        Parameters
+        ----------
+        frozen_parameters : typing.Mapping[str, float] | typing.Iterable[str]
+            Names of the parameters to freeze. If a mapping is given, the
+            parameters are frozen to the given values, otherwise to the
+            default values in the ODE
+
+        Returns
+        -------
+        dict[sympy.Symbol, sympy.Expr]
+            Map from symbols to constant values
+
+        Raises
+        ------
+        exceptions.ParameterNotFoundInODE
+            If any of the frozen parameters are not parameters in the ODE
+        """
+        if not isinstance(frozen_parameters, typing.Mapping):
+            frozen_parameters = dict.fromkeys(frozen_parameters)
+        if not frozen_parameters:
+            return {}
+
+        parameters = {p.name: p for p in self.ode.parameters}
+        if missing := sorted(set(frozen_parameters) - parameters.keys()):
+            raise exceptions.ParameterNotFoundInODE(parameter_names=missing, ode_name=self.ode.name)
+
+        constants: dict[sympy.Symbol, sympy.Expr] = {}
+        for name, value in frozen_parameters.items():
+            param = parameters[name]
+            constants[param.symbol] = _evaluate(param.value if value is None else value)
+
+        for x in self.ode.sorted_assignments():
+            if isinstance(x, atoms.StateDerivative):
+                continue
+            expr = self._fold(x.expr, constants)
+            if expr.is_number:
+                constants[x.symbol] = expr
+
+        logger.debug(
+            f"Froze {len(frozen_parameters)} parameters and "
+            f"{len(constants) - len(frozen_parameters)} intermediates"
+        )
+        return constants
+
+    @staticmethod
+    def _fold(expr: sympy.Expr, constants: dict[sympy.Symbol, sympy.Expr]) -> sympy.Expr:
+        """Replace the constants in the expression by their values
+        and evaluate the constant parts of the expression"""
+        if not constants or not hasattr(expr, "free_symbols"):
+            return expr
+        if expr.free_symbols.isdisjoint(constants):
+            return expr
+        return _evaluate(expr.xreplace(constants))
+
+    @property
+    def _precomputed(self) -> bool:
+        return self._precompute
+
+    def _find_precomputed(self) -> None:
+        """Find the assignments that only depend on the parameters, and
+        which of them that are needed by the right hand side and the schemes.
+        These are computed once in the precompute function and passed on
+        to the right hand side and the schemes"""
+        classes = self.ode.dependency_classes
+        dependencies = self.ode.index.dependencies
+        assignments = self.ode.sorted_assignments(remove_unused=self.remove_unused)
+        hoisted = {
+            x.name: x.symbol
+            for x in assignments
+            if classes[x.name] <= DependencyClass.parameter and x.symbol not in self._constants
+        }
+
+        needed: set[str] = set()
+        parameters: set[str] = set()
+        for x in assignments:
+            if x.name in hoisted:
+                if isinstance(x, atoms.StateDerivative):
+                    needed.add(x.name)
+                continue
+            needed.update(dep for dep in dependencies[x.name] if dep in hoisted)
+            parameters.update(dependencies[x.name])
+
+        self._hoisted = {symbol: name for name, symbol in hoisted.items()}
+        self.precomputed_index = {
+            x.name: i for i, x in enumerate(x for x in assignments if x.name in needed)
+        }
+        logger.debug(f"Hoisting {len(hoisted)} assignments into the precompute function")
+
+        # The parameters are only needed by the right hand
+        # side if they are used by assignments that are not hoisted
+        condition = self._condition
+        parameter_names = {p.name for p in self.ode.parameters}
+        self._condition = lambda name: (
+            condition(name) and (name not in parameter_names or name in parameters)
+        )
+
+    def _precomputed_arguments(self, arguments: list[str]) -> list[str]:
+        """Add the array of precomputed values to the arguments"""
+        return arguments + ["precomputed"]
+
+    def _hoist(
+        self, equations: typing.Sequence[Equation], keep: typing.Container[str] = ()
+    ) -> list[Equation]:
+        """Replace the assignments that are hoisted into the precompute
+        function with the precomputed values. Hoisted assignments that
+        are not precomputed are removed, unless they are in `keep`"""
+        if not self._hoisted:
+            return list(equations)
+        precomputed = sympy.IndexedBase("precomputed", shape=(len(self.precomputed_index),))
+        new_equations: list[Equation] = []
+        for lhs, rhs, use_variable_prefix in equations:
+            name = self._hoisted.get(lhs)
+            if name is None:
+                new_equations.append((lhs, rhs, use_variable_prefix))
+            elif name in self.precomputed_index:
+                new_equations.append(
+                    (lhs, precomputed[self.precomputed_index[name]], use_variable_prefix)
+                )
+            elif name in keep:
+                new_equations.append((lhs, rhs, use_variable_prefix))
+            # Otherwise it is only needed to compute other precomputed values
+        return new_equations
+
+    def _monitor_arguments(self, arguments: list[str]) -> list[str]:
+        """Add the array of monitored values to the arguments. The
+        monitored values are returned together with the values by default"""
+        return arguments
+
+    def _monitor_index(self, monitored: typing.Iterable[str]) -> dict[str, int]:
+        """Get the index of each of the monitored values
+
+        Parameters
+        ----------
+        monitored : typing.Iterable[str]
+            Names of the monitored intermediates and state derivatives
+
+        Returns
+        -------
+        dict[str, int]
+            The index of each of the monitored values
 
-        if remove_unused:
-            self.deps = self.ode.dependents()
-            self._condition = lambda x: x in self.deps
+        Raises
+        ------
+        exceptions.AssignmentNotFoundInODE
+            If any of the names are not intermediates or state derivatives
+        """
+        index = {name: i for i, name in enumerate(dict.fromkeys(monitored))}
+        if missing := [name for name in index if name not in self.ode.index.monitor_index]:
+            raise exceptions.AssignmentNotFoundInODE(
+                assignment_names=missing, ode_name=self.ode.name
+            )
+        return index
+
+    def _add_monitored(
+        self,
+        equations: typing.Sequence[Equation],
+        monitor_index: dict[str, int],
+    ) -> list[Equation]:
+        """Store each monitored value in the monitor array right after
+        it is computed, and remove the assignments that are needed neither
+        by the state derivatives nor by the monitored values
+
+        Parameters
+        ----------
+        equations : typing.Sequence[Equation]
+            The equations
+        monitor_index : dict[str, int]
+            The index of each of the monitored values
+
+        Returns
+        -------
+        list[Equation]
+            The new equations
+        """
+        monitor = sympy.IndexedBase("monitor", shape=(len(monitor_index),))
+        monitored = {self.ode[name].symbol: i for name, i in monitor_index.items()}
+        dead: set[sympy.Basic] = set()
+        if self.remove_unused:
+            live = self.ode.live([*monitor_index, *(x.name for x in self.ode.state_derivatives)])
+            dead = {x.symbol for x in self.ode.sorted_assignments() if x.name not in live}
+
+        new_equations: list[Equation] = []
+        for lhs, rhs, use_variable_prefix in equations:
+            if lhs in dead:
+                continue
+            new_equations.append((lhs, rhs, use_variable_prefix))
+            if lhs in monitored:
+                new_equations.append((monitor[monitored[lhs]], lhs, False))
+        return new_equations
+
+    def _monitor_condition(self, monitor_index: dict[str, int]) -> typing.Callable[[str], bool]:
+        """Get a function that returns True for the variables that are needed
+        to compute the right hand side or any of the monitored values"""
+        if not monitor_index:
+            return self._condition
+        live = self.ode.live(monitor_index)
+        return lambda name: self._condition(name) or name in live
+
+    def _monitor_template_kwargs(self, monitor_index: dict[str, int]) -> dict[str, typing.Any]:
+        """Get the arguments to the template for returning the monitored values"""
+        if not monitor_index:
+            return {}
+        num_monitored = len(monitor_index)
+        if self._shape == Shape.dynamic:
+            monitor_type = self._zeros(f"({num_monitored}, *states.shape[1:])")
+        elif self._shape == Shape.single:
+            monitor_type = self._zeros(f"{num_monitored}")
+        elif self._shape == Shape.multiple:
+            monitor_type = self._zeros(f"({num_monitored}, states.shape[1])")
         else:
-            self._condition = lambda x: True
+            raise ValueError(f"Invalid shape: {self._shape}")
+        return {
+            "monitor_name": "monitor",
+            "monitor_type": monitor_type,
+            "num_monitor_values": num_monitored,
+        }
+
+    def _zeros(self, shape: str) -> str:
+        """Code for creating an array of zeros with the given shape
+        in the precision of the generated code (Python backends)"""
+        if self.precision == Precision.single:
+            return f"numpy.zeros({shape}, dtype=numpy.float32)"
+        return f"numpy.zeros({shape})"
+
+    def _init_template_kwargs(self, name: str) -> dict[str, typing.Any]:
+        """Get additional arguments to the template for the
+        initial values of the states or the parameters
+
+        Parameters
+        ----------
+        name : str
+            Either "states" or "parameters"
+        """
+        return {}
+
+    def _variable_prefix(self, lhs: sympy.Basic) -> str:
+        """Get the prefix used when declaring the variable `lhs`"""
+        return self.variable_prefix
+
+    def _convert(self, lhs: sympy.Basic, rhs: sympy.Expr) -> sympy.Expr:
+        """Make the conversions between the floating point types in
+        the assignment explicit (used for mixed precision C code)"""
+        return rhs
+
+    def _live_condition(self, targets: typing.Iterable[str]) -> typing.Callable[[str], bool]:
+        """Get a function that returns True for the variables that are needed
+        to compute the targets, if unused variables should be removed
+
+        Parameters
+        ----------
+        targets : typing.Iterable[str]
+            The variables computed by a generated function
+
+        Returns
+        -------
+        typing.Callable[[str], bool]
+            The condition
+        """
+        if not self.remove_unused:
+            return lambda x: True
+        live = self.ode.live(targets)
+        return lambda x: x in live
 
     def _formatter(self, code: str) -> str:
         """Alternative formatter that takes a code snippet
@@ -143,7 +535,8 @@ class CodeGenerator(abc.ABC):
 
     def _format(self, code: str) -> str:
         try:
-            formatted_code = self._formatter(code)
+            with stage("format snippet"):
+                formatted_code = self._formatter(code)
         except Exception:
             # FIXME: handle this
             logger.error("An exception was raised")
@@ -152,9 +545,62 @@ class CodeGenerator(abc.ABC):
         return formatted_code
 
     def _doprint(self, lhs, rhs, use_variable_prefix: bool = False) -> str:
-        if use_variable_prefix:
-            return f"{self.variable_prefix}{self.printer.doprint(Assignment(lhs, rhs))}"
-        return self.printer.doprint(Assignment(lhs, rhs))
+        key = (lhs, rhs, use_variable_prefix)
+        if (code := self._printed.get(key)) is not None:
+            return code
+
+        if lhs in self._constants:
+            # The value is inserted wherever it is used
+            code = ""
+        else:
+            rhs = self._fold(rhs, self._constants)
+            if self.strength_reduction:
+                with stage("strength reduction"):
+                    rhs = sympytools.strength_reduce(rhs, use_expm1=self._has_expm1)
+            rhs = self._convert(lhs, rhs)
+            with stage("print"):
+                code = self.printer.doprint(Assignment(lhs, rhs))
+            if use_variable_prefix:
+                code = f"{self._variable_prefix(lhs)}{code}"
+        self._printed[key] = code
+        return code
+
+    def _print_equations(
+        self, equations: typing.Sequence[Equation], name: str, use_cse: bool = False
+    ) -> str:
+        """Print a list of equations given as (lhs, rhs, use_variable_prefix)
+
+        Parameters
+        ----------
+        equations : typing.Sequence[Equation]
+            The equations
+        name : str
+            Name of the generated function
+        use_cse : bool, optional
+            Use common subexpression elimination, by default False
+
+        Returns
+        -------
+        str
+            The code for the equations
+        """
+        if self._constants:
+            equations = [
+                (lhs, self._fold(rhs, self._constants), use_variable_prefix)
+                for lhs, rhs, use_variable_prefix in equations
+                if lhs not in self._constants
+            ]
+        if use_cse:
+            equations, num_eliminated = eliminate_common_subexpressions(
+                equations, reserved=self.ode.symbols.keys() | self._missing_variables.keys()
+            )
+            self.cse_statistics[name] = num_eliminated
+            logger.debug(f"CSE eliminated {num_eliminated} operations in {name}")
+
+        return "\n".join(
+            self._doprint(lhs, rhs, use_variable_prefix=use_variable_prefix)
+            for lhs, rhs, use_variable_prefix in equations
+        )
 
     def _comment(self, text: str) -> str:
         return self.printer._get_comment(text).strip()
@@ -164,31 +610,37 @@ class CodeGenerator(abc.ABC):
 
     def missing_index(self) -> str:
         if self._missing_variables:
-            code = self.template.missing_index(data=self._missing_variables)
+            code = self.template.missing_index(data=dict(self._missing_variables))
             return self._format(code)
         return ""
 
     def state_index(self) -> str:
-        code = self.template.state_index(
-            data={s.name: i for i, s in enumerate(self.ode.sorted_states())}
-        )
+        code = self.template.state_index(data=dict(self.ode.index.state_index))
         return self._format(code)
 
     def parameter_index(self) -> str:
-        code = self.template.parameter_index(
-            data={s.name: i for i, s in enumerate(self.ode.parameters)}
-        )
+        code = self.template.parameter_index(data=dict(self.ode.index.parameter_index))
         return self._format(code)
 
     def monitor_index(self) -> str:
-        data = {}
-        index = 0
-        for x in self.ode.sorted_assignments(remove_unused=False):
-            if isinstance(x, (atoms.Intermediate, atoms.StateDerivative)):
-                data[x.name] = index
-                index += 1
+        code = self.template.monitor_index(data=dict(self.ode.index.monitor_index))
+        return self._format(code)
+
+    def monitored_index(self, monitored: typing.Iterable[str]) -> str:
+        """Generate code for the index of the values returned
+        by the function generated by `monitored_values`
+
+        Parameters
+        ----------
+        monitored : typing.Iterable[str]
+            Names of the monitored intermediates and state derivatives
 
-        code = self.template.monitor_index(data=data)
+        Returns
+        -------
+        str
+            The generated code
+        """
+        code = self.template.monitored_index(data=self._monitor_index(monitored))
         return self._format(code)
 
     def initial_state_values(self, name="states") -> str:
@@ -218,6 +670,7 @@ class CodeGenerator(abc.ABC):
             state_names=[s.name for s in self.ode.sorted_states()],
             state_values=[self.printer.doprint(s.value) for s in self.ode.sorted_states()],
             name=name,
+            **self._init_template_kwargs("states"),
         )
         return self._format(code)
 
@@ -247,21 +700,33 @@ class CodeGenerator(abc.ABC):
             parameter_names=[s.name for s in self.ode.parameters],
             parameter_values=[self.printer.doprint(s.value) for s in self.ode.parameters],
             name=name,
+            **self._init_template_kwargs("parameters"),
         )
         return self._format(code)
 
-    def _state_assignments(self, states: sympy.IndexedBase, remove_unused: bool) -> str:
+    def _state_assignments(
+        self,
+        states: sympy.IndexedBase,
+        remove_unused: bool,
+        condition: typing.Callable[[str], bool] | None = None,
+    ) -> str:
+        condition = condition or self._condition
         return "\n".join(
             self._doprint(state.symbol, states[i], use_variable_prefix=True)
             for i, state in enumerate(self.ode.sorted_states())
-            if not remove_unused or self._condition(state.name)
+            if not remove_unused or condition(state.name)
         )
 
-    def _parameter_assignments(self, parameters: sympy.IndexedBase) -> str:
+    def _parameter_assignments(
+        self,
+        parameters: sympy.IndexedBase,
+        condition: typing.Callable[[str], bool] | None = None,
+    ) -> str:
+        condition = condition or self._condition
         return "\n".join(
             self._doprint(param.symbol, parameters[i], use_variable_prefix=True)
             for i, param in enumerate(self.ode.parameters)
-            if self._condition(param.name)
+            if condition(param.name) and param.name not in self.frozen_parameters
         )
 
     def _missing_variables_assignments(self):
@@ -286,7 +751,12 @@ class CodeGenerator(abc.ABC):
         )
         return "\n".join(lst)
 
-    def rhs(self, order: RHSArgument | str = RHSArgument.tsp, use_cse=False) -> str:
+    def rhs(
+        self,
+        order: RHSArgument | str = RHSArgument.tsp,
+        use_cse=False,
+        monitored: typing.Iterable[str] | None = None,
+    ) -> str:
         """Generate code for the right hand side of the ODE
 
         Parameters
@@ -295,6 +765,10 @@ class CodeGenerator(abc.ABC):
             The order of the arguments, by default RHSArgument.tsp
         use_cse : bool, optional
             Use common subexpression elimination, by default False
+        monitored : typing.Iterable[str] | None, optional
+            Names of intermediates or state derivatives to store in a second
+            array while computing the right hand side. If given, the generated
+            function is called `rhs_and_monitor`. By default None
 
         Returns
         -------
@@ -303,27 +777,45 @@ class CodeGenerator(abc.ABC):
         """
 
         rhs = self._rhs_arguments(order)
-        states = self._state_assignments(rhs.states, remove_unused=self.remove_unused)
-        parameters = self._parameter_assignments(rhs.parameters)
+        monitor_index = self._monitor_index(monitored or ())
+        condition = self._monitor_condition(monitor_index)
+        states = self._state_assignments(
+            rhs.states, remove_unused=self.remove_unused, condition=condition
+        )
+        parameters = self._parameter_assignments(rhs.parameters, condition=condition)
         missing_variables = self._missing_variables_assignments()
 
         arguments = rhs.arguments
+        if self._precomputed:
+            arguments = self._precomputed_arguments(arguments)
         if self._missing_variables:
             arguments += ["missing_variables"]
+        if monitor_index:
+            arguments = self._monitor_arguments(arguments)
 
-        values_lst = []
+        equations: list[Equation] = []
         index = 0
         values_idx = sympy.IndexedBase("values", shape=(len(self.ode.state_derivatives),))
 
-        for x in self.ode.sorted_assignments(remove_unused=self.remove_unused):
-            values_lst.append(self._doprint(x.symbol, x.expr, use_variable_prefix=True))
+        remove_unused = self.remove_unused and not monitor_index
+        for x in self.ode.sorted_assignments(remove_unused=remove_unused):
+            equations.append((x.symbol, x.expr, True))
             if isinstance(x, atoms.StateDerivative):
-                values_lst.append(self._doprint(values_idx[index], x.symbol))
+                equations.append((values_idx[index], x.symbol, False))
                 index += 1
 
-        values = "\n".join(values_lst)
+        name = "rhs"
+        if monitor_index:
+            name = "rhs_and_monitor"
+            equations = self._add_monitored(equations, monitor_index)
+
+        values = self._print_equations(
+            self._hoist(equations, keep=self.ode.live(monitor_index)),
+            name=name,
+            use_cse=use_cse,
+        )
         code = self.template.method(
-            name="rhs",
+            name=name,
             args=", ".join(arguments),
             states=states,
             parameters=parameters,
@@ -334,17 +826,18 @@ class CodeGenerator(abc.ABC):
             values_type=rhs.values_type,
             missing_variables=missing_variables,
             post_function_signature=rhs.post_function_signature,
+            **self._monitor_template_kwargs(monitor_index),
         )
 
         return self._format(code)
 
-    def _shape_info(self, shape) -> str:
+    def _shape_info(self, shape, array: str = "states") -> str:
         if self._shape == Shape.dynamic:
-            return f"shape = {shape} if len(states.shape) == 1 else ({shape}, states.shape[1])"
+            return f"shape = {shape} if len({array}.shape) == 1 else ({shape}, {array}.shape[1])"
         elif self._shape == Shape.single:
             return f"shape = {shape}"
         elif self._shape == Shape.multiple:
-            return f"shape = ({shape}, states.shape[1])"
+            return f"shape = ({shape}, {array}.shape[1])"
         else:
             raise ValueError(f"Invalid shape: {self._shape}")
 
@@ -366,14 +859,16 @@ class CodeGenerator(abc.ABC):
 
         rhs = self._rhs_arguments(order)
         states = self._state_assignments(rhs.states, remove_unused=False)
-        parameters = self._parameter_assignments(rhs.parameters)
+        # All assignments are monitored
+        condition = self._live_condition(self.ode.index.dependencies)
+        parameters = self._parameter_assignments(rhs.parameters, condition=condition)
         missing_variables = self._missing_variables_assignments()
 
         arguments = rhs.arguments
         if self._missing_variables:
             arguments += ["missing_variables"]
 
-        values_lst = []
+        equations: list[Equation] = []
         index = 0
         values_idx = sympy.IndexedBase(
             "values",
@@ -381,12 +876,12 @@ class CodeGenerator(abc.ABC):
         )
 
         for x in self.ode.sorted_assignments(remove_unused=False):
-            values_lst.append(self._doprint(x.symbol, x.expr, use_variable_prefix=True))
+            equations.append((x.symbol, x.expr, True))
             if isinstance(x, (atoms.Intermediate, atoms.StateDerivative)):
-                values_lst.append(self._doprint(values_idx[index], x.symbol))
+                equations.append((values_idx[index], x.symbol, False))
                 index += 1
 
-        values = "\n".join(values_lst)
+        values = self._print_equations(equations, name="monitor_values", use_cse=use_cse)
 
         shape = values_idx.shape[0]
         shape_info = self._shape_info(shape)
@@ -400,7 +895,114 @@ class CodeGenerator(abc.ABC):
             return_name=rhs.return_name,
             num_return_values=shape,
             shape_info=shape_info,
-            values_type="numpy.zeros(shape)",
+            values_type=self._zeros("shape"),
+            missing_variables=missing_variables,
+            post_function_signature=rhs.post_function_signature,
+        )
+
+        return self._format(code)
+
+    def precompute(self, use_cse: bool = False) -> str:
+        """Generate code for the function that computes the assignments
+        that only depend on the parameters. The returned values should
+        be passed on to the right hand side and the schemes as the
+        `precomputed` argument. Only relevant if the code generator
+        is created with `precompute=True`.
+
+        Parameters
+        ----------
+        use_cse : bool, optional
+            Use common subexpression elimination, by default False
+
+        Returns
+        -------
+        str
+            The generated code
+        """
+        rhs = self._rhs_arguments("p")
+        live = self.ode.live(self.precomputed_index)
+        parameters = self._parameter_assignments(rhs.parameters, condition=live.__contains__)
+
+        shape = len(self.precomputed_index)
+        values_idx = sympy.IndexedBase("values", shape=(shape,))
+        equations: list[Equation] = []
+        for x in self.ode.sorted_assignments(remove_unused=True, targets=self.precomputed_index):
+            equations.append((x.symbol, x.expr, True))
+            if x.name in self.precomputed_index:
+                equations.append((values_idx[self.precomputed_index[x.name]], x.symbol, False))
+
+        code = self.template.method(
+            name="precompute",
+            args=", ".join(rhs.arguments),
+            states="",
+            parameters=parameters,
+            values=self._print_equations(equations, name="precompute", use_cse=use_cse),
+            return_name=rhs.return_name,
+            num_return_values=shape,
+            shape_info=self._shape_info(shape, array="parameters"),
+            values_type=self._zeros("shape"),
+            post_function_signature=rhs.post_function_signature,
+        )
+        return self._format(code)
+
+    def monitored_values(
+        self,
+        monitored: typing.Iterable[str],
+        order: RHSArgument | str = RHSArgument.tsp,
+        use_cse=False,
+    ) -> str:
+        """Generate code for computing a subset of the monitored values.
+        Only the variables needed to compute these values are included,
+        and the values are returned in the given order (see `monitored_index`)
+
+        Parameters
+        ----------
+        monitored : typing.Iterable[str]
+            Names of the monitored intermediates and state derivatives
+        order : RHSArgument | str, optional
+            The order of the arguments, by default RHSArgument.tsp
+        use_cse : bool, optional
+            Use common subexpression elimination, by default False
+
+        Returns
+        -------
+        str
+            The generated code
+        """
+        monitor_index = self._monitor_index(monitored)
+        live = self.ode.live(monitor_index)
+
+        rhs = self._rhs_arguments(order)
+        states = self._state_assignments(
+            rhs.states, remove_unused=True, condition=live.__contains__
+        )
+        parameters = self._parameter_assignments(rhs.parameters, condition=live.__contains__)
+        missing_variables = self._missing_variables_assignments()
+
+        arguments = rhs.arguments
+        if self._missing_variables:
+            arguments += ["missing_variables"]
+
+        shape = len(monitor_index)
+        values_idx = sympy.IndexedBase("values", shape=(shape,))
+        equations: list[Equation] = []
+        for x in self.ode.sorted_assignments(remove_unused=True, targets=monitor_index):
+            equations.append((x.symbol, x.expr, True))
+            if x.name in monitor_index:
+                equations.append((values_idx[monitor_index[x.name]], x.symbol, False))
+
+        values = self._print_equations(equations, name="monitored_values", use_cse=use_cse)
+
+        code = self.template.method(
+            name="monitored_values",
+            args=", ".join(arguments),
+            states=states,
+            parameters=parameters,
+            values=values,
+            return_name=rhs.return_name,
+            num_return_values=shape,
+            shape_info=self._shape_info(shape),
+            values_type=self._zeros("shape"),
             missing_variables=missing_variables,
             post_function_signature=rhs.post_function_signature,
         )
@@ -408,18 +1010,24 @@ class CodeGenerator(abc.ABC):
         return self._format(code)
 
     def missing_values(
-        self, values: dict[str, int], order: RHSArgument | str = RHSArgument.tsp
+        self,
+        values: dict[str, int],
+        order: RHSArgument | str = RHSArgument.tsp,
+        use_cse: bool = False,
     ) -> str:
         rhs = self._rhs_arguments(order)
-        states = self._state_assignments(rhs.states, remove_unused=False)
-        parameters = self._parameter_assignments(rhs.parameters)
+        condition = self._live_condition(values)
+        states = self._state_assignments(
+            rhs.states, remove_unused=self.remove_unused, condition=condition
+        )
+        parameters = self._parameter_assignments(rhs.parameters, condition=condition)
         missing_variables = self._missing_variables_assignments()
 
         arguments = rhs.arguments
         if self._missing_variables:
             arguments += ["missing_variables"]
 
-        values_lst = []
+        equations: list[Equation] = []
         N = len(values)
         values_idx = sympy.IndexedBase(
             "values",
@@ -429,12 +1037,12 @@ class CodeGenerator(abc.ABC):
         n = 0
         for p in self.ode.states + self.ode.parameters:
             if p.name in values:
-                values_lst.append(self._doprint(values_idx[values[p.name]], p.symbol))
+                equations.append((values_idx[values[p.name]], p.symbol, False))
                 n += 1
-        for x in self.ode.sorted_assignments(remove_unused=False):
-            values_lst.append(self._doprint(x.symbol, x.expr, use_variable_prefix=True))
+        for x in self.ode.sorted_assignments(remove_unused=self.remove_unused, targets=values):
+            equations.append((x.symbol, x.expr, True))
             if x.name in values:
-                values_lst.append(self._doprint(values_idx[values[x.name]], x.symbol))
+                equations.append((values_idx[values[x.name]], x.symbol, False))
                 n += 1
             if n >= N:
                 break
@@ -447,18 +1055,25 @@ class CodeGenerator(abc.ABC):
             args=", ".join(arguments),
             states=states,
             parameters=parameters,
-            values="\n".join(values_lst),
+            values=self._print_equations(equations, name="missing_values", use_cse=use_cse),
             return_name=rhs.return_name,
             num_return_values=len(values),
             shape_info=shape_info,
-            values_type="numpy.zeros(shape)",
+            values_type=self._zeros("shape"),
             missing_variables=missing_variables,
             post_function_signature=rhs.post_function_signature,
         )
 
         return self._format(code)
 
-    def scheme(self, f: schemes.scheme_func, order=SchemeArgument.stdp, **kwargs) -> str:
+    def scheme(
+        self,
+        f: schemes.scheme_func,
+        order=SchemeArgument.stdp,
+        use_cse: bool = False,
+        monitored: typing.Iterable[str] | None = None,
+        **kwargs,
+    ) -> str:
         """Generate code for the scheme
 
         Parameters
@@ -467,6 +1082,12 @@ class CodeGenerator(abc.ABC):
             Function for generating the scheme
         order : SchemeArgument | str, optional
             The order of the arguments, by default SchemeArgument.stdp
+        use_cse : bool, optional
+            Use common subexpression elimination, by default False
+        monitored : typing.Iterable[str] | None, optional
+            Names of intermediates or state derivatives to store in a second
+            array while taking the step. If given, `_and_monitor` is
+            added to the name of the generated function. By default None
         kwargs : dict
             Additional keyword arguments to be passed to the scheme function
 
@@ -477,27 +1098,49 @@ class CodeGenerator(abc.ABC):
         """
 
         rhs = self._scheme_arguments(order)
+        monitor_index = self._monitor_index(monitored or ())
+        condition = self._monitor_condition(monitor_index)
         states = self._state_assignments(rhs.states, remove_unused=False)
-        parameters = self._parameter_assignments(rhs.parameters)
+        parameters = self._parameter_assignments(rhs.parameters, condition=condition)
         missing_variables = self._missing_variables_assignments()
 
         arguments = rhs.arguments
+        if self._precomputed:
+            arguments = self._precomputed_arguments(arguments)
         if self._missing_variables:
             arguments += ["missing_variables"]
+        if monitor_index:
+            arguments = self._monitor_arguments(arguments)
 
         dt = sympy.Symbol("dt")
-        eqs = f(
+        # Collect the equations, so that they can be processed together
+        equations: list[Equation] = []
+
+        def printer(lhs, rhs, use_variable_prefix: bool = False) -> str:
+            equations.append((lhs, rhs, use_variable_prefix))
+            return ""
+
+        f(
             self.ode,
             dt,
             name=rhs.return_name,
-            printer=self._doprint,
-            remove_unused=self.remove_unused,
+            printer=printer,
+            remove_unused=self.remove_unused and not monitor_index,
             **kwargs,
         )
-        values = "\n".join(eqs)
+        name = f.__code__.co_name
+        if monitor_index:
+            name = f"{name}_and_monitor"
+            equations = self._add_monitored(equations, monitor_index)
+
+        values = self._print_equations(
+            self._hoist(equations, keep=self.ode.live(monitor_index)),
+            name=name,
+            use_cse=use_cse,
+        )
 
         code = self.template.method(
-            name=f.__code__.co_name,
+            name=name,
             args=", ".join(arguments),
             states=states,
             parameters=parameters,
@@ -508,6 +1151,7 @@ class CodeGenerator(abc.ABC):
             values_type=rhs.values_type,
             missing_variables=missing_variables,
             post_function_signature=rhs.post_function_signature,
+            **self._monitor_template_kwargs(monitor_index),
         )
         return self._format(code)
 
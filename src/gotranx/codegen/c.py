@@ -3,12 +3,14 @@ import enum
 import typing
 import structlog
 from sympy.printing.c import C99CodePrinter
-from sympy.codegen.ast import Assignment
+from sympy.printing.precedence import PRECEDENCE
+from sympy.codegen.ast import Assignment, float32, real
 import sympy
 
 from ..ode import ODE
+from .. import exceptions
 from .. import templates
-from .base import CodeGenerator, Func, RHSArgument, SchemeArgument
+from .base import CodeGenerator, Func, Precision, RHSArgument, SchemeArgument
 
 logger = structlog.get_logger()
 
@@ -43,13 +45,32 @@ def bool_to_int(expr: str) -> str:
     return expr.replace("false", "0").replace("true", "1")
 
 
+class FloatCast(sympy.Function):
+    """Explicit conversion to float, printed as ``(float)x``"""
+
+    nargs = 1
+
+
+class DoubleCast(sympy.Function):
+    """Explicit conversion to double, printed as ``(double)x``"""
+
+    nargs = 1
+
+
 class GotranCCodePrinter(C99CodePrinter):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._settings["contract"] = False
 
+    def _print_FloatCast(self, expr):
+        return "(float)" + self.parenthesize(expr.args[0], PRECEDENCE["Func"])
+
+    def _print_DoubleCast(self, expr):
+        return "(double)" + self.parenthesize(expr.args[0], PRECEDENCE["Func"])
+
     def _print_Float(self, flt):
-        return self._print(str(float(flt)))
+        # The suffix is "F" when printing single precision code
+        return self._print(str(float(flt)) + self._get_literal_suffix(real))
 
     def _print_Piecewise(self, expr):
         if isinstance(expr.args[0][0], Assignment):
@@ -83,12 +104,95 @@ class CCodeGenerator(CodeGenerator):
     variable_prefix = "const double "
 
     def __init__(
-        self, ode: ODE, format: Format = Format.clang_format, remove_unused: bool = False
+        self,
+        ode: ODE,
+        format: Format = Format.clang_format,
+        remove_unused: bool = False,
+        frozen_parameters: typing.Mapping[str, float] | typing.Iterable[str] | None = None,
+        precompute: bool = False,
+        strength_reduction: bool = False,
+        precision: Precision | str = Precision.double,
+        double_states: typing.Iterable[str] | None = None,
     ) -> None:
-        super().__init__(ode, remove_unused=remove_unused)
-        self._printer = GotranCCodePrinter()
+        super().__init__(
+            ode,
+            remove_unused=remove_unused,
+            frozen_parameters=frozen_parameters,
+            precompute=precompute,
+            strength_reduction=strength_reduction,
+            precision=precision,
+        )
+        if self.precision == Precision.single:
+            self._printer = GotranCCodePrinter(settings={"type_aliases": {real: float32}})
+            self._float_type = "float"
+        else:
+            self._printer = GotranCCodePrinter()
+            self._float_type = "double"
+        self._double_symbols = self._find_double_symbols(double_states or ())
+        # The states (and the other arrays computed by the generated functions)
+        # are stored in double precision if any of the states should be
+        self._state_type = "double" if self._double_symbols else self._float_type
+        self._double_arrays = (
+            frozenset({"states", "values", "precomputed", "monitor"})
+            if self._double_symbols
+            else frozenset()
+        )
         setattr(self, "_formatter", get_formatter(format=format))
 
+    def _find_double_symbols(self, double_states: typing.Iterable[str]) -> frozenset[sympy.Symbol]:
+        """Get the variables that are declared as double in single precision code,
+        i.e the given states. Their derivatives are computed in single precision,
+        and only the states and their updates are in double precision
+
+        Raises
+        ------
+        exceptions.StateNotFoundInODE
+            If any of the names are not states in the ODE
+        """
+        double_states = set(double_states)
+        if self.precision == Precision.double or not double_states:
+            return frozenset()
+
+        state_derivatives = {x.state.name: x for x in self.ode.state_derivatives}
+        if missing := sorted(double_states - state_derivatives.keys()):
+            raise exceptions.StateNotFoundInODE(state_names=missing, ode_name=self.ode.name)
+
+        return frozenset(state_derivatives[name].state.symbol for name in double_states)
+
+    def _variable_prefix(self, lhs: sympy.Basic) -> str:
+        if lhs in self._double_symbols:
+            return "const double "
+        return f"const {self._float_type} "
+
+    def _is_double(self, expr: sympy.Basic) -> bool:
+        if isinstance(expr, sympy.Indexed):
+            return str(expr.base) in self._double_arrays
+        return expr in self._double_symbols
+
+    def _convert(self, lhs: sympy.Basic, rhs: sympy.Expr) -> sympy.Expr:
+        if not self._double_symbols:
+            return rhs
+        # Everything except the double states and the arrays are computed
+        # in single precision, so the doubles that are used are converted
+        # to float, and the results that are stored as doubles to double
+        doubles = {x for x in rhs.atoms(sympy.Symbol, sympy.Indexed) if self._is_double(x)}
+        to_float = {x: FloatCast(x) for x in doubles}
+        if not self._is_double(lhs):
+            return rhs.xreplace(to_float)
+
+        # Add the double terms (e.g the state in the update of a double state)
+        # in double precision, and the rest in single precision
+        terms = rhs.args if isinstance(rhs, sympy.Add) else (rhs,)
+        double_terms = [term for term in terms if term in doubles]
+        float_terms = [term for term in terms if term not in doubles]
+        if float_terms:
+            float_sum = sympy.Add(*float_terms, evaluate=False).xreplace(to_float)
+            double_terms.append(float_sum if float_sum.is_number else DoubleCast(float_sum))
+        return sympy.Add(*double_terms, evaluate=False)
+
+    def _init_template_kwargs(self, name: str) -> dict[str, typing.Any]:
+        return {"dtype": self._state_type if name == "states" else self._float_type}
+
     @property
     def printer(self):
         return self._printer
@@ -113,11 +217,11 @@ class CCodeGenerator(CodeGenerator):
         value = RHSArgument.get_value(order)
         states_prefix = "const " if const_states else ""
         argument_dict = {
-            "s": states_prefix + "double *__restrict states",
-            "t": "const double t",
-            "p": "const double *__restrict parameters",
+            "s": states_prefix + f"{self._state_type} *__restrict states",
+            "t": f"const {self._float_type} t",
+            "p": f"const {self._float_type} *__restrict parameters",
         }
-        argument_list = [argument_dict[v] for v in value] + ["double* values"]
+        argument_list = [argument_dict[v] for v in value] + [f"{self._state_type}* values"]
         states = sympy.IndexedBase("states", shape=(self.ode.num_states,))
         parameters = sympy.IndexedBase("parameters", shape=(self.ode.num_parameters,))
         values = sympy.IndexedBase("values", shape=(self.ode.num_states,))
@@ -130,6 +234,14 @@ class CCodeGenerator(CodeGenerator):
             values_type="",
         )
 
+    def _precomputed_arguments(self, arguments: list[str]) -> list[str]:
+        # The last argument is the output array
+        precomputed = f"const {self._state_type} *__restrict precomputed"
+        return arguments[:-1] + [precomputed, arguments[-1]]
+
+    def _monitor_arguments(self, arguments: list[str]) -> list[str]:
+        return arguments + [f"{self._state_type} *monitor"]
+
     def _scheme_arguments(
         self,
         order: SchemeArgument | str = SchemeArgument.stdp,
@@ -138,12 +250,12 @@ class CCodeGenerator(CodeGenerator):
         value = SchemeArgument.get_value(order)
         states_prefix = "const " if const_states else ""
         argument_dict = {
-            "s": states_prefix + "double *__restrict states",
-            "t": "const double t",
-            "d": "const double dt",
-            "p": "const double *__restrict parameters",
+            "s": states_prefix + f"{self._state_type} *__restrict states",
+            "t": f"const {self._float_type} t",
+            "d": f"const {self._float_type} dt",
+            "p": f"const {self._float_type} *__restrict parameters",
         }
-        argument_list = [argument_dict[v] for v in value] + ["double* values"]
+        argument_list = [argument_dict[v] for v in value] + [f"{self._state_type}* values"]
         states = sympy.IndexedBase("states", shape=(self.ode.num_states,))
         parameters = sympy.IndexedBase("parameters", shape=(self.ode.num_parameters,))
         values = sympy.IndexedBase("values", shape=(self.ode.num_states,))
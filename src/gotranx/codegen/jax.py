@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import sympy
 from .. import templates
+from .base import Precision
 from .python import PythonCodeGenerator, GotranPythonCodePrinter
 
 
@@ -9,7 +10,7 @@ class JaxPrinter(GotranPythonCodePrinter):
     def _print_Assignment(self, expr):
         sym, value = expr.lhs, expr.rhs
         if isinstance(sym, sympy.tensor.indexed.Indexed):
-            if sym.base.name == "values":
+            if sym.base.name in ("values", "monitor"):
                 index = self._print(sym.indices[0])
                 return f"_{sym.base.name}_{index} = {self._print(value)}"
 
@@ -23,13 +24,10 @@ class JaxCodeGenerator(PythonCodeGenerator):
         self._printer = JaxPrinter()
 
     def imports(self) -> str:
-        return "\n".join(
-            [
-                "import jax",
-                "import jax.numpy as numpy",
-                'jax.config.update("jax_enable_x64", True)',
-            ]
-        )
+        imports = ["import jax", "import jax.numpy as numpy"]
+        if self.precision == Precision.double:
+            imports.append('jax.config.update("jax_enable_x64", True)')
+        return "\n".join(imports)
 
     @property
     def template(self):
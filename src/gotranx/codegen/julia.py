@@ -1,4 +1,5 @@
 from __future__ import annotations
+import typing
 import structlog
 from sympy.printing.julia import JuliaCodePrinter
 from sympy.codegen.ast import Assignment
@@ -54,14 +55,31 @@ class GotranJuliaCodePrinter(JuliaCodePrinter):
 
         return value
 
+    def _print_expm1(self, expr):
+        return f"expm1({self._print(expr.args[0])})"
+
     def _print_Indexed(self, expr):
         inds = [self._print(i + 1) for i in expr.indices]  # Reindex arrays to start at 1
         return "%s[%s]" % (self._print(expr.base.label), ",".join(inds))
 
 
 class JuliaCodeGenerator(CodeGenerator):
-    def __init__(self, ode: ODE, remove_unused: bool = False, type_stable: bool = False) -> None:
-        super().__init__(ode, remove_unused=remove_unused)
+    def __init__(
+        self,
+        ode: ODE,
+        remove_unused: bool = False,
+        type_stable: bool = False,
+        frozen_parameters: typing.Mapping[str, float] | typing.Iterable[str] | None = None,
+        precompute: bool = False,
+        strength_reduction: bool = False,
+    ) -> None:
+        super().__init__(
+            ode,
+            remove_unused=remove_unused,
+            frozen_parameters=frozen_parameters,
+            precompute=precompute,
+            strength_reduction=strength_reduction,
+        )
         self._printer = GotranJuliaCodePrinter(type_stable=type_stable)
         # setattr(self, "_formatter", get_formatter(format=format))
 
@@ -118,6 +136,19 @@ class JuliaCodeGenerator(CodeGenerator):
             post_function_signature=post_function_signature,
         )
 
+    def _precomputed_arguments(self, arguments: list[str]) -> list[str]:
+        # The last argument is the output array
+        if self._printer._type_stable:
+            precomputed = "precomputed::AbstractVector{TYPE}"
+        else:
+            precomputed = "precomputed"
+        return arguments[:-1] + [precomputed, arguments[-1]]
+
+    def _monitor_arguments(self, arguments: list[str]) -> list[str]:
+        if self._printer._type_stable:
+            return arguments + ["monitor::AbstractVector{TYPE}"]
+        return arguments + ["monitor"]
+
     def _scheme_arguments(
         self,
         order: SchemeArgument | str = SchemeArgument.stdp,
@@ -7,11 +7,18 @@ from sympy.printing.pycode import PythonCodePrinter
 from sympy.codegen.ast import Assignment
 import sympy
 import structlog
-from functools import partial
+from functools import lru_cache, partial
 
 from ..ode import ODE
 from .. import templates
-from .base import CodeGenerator, Func, RHSArgument, SchemeArgument, _print_Piecewise
+from .base import (
+    CodeGenerator,
+    Func,
+    Precision,
+    RHSArgument,
+    SchemeArgument,
+    _print_Piecewise,
+)
 
 logger = structlog.get_logger()
 
@@ -129,6 +136,13 @@ class GotranPythonCodePrinter(PythonCodePrinter):
         )
 
 
+@lru_cache
+def _find_ruff_bin() -> str:
+    import ruff.__main__
+
+    return ruff.__main__.find_ruff_bin()
+
+
 def get_formatter(format: Format) -> typing.Callable[[str], str]:
     if format == Format.none:
         return lambda x: x
@@ -144,15 +158,15 @@ def get_formatter(format: Format) -> typing.Callable[[str], str]:
 
     elif format == Format.ruff:
         try:
-            import ruff.__main__
-
-            ruff_bin = ruff.__main__.find_ruff_bin()
+            import ruff.__main__  # noqa: F401
         except ImportError:
             logger.debug("Cannot apply ruff, please install 'ruff'")
             return lambda x: x
         else:
             import subprocess
 
+            ruff_bin = _find_ruff_bin()
+
             def func(code: str) -> str:
                 return subprocess.check_output(
                     [ruff_bin, "format", "-"], input=code, encoding="utf-8"
@@ -180,6 +194,15 @@ class PythonCodeGenerator(CodeGenerator):
     def template(self):
         return templates.python
 
+    @property
+    def _dtype(self) -> str:
+        if self.precision == Precision.single:
+            return "numpy.float32"
+        return "numpy.float64"
+
+    def _init_template_kwargs(self, name: str) -> dict[str, typing.Any]:
+        return {"dtype": self._dtype}
+
     def imports(self) -> str:
         return self._format("import numpy")
 
@@ -207,7 +230,7 @@ class PythonCodeGenerator(CodeGenerator):
             values=values,
             return_name="values",
             num_return_values=self.ode.num_states,
-            values_type="numpy.zeros_like(states, dtype=numpy.float64)",
+            values_type=f"numpy.zeros_like(states, dtype={self._dtype})",
         )
 
     def _scheme_arguments(
@@ -235,5 +258,5 @@ class PythonCodeGenerator(CodeGenerator):
             values=values,
             return_name="values",
             num_return_values=self.ode.num_states,
-            values_type="numpy.zeros_like(states, dtype=numpy.float64)",
+            values_type=f"numpy.zeros_like(states, dtype={self._dtype})",
         )
@@ -105,6 +105,9 @@ class UFLPrinter(GotranPythonCodePrinter):
 
 
 class UFLCodeGenerator(PythonCodeGenerator):
+    # ufl has no expm1
+    _has_expm1 = False
+
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         self._printer = UFLPrinter()
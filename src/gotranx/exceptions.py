@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import dataclasses
 import typing
 from dataclasses import dataclass
 from pathlib import Path
@@ -8,10 +9,17 @@ import lark
 
 if typing.TYPE_CHECKING:
     from .atoms import Atom
+    from .ode import ODE
 
 
 class GotranxError(Exception):
-    pass
+    def __reduce__(self):
+        # Make sure errors can be pickled (e.g when raised in a subprocess)
+        # since the dataclass fields are not passed on to Exception.__init__
+        if dataclasses.is_dataclass(self):
+            fields = dataclasses.fields(self)
+            return type(self), tuple(getattr(self, f.name) for f in fields)
+        return super().__reduce__()
 
 
 @dataclass
@@ -27,6 +35,16 @@ class ODEFileNotFound(GotranxError):
     fname: Path
 
 
+@dataclass
+class BatchLoadError(GotranxError):
+    errors: dict[Path, Exception]
+    odes: list[ODE | None]
+
+    def __str__(self) -> str:
+        msg = "\n".join(f"{fname}: {error!r}" for fname, error in self.errors.items())
+        return f"Failed to load {len(self.errors)} of {len(self.odes)} ODEs:\n{msg}"
+
+
 @dataclass
 class InvalidODEException(GotranxError):
     text: str
@@ -57,6 +75,33 @@ class ParameterNotFoundInComponent(GotranxError):
         )
 
 
+@dataclass
+class ParameterNotFoundInODE(GotranxError):
+    parameter_names: list[str]
+    ode_name: str
+
+    def __str__(self) -> str:
+        return f"Parameters {self.parameter_names!r} not found in ODE {self.ode_name!r}"
+
+
+@dataclass
+class StateNotFoundInODE(GotranxError):
+    state_names: list[str]
+    ode_name: str
+
+    def __str__(self) -> str:
+        return f"States {self.state_names!r} not found in ODE {self.ode_name!r}"
+
+
+@dataclass
+class AssignmentNotFoundInODE(GotranxError):
+    assignment_names: list[str]
+    ode_name: str
+
+    def __str__(self) -> str:
+        return f"Assignments {self.assignment_names!r} not found in ODE {self.ode_name!r}"
+
+
 @dataclass
 class AssignmentNotFoundInComponent(GotranxError):
     assignment_name: str
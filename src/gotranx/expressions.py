@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 import lark
 import sympy as sp
 from . import sympytools
@@ -84,18 +86,147 @@ def unary_op(op: str, arg):
     raise RuntimeError(f"Invalid unary operation {op}")
 
 
+def _nary_operands(tree: lark.Tree) -> tuple[list[str], list[lark.Tree]]:
+    """Get the operators and operands of a sum (expression) or product (term).
+    Parenthesized sums in a sum (and products in a product) are merged into
+    the same list, so that they become a single n-ary node."""
+    positive = "+" if tree.data == "expression" else "*"
+    ops: list[str] = []
+    operands: list[lark.Tree] = []
+    todo = [(positive, tree)]
+    while todo:
+        op, subtree = todo.pop()
+        if op == positive and subtree.data == tree.data:
+            # Every second child is an operator
+            children = subtree.children
+            todo.extend(reversed(list(zip([positive, *children[1::2]], children[::2]))))
+        else:
+            ops.append(op)
+            operands.append(subtree)
+    return ops, operands
+
+
+def _operands(tree: lark.Tree) -> tuple[list[str], list[lark.Tree]]:
+    """Get the operators and the sub trees that needs to
+    be built before the tree itself"""
+    if tree.data in ("expression", "term"):
+        return _nary_operands(tree)
+    if tree.data == "factor":
+        return [], [tree.children[1]]
+    if tree.data == "power":
+        return [], tree.children[:2]
+    if tree.data in ("variable", "scientific", "constant"):
+        return [], []
+    if tree.data == "func":
+        return [], tree.children[1:]
+    if tree.data == "logicalfunc":
+        if tree.children[0] == "ContinuousConditional":
+            # The first argument is a relational, where only
+            # the arguments are built
+            return [], [*tree.children[1].children[1:], *tree.children[2:]]
+        return [], tree.children[1:]
+    raise InvalidTreeError(tree=tree)
+
+
+def _nary_op(ops: list[str], args: list[sp.Expr]) -> sp.Expr:
+    """Create a single n-ary Add or Mul"""
+    terms = []
+    for op, arg in zip(ops, args):
+        arg = relational_to_piecewise(arg)
+        if op == "-":
+            arg = sp.Mul(sp.Integer(-1), arg, evaluate=False)
+        elif op == "/":
+            arg = sp.Pow(arg, sp.Integer(-1), evaluate=False)
+        terms.append(arg)
+    if ops[0] == "+":
+        return sp.Add(*terms, evaluate=False)
+    return sp.Mul(*terms, evaluate=False)
+
+
+@lru_cache(maxsize=1024)
+def _number(text: str) -> sp.Number:
+    return sp.sympify(text)
+
+
+def _build(tree: lark.Tree, ops: list[str], args: list[sp.Expr], symbols: dict[str, sp.Symbol]):
+    """Build the sympy expression for a tree, given the
+    expressions (args) for all the operands"""
+    if tree.data in ("expression", "term"):
+        return _nary_op(ops, args)
+
+    if tree.data == "factor":
+        return unary_op(tree.children[0], args[0])
+    if tree.data == "power":
+        return binary_op("**", *args)
+
+    if tree.data == "variable":
+        try:
+            return symbols[str(tree.children[0])]
+        except KeyError as e:
+            raise MissingSymbolError(symbol=str(tree.children[0]), line_no=tree.meta.line) from e
+
+    if tree.data == "scientific":
+        return _number(str(tree.children[0]))
+
+    if tree.data == "constant":
+        if tree.children[0] == "pi":
+            return sp.pi
+
+    if tree.data == "func":
+        # Children name (e.g 'log', 'exp', 'cos' etc) are methods
+        # available in the sympy name space
+        funcname = tree.children[0]
+        if tree.children[0] == "abs":
+            # Only exceptions is 'abs' which is 'Abs'
+            funcname = "Abs"
+
+        return getattr(sp, funcname)(*args)
+
+    if tree.data == "logicalfunc":
+        if tree.children[0] == "Conditional":
+            return sympytools.Conditional(
+                cond=args[0],
+                true_value=args[1],
+                false_value=args[2],
+            )
+
+        elif tree.children[0] == "ContinuousConditional":
+            rel_op = tree.children[1].children[0]
+            cond = sp.sympify(rel_op.value)(args[0], args[1])
+            return sympytools.ContinuousConditional(
+                cond=cond,
+                true_value=args[2],
+                false_value=args[3],
+                sigma=args[4],
+            )
+
+        return getattr(sp, tree.children[0])(*args)
+
+    raise InvalidTreeError(tree=tree)
+
+
 def build_expression(
     root: lark.Tree,
     symbols: dict[str, sp.Symbol] | None = None,
+    intern_table: dict[sp.Basic, sp.Basic] | None = None,
 ) -> sp.Expr:
     """Build a sympy expression from a lark tree
 
+    The tree is traversed iteratively (so that there is no limit on
+    the depth of the expression), and sums and products are built
+    as single n-ary nodes rather than nested binary ones.
+
     Parameters
     ----------
     root : lark.Tree
         The root of the tree
     symbols : dict[str, sp.Symbol], optional
         A dictionary with symbols, by default None
+    intern_table : dict[sp.Basic, sp.Basic] | None, optional
+        If provided, every subexpression is looked up in this table
+        and replaced by an identical subexpression already in the table.
+        Using the same table for several expressions makes identical
+        subexpressions shared objects, by default None
 
     Returns
     -------
@@ -104,81 +235,25 @@ def build_expression(
     """
     symbols_: dict[str, sp.Symbol] = symbols or {}
 
-    def expr2symbols(tree: lark.Tree):
-        if tree.data in ("expression", "term"):
-            fst = expr2symbols(tree.children[0])
-            # It is always an odd number of children
-            # and at least one
-            for i in range(1, len(tree.children), 2):
-                fst = binary_op(
-                    tree.children[i],
-                    fst,
-                    expr2symbols(tree.children[i + 1]),
-                )
-            return fst
-
-        if tree.data == "factor":
-            return unary_op(tree.children[0], expr2symbols(tree.children[1]))
-        if tree.data == "power":
-            return binary_op(
-                "**",
-                expr2symbols(tree.children[0]),
-                expr2symbols(tree.children[1]),
-            )
-
-        if tree.data == "variable":
-            try:
-                return symbols_[str(tree.children[0])]
-            except KeyError as e:
-                raise MissingSymbolError(
-                    symbol=str(tree.children[0]), line_no=tree.meta.line
-                ) from e
-
-        if tree.data == "scientific":
-            return sp.sympify(tree.children[0])
-
-        if tree.data == "constant":
-            if tree.children[0] == "pi":
-                return sp.pi
-
-        if tree.data == "func":
-            # Children name (e.g 'log', 'exp', 'cos' etc) are methods
-            # available in the sympy name space
-            funcname = tree.children[0]
-            if tree.children[0] == "abs":
-                # Only exceptions is 'abs' which is 'Abs'
-                funcname = "Abs"
-
-            return getattr(sp, funcname)(*[expr2symbols(c) for c in tree.children[1:]])
-
-        if tree.data == "logicalfunc":
-            if tree.children[0] == "Conditional":
-                return sympytools.Conditional(
-                    cond=expr2symbols(tree.children[1]),
-                    true_value=expr2symbols(tree.children[2]),
-                    false_value=expr2symbols(tree.children[3]),
-                )
-
-            elif tree.children[0] == "ContinuousConditional":
-                rel_op, arg1, arg2 = tree.children[1].children
-                cond = sp.sympify(rel_op.value)(expr2symbols(arg1), expr2symbols(arg2))
-
-                true_value = expr2symbols(tree.children[2])
-                false_value = expr2symbols(tree.children[3])
-                sigma = expr2symbols(tree.children[4])
-
-                return sympytools.ContinuousConditional(
-                    cond=cond,
-                    true_value=true_value,
-                    false_value=false_value,
-                    sigma=sigma,
-                )
-
-            return getattr(sp, tree.children[0])(
-                *[expr2symbols(c) for c in tree.children[1:]],
-            )
-
-        raise InvalidTreeError(tree=tree)
-
-    # Recursively build the expression starting from the root
-    return expr2symbols(root)
+    # Post-order traversal, where the operands of a tree are built (and
+    # put on the results stack) before the tree itself
+    stack: list[tuple[lark.Tree, tuple[list[str], list[lark.Tree]] | None]] = [(root, None)]
+    results: list[sp.Expr] = []
+    while stack:
+        tree, ops_and_operands = stack.pop()
+        if ops_and_operands is None:
+            ops_and_operands = _operands(tree)
+            stack.append((tree, ops_and_operands))
+            stack.extend((operand, None) for operand in reversed(ops_and_operands[1]))
+            continue
+
+        ops, operands = ops_and_operands
+        n = len(operands)
+        args = results[len(results) - n :]
+        del results[len(results) - n :]
+        expr = _build(tree, ops, args, symbols_)
+        if intern_table is not None:
+            expr = intern_table.setdefault(expr, expr)
+        results.append(expr)
+
+    return results[0]
@@ -1,16 +1,26 @@
 from __future__ import annotations
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any, Iterable
 
+import lark
+import sympy as sp
 from structlog import get_logger
 
+from . import atoms
 from . import exceptions
+from .cache import DiskCache, dumps, loads, get_cache_dir, hash_key, source_fingerprint
 from .ode import make_ode, ODE
-from .parser import Parser
-from .transformer import TreeToODE, LarkODE
+from .profiling import stage
+from .parser import get_parser
+from .transformer import LarkODE, TreeToBlocks, build_lark_ode
 
 
 logger = get_logger()
 
+BLOCK_START = re.compile(r"^[ \t]*(states|parameters|expressions|component)[ \t]*\(", re.MULTILINE)
+
 
 def ode_from_string(text: str, name="ode") -> ODE:
     """Create an ODE from a string
@@ -27,28 +37,48 @@ def ode_from_string(text: str, name="ode") -> ODE:
     gotranx.ode.ODE
         The ODE
     """
-    parser = Parser(parser="lalr", transformer=TreeToODE(), propagate_positions=True)
-    result = parser.parse(text)
+    with stage("parse"):
+        result = get_parser().parse(text)
     if not isinstance(result, LarkODE):
         raise exceptions.InvalidODEException(text=text, atoms=result)
 
-    ode = make_ode(
-        components=result.components,
-        name=name,
-        comments=result.comments,
-    )
+    with stage("make_ode"):
+        ode = make_ode(
+            components=result.components,
+            name=name,
+            comments=result.comments,
+        )
     logger.info(f"Num states {ode.num_states}")
     logger.info(f"Num parameters {ode.num_parameters}")
     return ode
 
 
-def load_ode(path: str | Path) -> ODE:
+def get_ode_cache() -> DiskCache | None:
+    """Get the default cache for loaded ODEs
+
+    Returns
+    -------
+    DiskCache | None
+        The cache, or None if no cache directory is available
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    return DiskCache(cache_dir / "odes")
+
+
+def load_ode(path: str | Path, cache: bool | DiskCache = False) -> ODE:
     """Load an ODE from a file
 
     Parameters
     ----------
     path : str | Path
         Path to the file
+    cache : bool | DiskCache, optional
+        If True, use the default cache (see `get_ode_cache`) to
+        store the loaded ODE, so that loading the same file again
+        is just a file read. You can also pass your own
+        `gotranx.cache.DiskCache`. By default False
 
     Returns
     -------
@@ -60,11 +90,247 @@ def load_ode(path: str | Path) -> ODE:
     exceptions.ODEFileNotFound
         Raised if the file is not found
     """
-    fname = Path(path)
+    with stage("load_ode"):
+        return _load_ode(Path(path), cache)
+
 
-    logger.info(f"Load ode {path}")
+def _load_ode(fname: Path, cache: bool | DiskCache) -> ODE:
+    logger.info(f"Load ode {fname}")
 
     if not fname.is_file():
         raise exceptions.ODEFileNotFound(fname)
 
-    return ode_from_string(fname.read_text(), name=fname.stem)
+    text = fname.read_text()
+    if cache is True:
+        cache = get_ode_cache() or False
+    if cache is False:
+        return ode_from_string(text, name=fname.stem)
+
+    # Use the source code and not only the version of gotranx, so that
+    # changes to e.g the parser in an editable install give a new entry
+    key = hash_key(text, fname.stem, source_fingerprint())
+    ode = cache.get(key)
+    if ode is None:
+        ode = ode_from_string(text, name=fname.stem)
+        cache.set(key, ode)
+    else:
+        logger.debug(f"Loaded ode from cache {cache}")
+    return ode
+
+
+def _load_ode_serialized(path: Path, cache: bool | DiskCache) -> bytes:
+    # Use gotranx.cache.dumps to make sure the expressions are not
+    # evaluated when they are sent back to the main process
+    return dumps(load_ode(path, cache=cache))
+
+
+def load_odes(
+    paths: Iterable[str | Path],
+    workers: int | None = None,
+    cache: bool | DiskCache = False,
+) -> list[ODE]:
+    """Load several ODEs in parallel using a pool of processes
+
+    All files are loaded, even if some of them fail. If any
+    of the files could not be loaded an exception is raised
+    after all files have been processed.
+
+    Parameters
+    ----------
+    paths : Iterable[str | Path]
+        Paths to the files
+    workers : int | None, optional
+        Number of processes to use. If None use the number
+        of CPUs, and if 1 load the files in the current process.
+        By default None
+    cache : bool | DiskCache, optional
+        Cache passed on to `load_ode`, by default False
+
+    Returns
+    -------
+    list[gotranx.ode.ODE]
+        The ODEs, in the same order as the paths
+
+    Raises
+    ------
+    exceptions.BatchLoadError
+        If any of the files could not be loaded. The exception
+        contains the errors for each file that failed, together
+        with the ODEs that were loaded successfully
+    """
+    fnames = [Path(p) for p in paths]
+    odes: list[ODE | None] = [None] * len(fnames)
+    errors: dict[Path, Exception] = {}
+
+    if workers == 1 or len(fnames) <= 1:
+        for i, fname in enumerate(fnames):
+            try:
+                odes[i] = load_ode(fname, cache=cache)
+            except Exception as e:
+                errors[fname] = e
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_load_ode_serialized, fname, cache) for fname in fnames]
+            for i, (fname, future) in enumerate(zip(fnames, futures)):
+                try:
+                    odes[i] = loads(future.result())
+                except Exception as e:
+                    errors[fname] = e
+
+    for fname, error in errors.items():
+        logger.error(f"Failed to load {fname}: {error!r}")
+    if errors:
+        raise exceptions.BatchLoadError(errors=errors, odes=odes)
+
+    return [ode for ode in odes if ode is not None]
+
+
+def split_blocks(text: str) -> list[str]:
+    """Split the text of an ODE into top level blocks, i.e
+    each ``states(...)``, ``parameters(...)``,  ``expressions(...)``
+    and ``component(...)`` block together with its content
+
+    Parameters
+    ----------
+    text : str
+        The text of the ODE
+
+    Returns
+    -------
+    list[str]
+        The blocks, that joined together gives the original text
+    """
+    # Leading whitespace is part of the first block
+    first = len(text) - len(text.lstrip())
+    starts = [m.start() for m in BLOCK_START.finditer(text) if m.start() > first]
+    boundaries = [0] + starts + [len(text)]
+    return [text[start:end] for start, end in zip(boundaries[:-1], boundaries[1:])]
+
+
+class IncrementalLoader:
+    """Load an ODE from text while reusing the parsed blocks and
+    resolved assignments from the previous loads.
+
+    The text is split into top level blocks (see `split_blocks`),
+    and only the blocks that has changed since the last load are
+    parsed again. Assignments in unchanged blocks are reused
+    without resolving their expressions again, so regenerating
+    the ODE after an edit scales with the size of the edit
+    rather than the size of the model.
+
+    Parameters
+    ----------
+    name : str, optional
+        Name of the ODE, by default "ode"
+
+    Example
+    -------
+    .. code-block:: python
+
+        loader = IncrementalLoader()
+        ode = loader.load(text)
+        # Edit one of the blocks
+        ode = loader.load(new_text)
+    """
+
+    def __init__(self, name: str = "ode") -> None:
+        self.name = name
+        self._blocks: dict[str, tuple[Any, ...]] = {}
+        # Resolved assignments, using the id of the unresolved assignment as key
+        self._resolved: dict[int, tuple[atoms.Assignment, atoms.Assignment]] = {}
+        self.num_parsed_blocks = 0
+
+    def _parse_blocks(self, text: str) -> list[tuple[Any, ...]]:
+        parser = get_parser(TreeToBlocks)
+        blocks = {}
+        lines = []
+        self.num_parsed_blocks = 0
+        for block in split_blocks(text):
+            if block not in blocks:
+                if (block_lines := self._blocks.get(block)) is None:
+                    block_lines = parser.parse(block)
+                    self.num_parsed_blocks += 1
+                blocks[block] = block_lines
+            lines.append(blocks[block])
+        # Only keep the blocks in the current text
+        self._blocks = blocks
+        return lines
+
+    def _resolve(self, lines: list[Any], symbols: dict[str, Any]) -> list[Any]:
+        resolved = {}
+        intern_table: dict[sp.Basic, sp.Basic] = {}
+        new_lines: list[Any] = []
+        for line in lines:
+            if isinstance(line, (atoms.Comment, str)):
+                new_lines.append(line)
+                continue
+            new_line = []
+            for atom in line:
+                if isinstance(atom, atoms.Assignment):
+                    key = id(atom)
+                    if key in self._resolved and atom.value.dependencies.issubset(symbols):
+                        resolved[key] = self._resolved[key]
+                    else:
+                        resolved[key] = (atom, atom.resolve_expression(symbols, intern_table))
+                    atom = resolved[key][1]
+                new_line.append(atom)
+            new_lines.append(tuple(new_line))
+
+        self._resolved = resolved
+        return new_lines
+
+    def load(self, text: str) -> ODE:
+        """Load an ODE from a string
+
+        Parameters
+        ----------
+        text : str
+            The string to parse
+
+        Returns
+        -------
+        gotranx.ode.ODE
+            The ODE
+        """
+        try:
+            lines = [line for block in self._parse_blocks(text) for line in block]
+            symbols: dict[str, Any] = {}
+            for line in lines:
+                if isinstance(line, (atoms.Comment, str)):
+                    continue
+                for atom in line:
+                    if not isinstance(atom, atoms.Comment):
+                        symbols[atom.name] = atom.symbol
+            symbols["time"] = symbols["t"] = sp.Symbol("t")
+
+            result = build_lark_ode(self._resolve(lines, symbols))
+            return ODE(components=result.components, name=self.name, comments=result.comments)
+        except (exceptions.GotranxError, lark.exceptions.LarkError):
+            # Make sure to give the same error (with the correct
+            # line numbers) as when loading the full text
+            self._blocks.clear()
+            self._resolved.clear()
+            return ode_from_string(text, name=self.name)
+
+    def load_file(self, path: str | Path) -> ODE:
+        """Load an ODE from a file
+
+        Parameters
+        ----------
+        path : str | Path
+            Path to the file
+
+        Returns
+        -------
+        gotranx.ode.ODE
+            The ODE
+
+        Raises
+        ------
+        exceptions.ODEFileNotFound
+            Raised if the file is not found
+        """
+        fname = Path(path)
+        if not fname.is_file():
+            raise exceptions.ODEFileNotFound(fname)
+        return self.load(fname.read_text())
@@ -6,13 +6,8 @@ from typing import overload
 
 import sympy as sp
 
-try:
-    import myokit
-    import myokit.formats.sympy
-    import myokit.lib.guess
-    import myokit.formats.cellml
-except ImportError:
-    myokit = None
+# myokit is slow to import, so it is only imported when needed (see `assert_has_myokit`)
+myokit = None
 
 from . import atoms
 from .ode_component import MyokitComponent
@@ -23,8 +18,17 @@ reserved_names = {name for name in dir(sp) if not name.startswith("_")}
 
 
 def assert_has_myokit():
-    if myokit is None:
+    global myokit
+    if myokit is not None:
+        return
+    try:
+        import myokit as _myokit
+        import myokit.formats.sympy
+        import myokit.lib.guess
+        import myokit.formats.cellml  # noqa: F401
+    except ImportError:
         raise GotranxImportError("myokit")
+    myokit = _myokit
 
 
 @overload
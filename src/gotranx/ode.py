@@ -3,9 +3,12 @@ from collections import defaultdict
 
 from functools import cached_property
 from pathlib import Path
+from types import MappingProxyType
 from graphlib import TopologicalSorter
 from collections.abc import Iterable
+from collections.abc import Mapping
 from collections.abc import Sequence
+from enum import IntEnum
 from typing import TypeVar
 from typing import cast
 from typing import Any
@@ -15,7 +18,10 @@ import sympy as sp
 
 from . import atoms
 from . import exceptions
+from . import sympytools
+from .cache import hash_key
 from .ode_component import BaseComponent, Component
+from .profiling import stage, timed
 
 T = TypeVar("T")
 U = TypeVar("U", bound=atoms.Assignment)
@@ -49,6 +55,80 @@ class AllAtoms(NamedTuple):
     lookup: dict[str, atoms.Atom]
 
 
+class Linearization(NamedTuple):
+    """The derivative of the right hand side of a state derivative
+    with respect to its state"""
+
+    expr: sp.Expr
+    #: Whether the derivative is known to be zero
+    is_zero: bool
+    #: Whether the derivative is known to be nonzero, so that
+    #: it is safe to divide by it
+    nonzero: bool
+
+
+class DependencyClass(IntEnum):
+    """What an assignment varies with. The classes are ordered,
+    so that an assignment belongs to the largest class of its
+    dependencies"""
+
+    #: Depends on nothing but numbers
+    constant = 0
+    #: Depends on parameters, but not on time or states
+    parameter = 1
+    #: Depends on time, but not on states
+    time = 2
+    #: Depends on states (or on missing variables)
+    state = 3
+
+
+class ODEIndex(NamedTuple):
+    """Structural information about an ODE, see `ODE.index`. The index
+    is shared by everything that uses the ODE, so the mappings are
+    read-only views. Use e.g ``dict(index.state_index)`` to get a copy
+    that can be modified.
+    """
+
+    #: Names of all assignments and their dependencies sorted by dependencies
+    sorted_names: tuple[str, ...]
+    #: All assignments sorted by dependencies
+    sorted_assignments: tuple[atoms.Assignment, ...]
+    #: All states in the order of the sorted state derivatives
+    sorted_states: tuple[atoms.State, ...]
+    #: The names that each assignment depend on
+    dependencies: Mapping[str, frozenset[str]]
+    #: The assignments that depend on each name
+    dependents: Mapping[str, frozenset[str]]
+    #: Index of each state in the state array
+    state_index: Mapping[str, int]
+    #: Index of each parameter in the parameter array
+    parameter_index: Mapping[str, int]
+    #: Index of each assignment in the monitor array
+    monitor_index: Mapping[str, int]
+    #: Index of each missing variable in the missing variables array
+    missing_variables: Mapping[str, int]
+    #: The dependency class of each assignment
+    dependency_classes: Mapping[str, DependencyClass]
+
+    def __reduce__(self):
+        # Mapping proxies cannot be pickled
+        return _make_index, tuple(
+            dict(value) if isinstance(value, MappingProxyType) else value for value in self
+        )
+
+
+def _freeze(value: Any) -> Any:
+    return MappingProxyType(value) if isinstance(value, dict) else value
+
+
+def _make_index(*args, **kwargs) -> ODEIndex:
+    # Create an index where all the dictionaries are read-only
+    return ODEIndex(
+        *(_freeze(value) for value in args),
+        **{key: _freeze(value) for key, value in kwargs.items()},
+    )
+
+
 def gather_atoms(
     components: Sequence[BaseComponent],
 ) -> AllAtoms:
@@ -69,6 +149,7 @@ def gather_atoms(
     symbols = {}
     symbol_values = defaultdict(set)
     lookup: dict[str, atoms.Atom] = {}
+    intermediates = defaultdict(list)
     for component in components:
         for p in component.parameters:
             symbol_names.append(p.name)
@@ -84,11 +165,19 @@ def gather_atoms(
             symbol_names.append(i.name)
             symbols[i.name] = i.symbol
             lookup[i.name] = i
-            symbol_values[i.name].add(i.expr)
+            intermediates[i.name].append(i)
+            # Compare the expression trees to avoid building the sympy expressions
+            symbol_values[i.name].add(i.value.tree if i.value is not None else i.expr)
         for st in component.state_derivatives:
             symbol_names.append(st.name)
             symbols[st.name] = st.symbol
             lookup[st.name] = st
+
+    for name, values in intermediates.items():
+        if len(symbol_values[name]) > 1:
+            # Different trees can still give the same expression
+            trees = {i.value.tree for i in values if i.value is not None}
+            symbol_values[name] = (symbol_values[name] - trees) | {i.expr for i in values}
     return AllAtoms(symbol_names, symbol_values, symbols, lookup)
 
 
@@ -148,7 +237,7 @@ def add_temporal_state(
                     components=state_derivative.components,
                     description=state_derivative.description,
                     unit_str=state_derivative.unit_str,
-                    unit=state_derivative.unit,
+                    unit=state_derivative._unit,
                     state=new_state,
                     symbol=sp.Derivative(new_state.symbol, t),
                 ),
@@ -184,11 +273,13 @@ def resolve_expressions(
     tuple[gotranx.ode_component.Component, ...]
         The new components with resolved expressions
     """
+    # Identical subexpressions are shared between all assignments in the model
+    intern_table: dict[sp.Basic, sp.Basic] = {}
     new_components = []
     for component in components:
         assignments = []
         for assignment in component.assignments:
-            assignments.append(assignment.resolve_expression(symbols))
+            assignments.append(assignment.resolve_expression(symbols, intern_table))
         new_components.append(
             Component(
                 name=component.name,
@@ -276,7 +367,8 @@ def sort_assignments(
                 "Try to save the ODE to an .ode file first and load it again"
             )
             raise exceptions.GotranxError(msg)
-        sorter.add(assignment.name, *assignment.value.dependencies)
+        # Sort the dependencies to make the order independent of the set order
+        sorter.add(assignment.name, *sorted(assignment.value.dependencies))
 
     static_order = tuple(sorter.static_order())
 
@@ -336,6 +428,11 @@ class ODE:
 
         self.comments = comments
         self.text = " ".join(comment.text for comment in comments)
+        self._sorted_assignments: dict[
+            tuple[bool, frozenset[str] | None], tuple[atoms.Assignment, ...]
+        ] = {}
+        self._live: dict[frozenset[str], frozenset[str]] = {}
+        self._linearizations: dict[str, Linearization] = {}
 
     def remove_singularities(self):
         new_components: list[BaseComponent] = []
@@ -366,6 +463,24 @@ class ODE:
             and __o.name == self.name
         )
 
+    def __hash__(self) -> int:
+        # Equal ODEs can have different fingerprints (see `fingerprint`),
+        # so the hash only uses the names
+        return hash((self.name, tuple(sorted(self._symbols))))
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """A hash of the name of the ODE and the names, values and expressions
+        of all its components. The fingerprint is the same every time the same
+        ODE is loaded, which makes it suitable as a key for caching results
+        for the ODE. The expressions that are loaded from an .ode file are
+        fingerprinted from their expression trees, so the sympy expressions
+        are not built. Therefore equal ODEs that are created in different
+        ways (e.g from an .ode file and from myokit) can have different
+        fingerprints.
+        """
+        return hash_key(self.name, *sorted(c.fingerprint for c in self.components))
+
     def simplify(self) -> ODE:
         """Run sympy's simplify function on all expressions in the ODE"""
         return ODE(
@@ -375,7 +490,70 @@ class ODE:
             comments=self.comments,
         )
 
-    @property
+    @cached_property
+    @timed("sort assignments")
+    def index(self) -> ODEIndex:
+        """Structural information about the ODE (sorted assignments,
+        dependency graphs and array indices). This is computed once,
+        the first time it is needed, and shared by everything that
+        needs it, e.g all the functions generated by a code generator.
+        """
+        sorted_names = sort_assignments(
+            assignments=self.intermediates + self.state_derivatives,
+            assignments_only=False,
+        )
+        sorted_assignments = tuple(
+            cast(atoms.Assignment, self._lookup[name])
+            for name in sorted_names
+            if isinstance(self._lookup.get(name), atoms.Assignment)
+        )
+        sorted_states = tuple(
+            x.state for x in sorted_assignments if isinstance(x, atoms.StateDerivative)
+        )
+
+        dependencies: dict[str, frozenset[str]] = {}
+        dependents: dict[str, set[str]] = defaultdict(set)
+        for component in self.components:
+            for assignment in component.assignments:
+                if assignment.value is None:
+                    msg = (
+                        "Unable to sort assignments with None value"
+                        "Try to save the ODE to an .ode file first and load it again"
+                    )
+                    raise exceptions.GotranxError(msg)
+                dependencies[assignment.name] = assignment.value.dependencies
+                for dependency in assignment.value.dependencies:
+                    dependents[dependency].add(assignment.name)
+
+        symbols = set(self.symbols.keys()) | {"t"}
+        missing = sorted(var for var in dependents if var not in symbols)
+
+        classes: dict[str, DependencyClass] = {"t": DependencyClass.time}
+        classes["time"] = DependencyClass.time
+        classes.update((p.name, DependencyClass.parameter) for p in self.parameters)
+        classes.update((s.name, DependencyClass.state) for s in self.states)
+        classes.update((var, DependencyClass.state) for var in missing)
+        dependency_classes: dict[str, DependencyClass] = {}
+        for assignment in sorted_assignments:
+            dependency_classes[assignment.name] = classes[assignment.name] = max(
+                (classes[dep] for dep in dependencies[assignment.name]),
+                default=DependencyClass.constant,
+            )
+
+        return _make_index(
+            sorted_names=sorted_names,
+            sorted_assignments=sorted_assignments,
+            sorted_states=sorted_states,
+            dependencies=dependencies,
+            dependents={name: frozenset(deps) for name, deps in dependents.items()},
+            state_index={s.name: i for i, s in enumerate(sorted_states)},
+            parameter_index={p.name: i for i, p in enumerate(self.parameters)},
+            monitor_index={x.name: i for i, x in enumerate(sorted_assignments)},
+            missing_variables={var: i for i, var in enumerate(missing)},
+            dependency_classes=dependency_classes,
+        )
+
+    @cached_property
     def states(self) -> tuple[atoms.State, ...]:
         """Get all states in the ODE"""
         states: set[atoms.State] = set()
@@ -452,7 +630,10 @@ class ODE:
         return self._components[name]
 
     def sorted_assignments(
-        self, assignments_only: bool = True, remove_unused: bool = False
+        self,
+        assignments_only: bool = True,
+        remove_unused: bool = False,
+        targets: Iterable[str] | None = None,
     ) -> tuple[atoms.Assignment, ...]:
         """Get the assignments in the ODE sorted by dependencies
 
@@ -462,31 +643,105 @@ class ODE:
             If True only return assignments otherwise you can
             include states and parameters as well, by default True
         remove_unused : bool, optional
-            Remove unused variables, by default False
+            Remove variables that are not needed to compute the
+            targets, by default False
+        targets : Iterable[str] | None, optional
+            Names of the variables that should be computed when
+            `remove_unused` is True. By default the state derivatives
 
         Returns
         -------
         tuple[atoms.Assignment, ...]
             The sorted assignments
         """
-        intermediates = self.intermediates
+        live = None
         if remove_unused:
-            deps = self.dependents()
-            intermediates = tuple([a for a in intermediates if a.name in deps])
+            if targets is None:
+                targets = (x.name for x in self.state_derivatives)
+            live = self.live(targets)
+
+        key = (assignments_only, live)
+        if key not in self._sorted_assignments:
+            index = self.index
+            if live is None and assignments_only:
+                self._sorted_assignments[key] = index.sorted_assignments
+            else:
+                names: Iterable[str] = index.sorted_names
+                if live is not None:
+                    names = (name for name in names if name in live)
+                if assignments_only:
+                    names = (name for name in names if name in index.dependencies)
+                self._sorted_assignments[key] = tuple(
+                    [cast(atoms.Assignment, self[name]) for name in names]
+                )
+        return self._sorted_assignments[key]
+
+    def live(self, targets: Iterable[str]) -> frozenset[str]:
+        """Get the names of all variables that are needed to compute
+        the targets, i.e the targets and everything they depend on,
+        directly or indirectly
 
-        names = sort_assignments(
-            assignments=intermediates + self.state_derivatives,
-            assignments_only=assignments_only,
-        )
-        return tuple([cast(atoms.Assignment, self[name]) for name in names])
+        Parameters
+        ----------
+        targets : Iterable[str]
+            Names of the variables to compute
+
+        Returns
+        -------
+        frozenset[str]
+            The names of the live variables, including states,
+            parameters and missing variables
+        """
+        key = frozenset(targets)
+        if key not in self._live:
+            dependencies = self.index.dependencies
+            live: set[str] = set()
+            stack = list(key)
+            while stack:
+                name = stack.pop()
+                if name in live:
+                    continue
+                live.add(name)
+                stack.extend(dependencies.get(name, ()))
+            self._live[key] = frozenset(live)
+        return self._live[key]
+
+    def linearization(self, name: str) -> Linearization:
+        """Get the linearization of a state derivative, i.e the derivative
+        of its expression with respect to its state. The derivative is
+        computed once and shared by all schemes and code generators that
+        use this ODE.
+
+        Parameters
+        ----------
+        name : str
+            Name of the state derivative
+
+        Returns
+        -------
+        Linearization
+            The derivative, and whether it is known to be zero or nonzero
+        """
+        if name not in self._linearizations:
+            x = cast(atoms.StateDerivative, self[name])
+            with stage("differentiate"):
+                expr = x.expr.diff(x.state.symbol)
+            with stage("zero division check"):
+                nonzero = sympytools.fraction_numerator_is_nonzero(expr)
+            self._linearizations[name] = Linearization(
+                expr=expr, is_zero=bool(expr.is_zero), nonzero=nonzero
+            )
+        return self._linearizations[name]
 
     def sorted_state_derivatives(self) -> tuple[atoms.StateDerivative, ...]:
         """Get the state derivatives in the ODE sorted by dependencies"""
-        return tuple(s for s in self.sorted_assignments() if isinstance(s, atoms.StateDerivative))
+        return tuple(
+            s for s in self.index.sorted_assignments if isinstance(s, atoms.StateDerivative)
+        )
 
     def sorted_states(self) -> tuple[atoms.State, ...]:
         """Get the states in the ODE sorted by dependencies"""
-        return tuple(s.state for s in self.sorted_state_derivatives())
+        return self.index.sorted_states
 
     def save(self, path: Path) -> None:
         """Save the ODE to a file
@@ -500,30 +755,24 @@ class ODE:
 
         write_ODE_to_ode_file(self, path)
 
-    def dependents(self) -> dict[str, set[str]]:
-        """Get a dictionary of dependents for each component"""
-        dependencies = defaultdict(set)
-        for component in self.components:
-            for assignment in component.assignments:
-                if assignment.value is None:
-                    msg = (
-                        "Unable to sort assignments with None value"
-                        "Try to save the ODE to an .ode file first and load it again"
-                    )
-                    raise exceptions.GotranxError(msg)
-                for dependency in assignment.value.dependencies:
-                    dependencies[dependency].add(assignment.name)
+    def dependents(self) -> Mapping[str, frozenset[str]]:
+        """Get a dictionary with the names of the assignments
+        that depend on each variable"""
+        return self.index.dependents
 
-        return dict(dependencies)
+    @property
+    def dependency_classes(self) -> Mapping[str, DependencyClass]:
+        """Get a dictionary with the dependency class of each assignment,
+        i.e whether the assignment is a constant, or only depends on the
+        parameters, on time or on the states"""
+        return self.index.dependency_classes
 
     @property
-    def missing_variables(self) -> dict[str, int]:
+    def missing_variables(self) -> Mapping[str, int]:
         """Get a dictionary of missing variables for each component
 
         This is relevant if you have different sub odes where the
         states in one sub ode is a parameter in another sub ode
 
         """
-        symbols = set(self.symbols.keys()) | {"t"}
-        variable_names = {var for var in self.dependents() if var not in symbols}
-        return {var: i for i, var in enumerate(sorted(variable_names))}
+        return self.index.missing_variables
@@ -6,6 +6,7 @@ import attr
 
 from . import atoms
 from . import exceptions
+from .cache import hash_key
 
 
 STATE_DERIV_EXPR = re.compile(r"^d(?P<state>\w+)_dt$")
@@ -30,6 +31,18 @@ class BaseComponent:
     state_derivatives: frozenset[atoms.StateDerivative] = attr.ib(init=False)
     intermediates: frozenset[atoms.Intermediate] = attr.ib(init=False)
 
+    @property
+    def fingerprint(self) -> str:
+        """A hash of the name of the component and all its atoms. The hash
+        does not depend on the order of the atoms, and is the same
+        every time the same component is loaded."""
+        return hash_key(
+            self.name,
+            *sorted(
+                atom.fingerprint for atom in (*self.states, *self.parameters, *self.assignments)
+            ),
+        )
+
     def simplify(self) -> Component:
         """Run sympy's simplify function on all expressions in the ODE"""
         return Component(
@@ -1,7 +1,13 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from hashlib import sha256
 from pathlib import Path
 
+import lark
 from lark import Lark
 
+from .cache import get_cache_dir
 
 _here = Path(__file__).absolute().parent
 
@@ -18,6 +24,58 @@ def load_grammar() -> str:
     return (_here / "ode.lark").read_text()
 
 
+def parser_cache_file() -> str | bool:
+    """Get the file used to cache the LALR parse tables
+
+    The name of the file contains a hash of the grammar and the
+    version of lark, so that a new cache is built whenever
+    one of them changes.
+
+    Returns
+    -------
+    str | bool
+        Path to the cache file, or True if no cache directory is
+        available, in which case lark will cache to a temporary file
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return True
+    grammar_hash = sha256(load_grammar().encode("utf-8")).hexdigest()[:16]
+    return str(cache_dir / f"parser-{grammar_hash}-lark{lark.__version__}.cache")
+
+
 class Parser(Lark):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(load_grammar(), *args, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def get_parser(transformer: type[lark.Transformer] | None = None) -> Parser:
+    """Get the parser used for loading ODEs
+
+    The parser is only built once per process (and transformer), and
+    the parse tables are cached on disk, so that the grammar is only
+    compiled once per installation.
+
+    Parameters
+    ----------
+    transformer : type[lark.Transformer] | None, optional
+        The transformer class used to transform the tree, by
+        default `gotranx.transformer.TreeToODE`
+
+    Returns
+    -------
+    Parser
+        A LALR parser that transforms the tree using the transformer
+    """
+    if transformer is None:
+        from .transformer import TreeToODE
+
+        transformer = TreeToODE
+
+    return Parser(
+        parser="lalr",
+        transformer=transformer(),
+        propagate_positions=True,
+        cache=parser_cache_file(),
+    )
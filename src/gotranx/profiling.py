@@ -0,0 +1,207 @@
+"""Instrumentation of the different stages of loading an ODE
+and generating code (parsing, sorting, printing, formatting etc.)
+
+The stages are only timed while a profile is active, e.g
+
+.. code-block:: python
+
+    with gotranx.profiling.profile() as p:
+        ode = gotranx.load_ode("model.ode")
+        code = gotranx.cli.gotran2c.get_code(ode)
+
+    print(p.summary())
+
+Stages can be nested, and the time of a stage includes the time of
+all stages that are started inside it. Stages run in other processes
+(e.g when generating code with several workers) are not included.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class Stage:
+    """Measurements for one stage"""
+
+    name: str
+    #: Number of times the stage was run
+    calls: int = 0
+    #: Total wall time in seconds
+    time: float = 0.0
+    #: Peak traced memory in bytes while the stage was running,
+    #: or None if memory is not traced
+    peak_memory: int | None = None
+
+
+@dataclass
+class Profile:
+    """The measurements for all the stages run while the profile is active
+
+    Parameters
+    ----------
+    trace_memory : bool, optional
+        Trace the peak memory of each stage with `tracemalloc`. Note that
+        this makes everything considerably slower, by default False
+    """
+
+    trace_memory: bool = False
+    stages: dict[str, Stage] = field(default_factory=dict)
+    # Peak memory of the stages that are currently running,
+    # including the peak of the nested stages that has finished
+    _peaks: list[int] = field(default_factory=list, repr=False)
+
+    def _enter(self) -> None:
+        if self.trace_memory:
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+
+    def _exit(self, name: str, elapsed: float) -> None:
+        stage = self.stages.setdefault(name, Stage(name=name))
+        stage.calls += 1
+        stage.time += elapsed
+        if self.trace_memory:
+            peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+            stage.peak_memory = max(stage.peak_memory or 0, peak)
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get the report as a dictionary, that can be dumped as json"""
+        return {
+            "trace_memory": self.trace_memory,
+            "stages": [asdict(stage) for stage in self.stages.values()],
+        }
+
+    def dump(self, path: str | Path) -> None:
+        """Write the report to a json file
+
+        Parameters
+        ----------
+        path : str | Path
+            Path to the file
+        """
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2))
+
+    def summary(self) -> str:
+        """Get a table with the measurements for each stage,
+        sorted by the total time"""
+        stages = sorted(self.stages.values(), key=lambda s: s.time, reverse=True)
+        width = max([len("Stage")] + [len(s.name) for s in stages])
+        header = f"{'Stage':<{width}}  {'Calls':>8}  {'Time [s]':>10}"
+        if self.trace_memory:
+            header += f"  {'Peak memory [MB]':>16}"
+        lines = [header, "-" * len(header)]
+        for s in stages:
+            line = f"{s.name:<{width}}  {s.calls:>8}  {s.time:>10.3f}"
+            if self.trace_memory:
+                line += f"  {(s.peak_memory or 0) / 1024**2:>16.1f}"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+# The profile that is currently active
+_active: Profile | None = None
+
+
+class _Stage:
+    __slots__ = ("profile", "name", "start")
+
+    def __init__(self, profile: Profile, name: str) -> None:
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.profile._enter()
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args) -> None:
+        self.profile._exit(self.name, time.perf_counter() - self.start)
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *args) -> None:
+        pass
+
+
+_no_stage = _NoStage()
+
+
+def stage(name: str) -> _Stage | _NoStage:
+    """Context manager that measures a stage, if a profile is active
+
+    Parameters
+    ----------
+    name : str
+        Name of the stage
+    """
+    if _active is None:
+        return _no_stage
+    return _Stage(_active, name)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator that measures every call to the function
+    as a stage, if a profile is active
+
+    Parameters
+    ----------
+    name : str
+        Name of the stage
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+@contextmanager
+def profile(trace_memory: bool = False) -> Iterator[Profile]:
+    """Measure all the stages that are run inside the context
+
+    Parameters
+    ----------
+    trace_memory : bool, optional
+        Trace the peak memory of each stage with `tracemalloc`, by default False
+
+    Yields
+    ------
+    Profile
+        The measurements
+    """
+    global _active
+    previous = _active
+    _active = Profile(trace_memory=trace_memory)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        with stage("total"):
+            yield _active
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        _active = previous
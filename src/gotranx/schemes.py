@@ -8,6 +8,7 @@ from structlog import get_logger
 from . import atoms
 from .ode import ODE
 from . import sympytools
+from .sympytools import fraction_numerator_is_nonzero  # noqa: F401
 from enum import Enum
 
 
@@ -85,42 +86,6 @@ def list_schemes() -> list[str]:
     return [s.value for s in Scheme]
 
 
-def fraction_numerator_is_nonzero(expr):
-    """Perform a very cheap check to detect if a fraction is definitely non-zero."""
-
-    if isinstance(expr, sympy.Pow):
-        # check if the expression is on the form a**-1
-        a, b = expr.args
-        if b is sympy.S.NegativeOne:
-            return True
-        else:
-            # we won't do any further checks
-            return False
-    elif isinstance(expr, sympy.Mul):
-        # check if all factors are non-zero
-        args = expr.args
-        certainly_nonzero_args = []
-        potentially_nonzero_args = []
-        for e in args:
-            if len(e.free_symbols) == 0 and e.is_nonzero:
-                certainly_nonzero_args.append(e)
-            else:
-                potentially_nonzero_args.append(e)
-
-        if len(potentially_nonzero_args) == 0:
-            # all factors are certainly nonzero
-            return True
-
-        # check all potentially non-zero factors
-        for e in potentially_nonzero_args:
-            if not fraction_numerator_is_nonzero(e):
-                return False
-        else:
-            return True
-    else:
-        return False
-
-
 def explicit_euler(
     ode: ODE,
     dt: sympy.Symbol,
@@ -236,10 +201,10 @@ def hybrid_rush_larsen(
         if not isinstance(x, atoms.StateDerivative):
             continue
 
-        expr_diff = x.expr.diff(x.state.symbol)
         state_is_stiff = x.state.name in stiff_states_set
+        linearization = ode.linearization(x.name) if state_is_stiff else None
 
-        if not state_is_stiff or expr_diff.is_zero:
+        if linearization is None or linearization.is_zero:
             # Use forward Euler
             eqs.append(
                 printer(
@@ -254,9 +219,9 @@ def hybrid_rush_larsen(
         logger.debug(f"State {x.state.name} is stiff")
         linearized_name = x.name + "_linearized"
         linearized = sympy.Symbol(linearized_name)
-        eqs.append(printer(linearized, expr_diff, use_variable_prefix=True))
+        eqs.append(printer(linearized, linearization.expr, use_variable_prefix=True))
 
-        need_zero_div_check = not fraction_numerator_is_nonzero(expr_diff)
+        need_zero_div_check = not linearization.nonzero
         if not need_zero_div_check:
             logger.debug(f"{linearized_name} cannot be zero. Skipping zero division check")
 
@@ -331,9 +296,9 @@ def generalized_rush_larsen(
         if not isinstance(x, atoms.StateDerivative):
             continue
 
-        expr_diff = x.expr.diff(x.state.symbol)
+        linearization = ode.linearization(x.name)
 
-        if expr_diff.is_zero:
+        if linearization.is_zero:
             # Use forward Euler
             eqs.append(
                 printer(
@@ -346,9 +311,9 @@ def generalized_rush_larsen(
 
         linearized_name = x.name + "_linearized"
         linearized = sympy.Symbol(linearized_name)
-        eqs.append(printer(linearized, expr_diff, use_variable_prefix=True))
+        eqs.append(printer(linearized, linearization.expr, use_variable_prefix=True))
 
-        need_zero_div_check = not fraction_numerator_is_nonzero(expr_diff)
+        need_zero_div_check = not linearization.nonzero
         if not need_zero_div_check:
             logger.debug(f"{linearized_name} cannot be zero. Skipping zero division check")
 
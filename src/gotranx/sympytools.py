@@ -2,6 +2,154 @@ from __future__ import annotations
 import sympy
 
 
+def fingerprint(expr) -> str:
+    """Return a canonical string representation of an expression,
+    containing the type of each node in the expression tree together with
+    the number of arguments, or the value for the leaves. The tree is
+    traversed iteratively, which is a lot faster than `sympy.srepr`.
+
+    Parameters
+    ----------
+    expr : sympy.Basic | float
+        The expression
+
+    Returns
+    -------
+    str
+        The representation of the expression
+    """
+    parts = []
+    stack = [sympy.sympify(expr)]
+    while stack:
+        node = stack.pop()
+        if node.args:
+            parts.append(f"{type(node).__name__}/{len(node.args)}")
+            stack.extend(reversed(node.args))
+        else:
+            parts.append(f"{type(node).__name__}:{node}")
+    return ",".join(parts)
+
+
+class Product(sympy.UnevaluatedExpr):
+    """A product that is printed as it is, e.g ``x*x``,
+    which sympy would otherwise turn into ``x**2``"""
+
+    is_commutative = True
+
+
+def _is_cheap(expr) -> bool:
+    # Only additions, multiplications and divisions, so that
+    # computing the expression more than once is cheap
+    return all(
+        not isinstance(node, sympy.Function) and not (node.is_Pow and node.exp != -1)
+        for node in sympy.preorder_traversal(expr)
+    )
+
+
+def _is_integer_valued(value) -> bool:
+    # Note that sympy does not consider e.g 2.0 to be equal to 2
+    return value.is_Integer or (value.is_Float and float(value).is_integer())
+
+
+def _is_small_power(expr, max_power: int) -> bool:
+    return (
+        expr.is_Pow
+        and _is_integer_valued(expr.exp)
+        and 2 <= abs(expr.exp) <= max_power
+        and (expr.base.is_Symbol or _is_cheap(expr.base))
+    )
+
+
+def _expand_power(expr: sympy.Pow) -> sympy.Expr:
+    product = Product(sympy.Mul(*[expr.base] * abs(int(expr.exp)), evaluate=False))
+    return product if expr.exp > 0 else sympy.Pow(product, -1)
+
+
+def _exp_minus_one(expr) -> sympy.Expr | None:
+    # Find c*exp(a) - c in a sum and return c*expm1(a). Note that the
+    # constant can be an unevaluated expression such as -1*1.0
+    constants = [term for term in expr.args if term.is_number]
+    if not constants or (constant := float(sympy.Add(*constants))) == 0:
+        return None
+    for term in expr.args:
+        coeff, factor = term.as_coeff_Mul()
+        if isinstance(factor, sympy.exp) and float(coeff) == -constant:
+            from sympy.codegen.cfunctions import expm1
+
+            rest = [t for t in expr.args if t is not term and not t.is_number]
+            return sympy.Add(coeff * expm1(factor.args[0]), *rest)
+    return None
+
+
+def _has_several_exp(expr) -> bool:
+    return expr.is_Mul and sum(isinstance(f, sympy.exp) for f in expr.args) > 1
+
+
+def _merge_exp(expr: sympy.Mul) -> sympy.Expr:
+    exps = [f.args[0] for f in expr.args if isinstance(f, sympy.exp)]
+    rest = [f for f in expr.args if not isinstance(f, sympy.exp)]
+    return sympy.Mul(*rest, sympy.exp(sympy.Add(*exps)))
+
+
+def _denominator(term) -> sympy.Expr | None:
+    for factor in sympy.Mul.make_args(term):
+        if factor.is_Pow and factor.exp == -1 and not factor.base.is_number:
+            return factor.base
+    return None
+
+
+def _has_common_denominator(expr) -> bool:
+    if not expr.is_Add:
+        return False
+    denominators = [d for d in map(_denominator, expr.args) if d is not None]
+    return len(set(denominators)) < len(denominators)
+
+
+def _collect_denominators(expr: sympy.Add) -> sympy.Expr:
+    groups: dict[sympy.Expr | None, list[sympy.Expr]] = {}
+    for term in expr.args:
+        groups.setdefault(_denominator(term), []).append(term)
+
+    terms = groups.pop(None, [])
+    for denominator, group in groups.items():
+        if len(group) == 1:
+            terms.extend(group)
+        else:
+            terms.append(sympy.Add(*[term * denominator for term in group]) / denominator)
+    return sympy.Add(*terms)
+
+
+def strength_reduce(expr, max_power: int = 3, use_expm1: bool = True):
+    """Rewrite an expression into one that is cheaper to evaluate,
+    by replacing
+
+    - ``exp(a)*exp(b)`` with ``exp(a + b)``
+    - ``exp(a) - 1`` with ``expm1(a)``
+    - ``a/d + b/d`` with ``(a + b)/d``
+    - ``x**2`` with ``x*x`` and ``x**-2`` with ``1/(x*x)``
+
+    Parameters
+    ----------
+    expr : sympy.Basic
+        The expression
+    max_power : int, optional
+        The largest power that is replaced by a product, by default 3
+    use_expm1 : bool, optional
+        Replace ``exp(a) - 1`` with ``expm1(a)``. Should only be used if
+        the target language has ``expm1``, by default True
+
+    Returns
+    -------
+    sympy.Basic
+        The rewritten expression
+    """
+    expr = expr.replace(_has_several_exp, _merge_exp)
+    if use_expm1:
+        expr = expr.replace(lambda e: e.is_Add and _exp_minus_one(e) is not None, _exp_minus_one)
+    expr = expr.replace(_has_common_denominator, _collect_denominators)
+    return expr.replace(lambda e: _is_small_power(e, max_power), _expand_power)
+
+
 def states_matrix(ode) -> sympy.Matrix:
     """Return a sympy matrix of the states in the ODE
 
@@ -135,3 +283,39 @@ def ContinuousConditional(cond, true_value, false_value, sigma=1.0):
         return true_value * (1 - H) + false_value * H
 
     return true_value * H + false_value * (1 - H)
+
+
+def fraction_numerator_is_nonzero(expr):
+    """Perform a very cheap check to detect if a fraction is definitely non-zero."""
+
+    if isinstance(expr, sympy.Pow):
+        # check if the expression is on the form a**-1
+        a, b = expr.args
+        if b is sympy.S.NegativeOne:
+            return True
+        else:
+            # we won't do any further checks
+            return False
+    elif isinstance(expr, sympy.Mul):
+        # check if all factors are non-zero
+        args = expr.args
+        certainly_nonzero_args = []
+        potentially_nonzero_args = []
+        for e in args:
+            if len(e.free_symbols) == 0 and e.is_nonzero:
+                certainly_nonzero_args.append(e)
+            else:
+                potentially_nonzero_args.append(e)
+
+        if len(potentially_nonzero_args) == 0:
+            # all factors are certainly nonzero
+            return True
+
+        # check all potentially non-zero factors
+        for e in potentially_nonzero_args:
+            if not fraction_numerator_is_nonzero(e):
+                return False
+        else:
+            return True
+    else:
+        return False
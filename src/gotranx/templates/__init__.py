@@ -64,6 +64,24 @@ class Template(typing.Protocol):
             The code for the monitor_index function
         """
 
+    @staticmethod
+    def monitored_index(data: dict[str, int]) -> str:
+        """The monitored_index function is a function that returns
+        the index of the monitor with the given name in the array
+        returned by the monitored_values function, which only
+        computes a subset of the monitors.
+
+        Parameters
+        ----------
+        data : dict[str, int]
+            The data containing the monitor names and their indexes
+
+        Returns
+        -------
+        str
+            The code for the monitored_index function
+        """
+
     @staticmethod
     def missing_index(data: dict[str, int]) -> str:
         """The missing_index function is a function that returns
@@ -3,12 +3,19 @@ from textwrap import dedent, indent
 import functools
 from structlog import get_logger
 
-from .python import acc, state_index, parameter_index, monitor_index, missing_index
+from .python import (
+    acc,
+    state_index,
+    parameter_index,
+    monitor_index,
+    monitored_index,
+    missing_index,
+)
 
 logger = get_logger()
 
 
-def init_state_values(name, state_names, state_values, code):
+def init_state_values(name, state_names, state_values, code, dtype="numpy.float64"):
     logger.debug(f"Generating init_state_values with {len(state_values)} values")
     values_comment = indent(
         "#" + functools.reduce(acc, [f"{n}={v}" for n, v in zip(state_names, state_values)]),
@@ -24,7 +31,7 @@ def init_state_values(**values):
     """
 {values_comment}
 
-    {name} = numpy.array([{values}], dtype=numpy.float64)
+    {name} = numpy.array([{values}], dtype={dtype})
 
     for key, value in values.items():
         {name} = {name}.at[state_index(key)].set(value)
@@ -34,7 +41,7 @@ def init_state_values(**values):
     )
 
 
-def init_parameter_values(name, parameter_names, parameter_values, code):
+def init_parameter_values(name, parameter_names, parameter_values, code, dtype="numpy.float64"):
     logger.debug(f"Generating init_parameter_values with {len(parameter_values)} values")
     values_comment = indent(
         "#"
@@ -51,7 +58,7 @@ def init_parameter_values(**values):
     """
 {values_comment}
 
-    {name} = numpy.array([{values}], dtype=numpy.float64)
+    {name} = numpy.array([{values}], dtype={dtype})
 
     for key, value in values.items():
         {name} = {name}.at[parameter_index(key)].set(value)
@@ -69,6 +76,8 @@ def method(
     values,
     num_return_values: int,
     missing_variables: str = "",
+    monitor_name: str = "",
+    num_monitor_values: int = 0,
     **kwargs,
 ):
     logger.debug(f"Generating method '{name}', with {num_return_values} return values.")
@@ -78,6 +87,12 @@ def method(
     return_name_lst = (
         ["numpy.array(["] + [f"_values_{i}, " for i in range(num_return_values)] + ["])"]
     )
+    if monitor_name:
+        return_name_lst += (
+            [", numpy.array(["]
+            + [f"_{monitor_name}_{i}, " for i in range(num_monitor_values)]
+            + ["])"]
+        )
     indent_return = indent(f"return {''.join(return_name_lst)}", "    ")
     indent_missing_variables = indent(missing_variables, "    ")
     indent_states = indent(states, "    ")
@@ -110,5 +125,6 @@ __all__ = [
     "parameter_index",
     "state_index",
     "monitor_index",
+    "monitored_index",
     "missing_index",
 ]
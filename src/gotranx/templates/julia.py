@@ -104,5 +104,9 @@ def monitor_index(data: dict[str, int]) -> str:
     return method_index(data, "monitor")
 
 
+def monitored_index(data: dict[str, int]) -> str:
+    return method_index(data, "monitored")
+
+
 def missing_index(data: dict[str, int]) -> str:
     return method_index(data, "monitor")
@@ -135,6 +135,26 @@ def monitor_index(data: dict[str, int]) -> str:
     return _index(data, "monitor")
 
 
+def monitored_index(data: dict[str, int]) -> str:
+    """The monitored_index function is a function that returns
+    the index of the monitor with the given name in the array
+    returned by the monitored_values function, which only
+    computes a subset of the monitors.
+
+    Parameters
+    ----------
+    data : dict[str, int]
+        The data containing the monitor names and their indexes
+
+    Returns
+    -------
+    str
+        The code for the monitored_index function
+    """
+    logger.debug(f"Generating monitored_index with {len(data)} values")
+    return _index(data, "monitored")
+
+
 def missing_index(data: dict[str, int]) -> str:
     """The missing_index function is a function that returns
     the index of the missing value with the given name.
@@ -159,7 +179,7 @@ def missing_index(data: dict[str, int]) -> str:
     return _index(data, "missing")
 
 
-def init_state_values(name, state_names, state_values, code):
+def init_state_values(name, state_names, state_values, code, dtype="numpy.float64"):
     """The init_state_values function is a function that initializes
     the state values of the model.
 
@@ -177,6 +197,8 @@ def init_state_values(name, state_names, state_values, code):
         The names of the states
     code : str
         Additional code to be inserted into the function (not used in this template)
+    dtype : str, optional
+        The dtype of the array, by default "numpy.float64"
 
     Returns
     -------
@@ -200,7 +222,7 @@ def init_state_values(**values):
     """
 {values_comment}
 
-    {name} = numpy.array([{values}], dtype=numpy.float64)
+    {name} = numpy.array([{values}], dtype={dtype})
 
     for key, value in values.items():
         {name}[state_index(key)] = value
@@ -210,7 +232,7 @@ def init_state_values(**values):
     )
 
 
-def init_parameter_values(name, parameter_names, parameter_values, code):
+def init_parameter_values(name, parameter_names, parameter_values, code, dtype="numpy.float64"):
     """The init_parameter_values function is a function that initializes
     the parameter values of the model.
 
@@ -228,6 +250,8 @@ def init_parameter_values(name, parameter_names, parameter_values, code):
         The names of the parameters
     code : str
         Additional code to be inserted into the function (not used in this template)
+    dtype : str, optional
+        The dtype of the array, by default "numpy.float64"
 
     Returns
     -------
@@ -255,7 +279,7 @@ def init_parameter_values(**values):
     """
 {values_comment}
 
-    {name} = numpy.array([{values}], dtype=numpy.float64)
+    {name} = numpy.array([{values}], dtype={dtype})
 
     for key, value in values.items():
         {name}[parameter_index(key)] = value
@@ -277,6 +301,8 @@ def method(
     values_type: str = "numpy.zeros_like(states, dtype=numpy.float64)",
     shape_info: str = "",
     missing_variables: str = "",
+    monitor_name: str = "",
+    monitor_type: str = "",
     **kwargs,
 ):
     """The method function is a function that generates a method
@@ -313,6 +339,11 @@ def method(
     nan_to_num : bool
         If True, the return values are passed through numpy.nan_to_num
         with nan=0.0
+    monitor_name : str
+        If given, the name of a second array (with monitored values)
+        that is returned together with the values
+    monitor_type : str
+        The type of the second array
 
     Returns
     -------
@@ -329,12 +360,13 @@ def method(
     indent_parameters = indent(parameters, "    ")
     indent_values = indent(values, "    ")
     if nan_to_num:
-        indent_return = indent(
-            f"return numpy.nan_to_num({return_name}, nan=0.0)",
-            "    ",
-        )
+        return_value = f"numpy.nan_to_num({return_name}, nan=0.0)"
     else:
-        indent_return = indent(f"return {return_name}", "    ")
+        return_value = return_name
+    if monitor_name:
+        values_type += f"\n    {monitor_name} = {monitor_type}"
+        return_value += f", {monitor_name}"
+    indent_return = indent(f"return {return_value}", "    ")
     return dedent(
         f"""
 def {name}({args}):
@@ -5,7 +5,14 @@ from textwrap import dedent, indent
 import functools
 from structlog import get_logger
 
-from .python import acc, state_index, parameter_index, monitor_index, missing_index
+from .python import (
+    acc,
+    state_index,
+    parameter_index,
+    monitor_index,
+    monitored_index,
+    missing_index,
+)
 
 __all__ = [
     "init_state_values",
@@ -14,13 +21,14 @@ __all__ = [
     "parameter_index",
     "state_index",
     "monitor_index",
+    "monitored_index",
     "missing_index",
 ]
 
 logger = get_logger()
 
 
-def init_state_values(name, state_names, state_values, code):
+def init_state_values(name, state_names, state_values, code, dtype="numpy.float64"):
     logger.debug(f"Generating init_state_values with {len(state_values)} values")
     if len(state_values) == 0:
         values_comment = ""
@@ -38,7 +46,7 @@ def init_state_values(**values):
     """
 {values_comment}
 
-    {name} = numpy.array([{values}], dtype=numpy.float64)
+    {name} = numpy.array([{values}], dtype={dtype})
 
     for key, value in values.items():
         {name}[state_index(key)] = value
@@ -48,7 +56,7 @@ def init_state_values(**values):
     )
 
 
-def init_parameter_values(name, parameter_names, parameter_values, code):
+def init_parameter_values(name, parameter_names, parameter_values, code, dtype="numpy.float64"):
     logger.debug(f"Generating init_parameter_values with {len(parameter_values)} values")
     if len(parameter_values) == 0:
         values_comment = ""
@@ -69,7 +77,7 @@ def init_parameter_values(**values):
     """
 {values_comment}
 
-    {name} = numpy.array([{values}], dtype=numpy.float64)
+    {name} = numpy.array([{values}], dtype={dtype})
 
     for key, value in values.items():
         {name}[parameter_index(key)] = value
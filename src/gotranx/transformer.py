@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import re
 from collections import defaultdict
+from functools import lru_cache
 from typing import NamedTuple
-from typing import TypeVar, Any
+from typing import TypeVar, Any, Iterable
 
 import lark
 
@@ -35,6 +37,48 @@ def remove_quotes(s: str) -> str:
     return s.replace("'", "").replace('"', "")
 
 
+_UNIT_NAME = r"[^\W\d]\w*"
+_UNIT_NUMBER = r"[-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?"
+_UNIT_FACTOR = rf"\(*\s*(?:{_UNIT_NAME}|{_UNIT_NUMBER})\s*\)*"
+_UNIT_OPERATOR = r"\s*(?:\*\*|\^|\*|/)\s*"
+# Names and numbers combined with *, /, ** or ^, e.g "mM**-1*ms**-1" or "mS/uF"
+_UNIT = re.compile(rf"{_UNIT_FACTOR}(?:{_UNIT_OPERATOR}{_UNIT_FACTOR})*")
+# Names and numbers that may also be multiplied by juxtaposition, e.g "m s"
+_UNIT_PRODUCT = re.compile(rf"{_UNIT_FACTOR}(?:(?:{_UNIT_OPERATOR}|\s+){_UNIT_FACTOR})*")
+
+
+@lru_cache(maxsize=None)
+def is_unit(text: str) -> bool:
+    """Check if a comment is a unit. The result is cached, since
+    the same units typically appear on many lines in a model.
+
+    This only checks the syntax of the text and that the names
+    are known units, so that the unit registry is not created while
+    parsing, except for texts with juxtaposed factors such as "m s",
+    which are checked by the registry. The unit itself is created from
+    the text when it is first used, see `gotranx.atoms.Atom.unit`.
+
+    Parameters
+    ----------
+    text : str
+        The text of the comment
+
+    Returns
+    -------
+    bool
+        True if the text is a proper unit
+    """
+    text = text.strip()
+    if _UNIT_PRODUCT.fullmatch(text) is None:
+        return False
+    if not all(units.is_unit_name(name) for name in re.findall(_UNIT_NAME, text)):
+        return False
+    if _UNIT.fullmatch(text) is None:
+        # Juxtaposed factors are ambiguous, so let the unit registry decide
+        return units.parses_as_unit(text)
+    return True
+
+
 def get_unit_and_comment_from_assignment(
     s: lark.Tree,
 ) -> tuple[str | None, atoms.Comment | None]:
@@ -56,19 +100,9 @@ def get_unit_and_comment_from_assignment(
         potential_unit = s.children[2]
         # If it's a comment, it's not a unit
         if isinstance(potential_unit, atoms.Comment):
-            try:
-                # Try to parse the unit
-                unit = units.ureg(potential_unit.text)
-            except (units.pint.UndefinedUnitError, AttributeError):
-                # Not a proper unit so it's a comment
-                return None, atoms.Comment(potential_unit.text)
-            else:
-                if isinstance(unit, units.pint.Quantity):
-                    # It's a proper unit
-                    return potential_unit.text, None
-
-                # It is something else, so it's a comment
-                return None, atoms.Comment(potential_unit.text)
+            if is_unit(potential_unit.text):
+                return potential_unit.text, None
+            return None, atoms.Comment(potential_unit.text)
 
         else:
             return None, None
@@ -223,6 +257,68 @@ def tree2parameter(
         raise exceptions.UnknownTreeTypeError(datatype=s.data, atom="Parameter")
 
 
+def build_lark_ode(s: Iterable[Any]) -> LarkODE:
+    """Group the transformed blocks of an ODE into components
+
+    Parameters
+    ----------
+    s : Iterable[Any]
+        List of objects that could by states, parameters, assignments, or comments
+
+    Returns
+    -------
+    LarkODE
+        A tuple of components and comments
+    """
+    # FIXME: Could use Enum here
+    mapping = {
+        atoms.Parameter: "parameters",
+        atoms.Assignment: "assignments",
+        atoms.State: "states",
+    }
+
+    components: dict[str, dict[str, set[atoms.Atom]]] = defaultdict(
+        lambda: {atom: set() for atom in mapping.values()},
+    )
+
+    comments = []
+    for line in s:  # Each line in the block is now a tuple
+        if isinstance(line, atoms.Comment):
+            comments.append(line)
+            continue
+        if isinstance(line, str):
+            assert line.strip() == "", f"Invalid line {line!r}"
+            # Skip empty lines
+            continue
+
+        for atom in line:  # State, Parameters, Assignment, or standalone Comment
+            if isinstance(atom, atoms.Comment):
+                comments.append(atom)
+                continue
+
+            for component in atom.components:
+                components[component][mapping[type(atom)]].add(atom)
+
+    # Make sets frozen
+    frozen_components: dict[str, dict[str, frozenset[atoms.Atom]]] = {}
+    for component_name, component_values in components.items():
+        frozen_components[component_name] = {}
+        for atom_name, atom_values in component_values.items():
+            frozen_components[component_name][atom_name] = frozenset(atom_values)
+
+    # FIXME: Need to somehow tell the type checker that each of the inner dictionaries
+    # are actually of the correct type.
+    return LarkODE(
+        components=tuple(
+            [
+                ode_component.Component(name=key, **value)  # type: ignore
+                for key, value in frozen_components.items()
+            ],
+        ),
+        comments=tuple(comments),
+    )
+
+
 class TreeToODE(lark.Transformer):
     """Transform a lark tree to an ODE
 
@@ -297,50 +393,14 @@ class TreeToODE(lark.Transformer):
         LarkODE
             A tuple of components and comments
         """
-        # FIXME: Could use Enum here
-        mapping = {
-            atoms.Parameter: "parameters",
-            atoms.Assignment: "assignments",
-            atoms.State: "states",
-        }
-
-        components: dict[str, dict[str, set[atoms.Atom]]] = defaultdict(
-            lambda: {atom: set() for atom in mapping.values()},
-        )
+        return build_lark_ode(s)
 
-        comments = []
-        for line in s:  # Each line in the block is now a tuple
-            if isinstance(line, atoms.Comment):
-                comments.append(line)
-                continue
-            if isinstance(line, str):
-                assert line.strip() == "", f"Invalid line {line!r}"
-                # Skip empty lines
-                continue
 
-            for atom in line:  # State, Parameters, Assignment, or standalone Comment
-                if isinstance(atom, atoms.Comment):
-                    comments.append(atom)
-                    continue
-
-                for component in atom.components:
-                    components[component][mapping[type(atom)]].add(atom)
-
-        # Make sets frozen
-        frozen_components: dict[str, dict[str, frozenset[atoms.Atom]]] = {}
-        for component_name, component_values in components.items():
-            frozen_components[component_name] = {}
-            for atom_name, atom_values in component_values.items():
-                frozen_components[component_name][atom_name] = frozenset(atom_values)
-
-        # FIXME: Need to somehow tell the type checker that each of the inner dictionaries
-        # are actually of the correct type.
-        return LarkODE(
-            components=tuple(
-                [
-                    ode_component.Component(name=key, **value)  # type: ignore
-                    for key, value in frozen_components.items()
-                ],
-            ),
-            comments=tuple(comments),
-        )
+class TreeToBlocks(TreeToODE):
+    """Transform a lark tree to the list of transformed blocks
+    (i.e states, parameters, expressions and comments) without
+    grouping the atoms into components.
+    """
+
+    def ode(self, s) -> tuple[Any, ...]:
+        return tuple(s)
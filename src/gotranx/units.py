@@ -1,3 +1,142 @@
-import pint
+from __future__ import annotations
 
-ureg = pint.UnitRegistry()
+import importlib.util
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import pint
+
+
+@lru_cache(maxsize=None)
+def get_unit_registry() -> pint.UnitRegistry:
+    """Get the unit registry used by gotranx
+
+    Creating a unit registry is slow, so it is only
+    created the first time it is needed.
+
+    Returns
+    -------
+    pint.UnitRegistry
+        The unit registry
+    """
+    import pint
+
+    return pint.UnitRegistry()
+
+
+_NAME = re.compile(r"[^\W\d]\w*")
+# Blocks whose bodies are not unit definitions, e.g "group = international"
+# in the @defaults block. The bodies of @group blocks are definitions.
+_SKIPPED_BLOCKS = ("@defaults", "@system", "@context")
+
+
+def _read_definitions(path: Path, units: set[str], prefixes: set[str]) -> None:
+    skip = False
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if skip:
+            skip = line != "@end"
+            continue
+        if line.startswith(_SKIPPED_BLOCKS):
+            skip = True
+            continue
+        if line.startswith("@import"):
+            _read_definitions(path.parent / line.split()[1], units, prefixes)
+            continue
+        if line.startswith("@alias"):
+            # Aliases are on the form "@alias name = alias = ..."
+            names = [part.strip() for part in line[len("@alias") :].split("=")]
+            if names[0] in units:
+                units.update(n for n in names[1:] if _NAME.fullmatch(n))
+            continue
+        if line.startswith("@") or "=" not in line:
+            continue
+        # Definitions are on the form "name = value = symbol = alias = ..."
+        name, _, *aliases = (part.strip() for part in line.split("="))
+        names = [name] + [alias for alias in aliases if alias != "_"]
+        if name.endswith("-"):
+            prefixes.update(n.rstrip("-") for n in names)
+        elif not name.startswith("["):
+            units.update(n for n in names if _NAME.fullmatch(n))
+
+
+@lru_cache(maxsize=None)
+def _unit_names() -> tuple[frozenset[str], frozenset[str]] | None:
+    # Read the names of the units and prefixes from the definition files of
+    # pint directly, which is much faster than creating the unit registry
+    spec = importlib.util.find_spec("pint")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    path = Path(list(spec.submodule_search_locations)[0]) / "default_en.txt"
+    units = {"dimensionless"}
+    prefixes = {""}
+    try:
+        _read_definitions(path, units, prefixes)
+    except OSError:
+        return None
+    return frozenset(units), frozenset(prefixes)
+
+
+@lru_cache(maxsize=None)
+def parses_as_unit(text: str) -> bool:
+    """Check if a text is a unit according to the unit registry.
+    Note that this creates the registry.
+
+    Parameters
+    ----------
+    text : str
+        The text
+
+    Returns
+    -------
+    bool
+        True if the text is a unit
+    """
+    try:
+        get_unit_registry().Unit(text)
+    except Exception:
+        return False
+    return True
+
+
+def is_unit_name(name: str) -> bool:
+    """Check if a name is the name of a unit in the unit registry,
+    possibly with a prefix (e.g "mV") or in plural (e.g "volts"),
+    without creating the registry
+
+    Parameters
+    ----------
+    name : str
+        The name
+
+    Returns
+    -------
+    bool
+        True if the name is a unit
+    """
+    names = _unit_names()
+    if names is None:
+        return parses_as_unit(name)
+
+    units, prefixes = names
+    for prefix in prefixes:
+        if name.startswith(prefix):
+            rest = name[len(prefix) :]
+            if rest in units or (rest.endswith("s") and rest[:-1] in units):
+                return True
+    return False
+
+
+def __getattr__(name: str) -> Any:
+    # Keep `units.ureg` and `units.pint` working without
+    # importing pint when gotranx is imported
+    if name == "ureg":
+        return get_unit_registry()
+    if name == "pint":
+        import pint
+
+        return pint
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,6 +4,15 @@ from gotranx import TreeToODE
 from gotranx.ode import make_ode
 
 
+@pytest.fixture(scope="session", autouse=True)
+def cache_dir(tmp_path_factory):
+    # Make sure the tests never write to the user's cache directory
+    with pytest.MonkeyPatch.context() as mp:
+        path = tmp_path_factory.mktemp("cache")
+        mp.setenv("GOTRANX_CACHE_DIR", str(path))
+        yield path
+
+
 @pytest.fixture(scope="module")
 def parser() -> Parser:
     return Parser(parser="lalr", debug=True, propagate_positions=True)
@@ -280,3 +280,18 @@ def test_singularities(parser, trans):
         symbol=all_atoms.symbols["x"], value=0, replacement=sp.oo * sp.sign(all_atoms.symbols["b"])
     )
     assert tuple(g_sing)[0].is_infinite
+
+
+def test_unit_is_parsed_lazily():
+    from gotranx.units import ureg
+
+    p = atoms.Parameter(name="p", value=1.0, unit_str="mV")
+    assert p._unit is atoms._Unit.unparsed
+    assert p.unit == ureg.Unit("mV")
+    assert p._unit == ureg.Unit("mV")
+
+    # The parsed units are cached
+    s = atoms.State(name="s", value=1.0, unit_str="mV").to_TimeDependentState(sp.Symbol("t"))
+    assert s.unit is atoms.unit_from_string("mV")
+    assert atoms.Parameter(name="p", value=1.0) != p
+    assert atoms.Parameter(name="p", value=1.0).unit is None
@@ -1,3 +1,5 @@
+import subprocess
+import sys
 from pathlib import Path
 import gotranx
 import pytest
@@ -57,3 +59,42 @@ def test_c_explicit_euler(ode):
 @pytest.mark.benchmark
 def test_c_generalized_rush_larsen(ode):
     gotranx.cli.gotran2c.get_code(ode, scheme=[gotranx.schemes.Scheme.generalized_rush_larsen])
+
+
+def _imported_modules(statement: str) -> set[str]:
+    # Import in a fresh interpreter, since the modules are already imported here
+    code = f"import sys; {statement}; print(' '.join(sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return set(out.stdout.split())
+
+
+@pytest.mark.benchmark
+def test_import_gotranx():
+    modules = _imported_modules("import gotranx")
+    assert modules.isdisjoint({"sympy", "lark", "pint", "myokit", "gotranx.codegen"})
+
+
+@pytest.mark.benchmark
+def test_import_cli():
+    modules = _imported_modules("import gotranx.cli")
+    assert modules.isdisjoint(
+        {
+            "pint",
+            "myokit",
+            "gotranx.codegen.jax",
+            "gotranx.codegen.julia",
+            "gotranx.codegen.mtk",
+            "gotranx.codegen.ufl",
+            "gotranx.codegen.markdown",
+        }
+    )
+
+
+@pytest.mark.benchmark
+def test_load_ode_with_units_does_not_import_pint():
+    ode_file_with_units = here / "odefiles" / "tentusscher_panfilov_2006_M_cell.ode"
+    modules = _imported_modules(
+        f"import gotranx; gotranx.load_ode({str(ode_file_with_units)!r}, cache=False)"
+    )
+    assert "gotranx.ode" in modules
+    assert "pint" not in modules
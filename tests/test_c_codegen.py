@@ -1,12 +1,17 @@
 # flake8: noqa: E501
+import shutil
+import subprocess
 import sys
+from pathlib import Path
 from unittest import mock
 
 import pytest
-from gotranx.schemes import get_scheme
+from gotranx.schemes import Scheme, get_scheme
 from gotranx.codegen import CCodeGenerator
+from gotranx.codegen.c import Format
 from gotranx.codegen import RHSArgument
 from gotranx.ode import make_ode
+from gotranx import exceptions
 
 
 @pytest.fixture(scope="module")
@@ -582,3 +587,104 @@ def test_c_codegen_monitor(codegen: CCodeGenerator):
         "\n}"
         "\n"
     )
+
+
+def test_c_strength_reduction(parser, trans):
+    expr = """
+    states(v=1.0, w=0.5)
+    parameters(g=2.0)
+    dv_dt = (exp(v) - 1)/v - v**3
+    dw_dt = -g*w
+    """
+    ode = make_ode(*trans.transform(parser.parse(expr)), name="strength_reduction")
+    codegen = CCodeGenerator(ode, format=Format.none, strength_reduction=True)
+    code = codegen.rhs()
+    assert "v*v*v" in code
+    assert "expm1(v)" in code
+    assert "pow(" not in code
+
+    code = codegen.scheme(get_scheme("generalized_rush_larsen"))
+    assert "dw_dt*expm1(dt*dw_dt_linearized)/dw_dt_linearized" in code
+
+
+def test_c_single_precision(parser, trans):
+    expr = """
+    states(v=1.0, w=0.5)
+    parameters(g=2.0)
+    dv_dt = exp(-g*v) + 0.5*w
+    dw_dt = -g*w
+    """
+    ode = make_ode(*trans.transform(parser.parse(expr)), name="single")
+    codegen = CCodeGenerator(ode, format=Format.none, precision="single")
+    assert "void init_state_values(float* states)" in codegen.initial_state_values()
+    assert "void init_parameter_values(float* parameters)" in codegen.initial_parameter_values()
+    code = codegen.rhs()
+    assert "const float v = states[0];" in code
+    assert "expf(" in code
+    assert "0.5F" in code
+    assert "double" not in code
+
+    codegen = CCodeGenerator(ode, format=Format.none, precision="single", double_states=["v"])
+    assert "void init_state_values(double* states)" in codegen.initial_state_values()
+    assert "void init_parameter_values(float* parameters)" in codegen.initial_parameter_values()
+    code = codegen.rhs()
+    assert "const double v = states[0];" in code
+    assert "const float w = (float)states[1];" in code
+    assert "const float g = parameters[0];" in code
+    # The derivatives are computed in single precision
+    assert "const float dv_dt = 0.5F*w + expf(-g*(float)v);" in code
+    assert "values[0] = (double)dv_dt;" in code
+    # and the state is updated in double precision
+    code = codegen.scheme(get_scheme("explicit_euler"))
+    assert "values[0] = v + (double)(dt*dv_dt);" in code
+    assert "values[1] = (double)(dt*dw_dt + w);" in code
+
+    with pytest.raises(exceptions.StateNotFoundInODE):
+        CCodeGenerator(ode, precision="single", double_states=["u"])
+
+
+@pytest.mark.skipif(shutil.which("gcc") is None, reason="gcc is not available")
+def test_c_mixed_precision_compiles_without_conversion_warnings(tmp_path):
+    from gotranx.cli import gotran2c
+    from gotranx.load import load_ode
+
+    ode = load_ode(Path(__file__).parent / "odefiles" / "ORdmm_Land.ode", cache=False)
+    code = gotran2c.get_code(
+        ode,
+        scheme=[Scheme.explicit_euler, Scheme.generalized_rush_larsen],
+        format=Format.none,
+        precompute=True,
+        precision="single",
+        double_states=["cai", "nai"],
+    )
+    (tmp_path / "model.h").write_text(code)
+    (tmp_path / "main.c").write_text('#include "model.h"\nint main(void) { return 0; }\n')
+    result = subprocess.run(
+        [
+            "gcc",
+            "-c",
+            "-Wall",
+            "-Wdouble-promotion",
+            "-Wfloat-conversion",
+            "-Wno-unused-variable",
+            "-Werror",
+            "main.c",
+        ],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_c_precompute_nothing_to_hoist(parser, trans):
+    expr = """
+    parameters(a=1.0)
+    states(x=1.0)
+    dx_dt = -a * x
+    """
+    ode = make_ode(*trans.transform(parser.parse(expr)))
+    codegen = CCodeGenerator(ode, format=Format.none, precompute=True)
+    assert codegen.precomputed_index == {}
+    assert "const double *__restrict precomputed" in codegen.rhs()
+    assert "const double *__restrict precomputed" in codegen.scheme(get_scheme("explicit_euler"))
@@ -1,4 +1,8 @@
+import json
+import subprocess
+import sys
 from textwrap import dedent
+from unittest import mock
 import gotranx
 import pytest
 from pathlib import Path
@@ -230,6 +234,115 @@ def test_gotran2c(format, suffix, odefile, all_schemes):
     outfile.with_suffix(suffix).unlink()
 
 
+def test_ode2c_free_parameters_and_cse(odefile):
+    outfile = odefile.with_suffix(".c")
+    result = runner.invoke(
+        gotranx.cli.app,
+        [
+            "ode2c",
+            str(odefile),
+            "--to",
+            ".c",
+            "-o",
+            str(outfile),
+            "--free-parameters",
+            "rho",
+            "--cse",
+        ],
+    )
+    assert result.exit_code == 0
+    code = outfile.read_text()
+    assert "const double rho = parameters[2];" in code
+    assert "const double sigma = " not in code
+    assert "const double beta = " not in code
+    assert "const double dx_dt = -12.0 * x + 12.0 * y;" in code
+    outfile.unlink()
+
+
+def test_ode2py_jobs(odefile, all_schemes):
+    outfile = odefile.with_suffix(".py")
+    code = {}
+    for jobs in ["1", "2"]:
+        result = runner.invoke(
+            gotranx.cli.app,
+            ["ode2py", str(odefile), "-o", str(outfile), "--jobs", jobs, "--monitored", "dx_dt"]
+            + all_schemes,
+        )
+        assert result.exit_code == 0
+        code[jobs] = outfile.read_text()
+    # The functions are assembled in the same order
+    assert code["1"] == code["2"]
+    assert "def generalized_rush_larsen_and_monitor(" in code["2"]
+    outfile.unlink()
+
+
+def test_get_code_cache(odefile, tmp_path):
+    from gotranx.cache import DiskCache
+    from gotranx.cli import gotran2c
+
+    cache = DiskCache(tmp_path)
+    ode = gotranx.load_ode(odefile)
+    code = gotran2c.get_code(ode, cache=cache)
+    # The generated code and the formatted code
+    assert len(list(tmp_path.iterdir())) == 2
+
+    with mock.patch.object(gotran2c, "CCodeGenerator", side_effect=AssertionError):
+        assert gotran2c.get_code(gotranx.load_ode(odefile), cache=cache) == code
+
+    # Different options gives a new entry
+    gotran2c.get_code(ode, remove_unused=True, cache=cache)
+    assert len(list(tmp_path.iterdir())) == 4
+
+
+def test_get_code_cache_hit_does_not_build_expressions(odefile, tmp_path):
+    from gotranx import profiling
+    from gotranx.cache import DiskCache
+    from gotranx.cli import gotran2py
+
+    cache = DiskCache(tmp_path)
+    code = gotran2py.get_code(gotranx.load_ode(odefile, cache=False), cache=cache)
+
+    ode = gotranx.load_ode(odefile, cache=False)
+    with profiling.profile() as p:
+        assert gotran2py.get_code(ode, cache=cache) == code
+    assert "build expressions" not in p.stages
+    assert not any(x._expr.is_resolved for x in ode.intermediates + ode.state_derivatives)
+
+
+def test_ode2c_cache(odefile, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("GOTRANX_CACHE_DIR", str(cache_dir))
+    outfile = odefile.with_suffix(".h")
+    args = ["ode2c", str(odefile), "-o", str(outfile)]
+    result = runner.invoke(gotranx.cli.app, args + ["--no-cache"])
+    assert result.exit_code == 0
+    assert not (cache_dir / "code").exists()
+
+    result = runner.invoke(gotranx.cli.app, args)
+    assert result.exit_code == 0
+    code = outfile.read_text()
+    assert len(list((cache_dir / "code").iterdir())) == 1
+    assert not (cache_dir / "odes").exists()
+
+    outfile.unlink()
+    result = runner.invoke(gotranx.cli.app, args)
+    assert result.exit_code == 0
+    assert outfile.read_text() == code
+    outfile.unlink()
+
+
+def test_ode2c_cache_ode(odefile, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("GOTRANX_CACHE_DIR", str(cache_dir))
+    outfile = odefile.with_suffix(".h")
+    result = runner.invoke(
+        gotranx.cli.app, ["ode2c", str(odefile), "-o", str(outfile), "--cache-ode"]
+    )
+    assert result.exit_code == 0
+    assert len(list((cache_dir / "odes").iterdir())) == 1
+    outfile.unlink()
+
+
 def test_ode2py_config_file(odefile, config_file):
     outfile = odefile.with_suffix(".py")
     result = runner.invoke(
@@ -383,3 +496,97 @@ def test_ode2ufl_config_file(odefile, config_file):
     assert "hybrid_rush_larsen" in code
     assert "import ufl" in code
     outfile.unlink()
+
+
+def test_ode2c_profile(odefile, tmp_path):
+    outfile = tmp_path / "ode.h"
+    profile_file = tmp_path / "profile.json"
+    result = runner.invoke(
+        gotranx.cli.app,
+        ["ode2c", str(odefile), "-o", str(outfile), "--no-cache"]
+        + ["--profile-output", str(profile_file)],
+    )
+    assert result.exit_code == 0
+    stages = {s["name"]: s for s in json.loads(profile_file.read_text())["stages"]}
+    assert stages["load_ode"]["calls"] == 1
+    assert stages["get_code"]["calls"] == 1
+
+    result = runner.invoke(
+        gotranx.cli.app, ["ode2c", str(odefile), "-o", str(outfile), "--profile"]
+    )
+    assert result.exit_code == 0
+    assert "get_code" in result.stdout
+
+
+def test_format_code_cache(tmp_path):
+    from gotranx.cache import DiskCache
+    from gotranx.cli.utils import format_code
+
+    formatter = mock.Mock(side_effect=str.upper)
+    cache = DiskCache(tmp_path)
+    assert format_code("x = 1", "black", formatter, cache) == "X = 1"
+    assert format_code("x = 1", "black", formatter, cache) == "X = 1"
+    assert formatter.call_count == 1
+    # The name of the formatter is part of the key
+    assert format_code("x = 1", "ruff", formatter, cache) == "X = 1"
+    assert formatter.call_count == 2
+    assert format_code("x = 1", "none", formatter, cache) == "x = 1"
+    assert formatter.call_count == 2
+
+
+def test_ode2py_formats_once(odefile):
+    from gotranx.cli import gotran2py
+    from gotranx.profiling import profile
+
+    ode = gotranx.load_ode(odefile)
+    with profile() as p:
+        gotran2py.get_code(ode, scheme=[gotranx.schemes.Scheme.forward_generalized_rush_larsen])
+    assert p.stages["format"].calls == 1
+
+
+def test_backend_modules_are_attributes_of_cli():
+    # Run in a fresh interpreter, where the backends are not imported yet
+    code = (
+        "import gotranx.cli; "
+        "[getattr(gotranx.cli, m).main for m in "
+        "('gotran2julia', 'gotran2md', 'gotran2mtk', 'gotran2ufl')]; "
+        "gotranx.cli.gotran2julia.get_code"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_get_code_positional_arguments(odefile):
+    from gotranx.cli import gotran2py
+    from gotranx.codegen.base import Shape
+    from gotranx.codegen.python import Format
+
+    ode = gotranx.load_ode(odefile)
+    # The arguments that get_code has always had can still be passed by position
+    code = gotran2py.get_code(
+        ode, None, Format.none, False, None, 1e-8, None, gotran2py.Backend.numpy, Shape.single
+    )
+    assert code == gotran2py.get_code(ode, format=Format.none, shape=Shape.single)
+
+    # while the newer options are keyword only
+    with pytest.raises(TypeError):
+        gotran2py.get_code(
+            ode,
+            None,
+            Format.none,
+            False,
+            None,
+            1e-8,
+            None,
+            gotran2py.Backend.numpy,
+            Shape.single,
+            True,
+        )
+
+
+@pytest.mark.parametrize("module", ["gotran2py", "gotran2c", "gotran2ufl"])
+def test_get_code_with_format_as_string(module, odefile):
+    backend = getattr(gotranx.cli, module)
+
+    ode = gotranx.load_ode(odefile)
+    code = backend.get_code(ode, format="none")
+    assert code == backend.get_code(ode, format=backend.Format.none)
@@ -94,8 +94,10 @@ def test_state_parameters_with_expression_values(parser, trans):
     tree = parser.parse(expr)
     result = trans.transform(tree).components[0]
 
+    # Products are flattened into a single Mul
     assert result.find_state("u").value.args == (
-        sp.Mul(2, 4, evaluate=False),
+        2,
+        4,
         sp.Pow(3, sp.Integer(-1), evaluate=False),
     )
     assert result.find_parameter("a").value == sp.Mul(
@@ -103,6 +105,39 @@ def test_state_parameters_with_expression_values(parser, trans):
     )
 
 
+def test_build_expression_flattens_sums_and_products(parser, trans):
+    expr = "x = a + b - c + (d + e) + a * b / (c * d) * e"
+    tree = parser.parse(expr)
+    assignment = trans.transform(tree).components[0].find_assignment("x")
+    a, b, c, d, e = sp.symbols("a b c d e")
+    result = build_expression(
+        assignment.value.tree, symbols={"a": a, "b": b, "c": c, "d": d, "e": e}
+    )
+
+    assert isinstance(result, sp.Add)
+    assert len(result.args) == 6
+    assert result.args[-1].args == (
+        a,
+        b,
+        sp.Pow(sp.Mul(c, d, evaluate=False), sp.Integer(-1), evaluate=False),
+        e,
+    )
+    assert sp.simplify(result - (a + b - c + d + e + a * b * e / (c * d))) == 0
+
+
+def test_build_expression_with_deep_expression():
+    # Deeper than the recursion limit
+    n = 2000
+    expr = "x = " + "(" * n + "a" + " + 1)" * n
+    # Use the parser with the transformer applied while parsing,
+    # since transforming the tree afterwards is recursive
+    tree = gotranx.parser.get_parser().parse(expr)
+    assignment = tree.components[0].find_assignment("x")
+    a = sp.Symbol("a")
+    result = build_expression(assignment.value.tree, symbols={"a": a})
+    assert result == sp.Add(a, *([sp.Integer(1)] * n), evaluate=False)
+
+
 def test_expression_missing_symbol(parser, trans):
     expr = "x = a + 1"
     tree = parser.parse(expr)
@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import pytest
+from gotranx import atoms
 from gotranx.load import load_ode, ode_from_string
 from gotranx.exceptions import ODEFileNotFound, ComponentNotCompleteError
 
@@ -61,3 +62,215 @@ def test_load_invalid_ode():
 def test_load_incomplete_ode():
     with pytest.raises(ComponentNotCompleteError):
         ode_from_string("states(x=1, y=2)\ndx_dt = x + y")
+
+
+def test_get_parser_is_shared_and_cached_on_disk(cache_dir):
+    from gotranx.parser import get_parser, parser_cache_file
+
+    assert get_parser() is get_parser()
+    cache_file = Path(parser_cache_file())
+    assert cache_file.parent == cache_dir
+    assert cache_file.is_file()
+
+
+def test_load_ode_with_cache(path, tmp_path):
+    from gotranx.cache import DiskCache
+
+    path.write_text(
+        'states(x=1, y=2)\nparameters(a=ScalarParam(3, unit="mV"))\ndx_dt = a * y\ndy_dt = -x'
+    )
+    cache = DiskCache(tmp_path / "odes")
+    ode = load_ode(path, cache=cache)
+    assert len(list(cache.directory.iterdir())) == 1
+
+    cached_ode = load_ode(path, cache=cache)
+    assert cached_ode is not ode
+    assert cached_ode == ode
+    assert cached_ode.name == ode.name
+    assert cached_ode["a"].unit == ode["a"].unit
+
+    # Changing the file should give a new entry
+    path.write_text("states(x=1, y=2)\nparameters(a=4)\ndx_dt = a * y\ndy_dt = -x")
+    new_ode = load_ode(path, cache=cache)
+    assert new_ode.parameters[0].value == 4
+    assert len(list(cache.directory.iterdir())) == 2
+
+
+def test_load_ode_cache_depends_on_source(path, tmp_path, monkeypatch):
+    from gotranx import load
+    from gotranx.cache import DiskCache
+
+    path.write_text("states(x=1)\ndx_dt = -x")
+    cache = DiskCache(tmp_path / "odes")
+    load_ode(path, cache=cache)
+    load_ode(path, cache=cache)
+    assert len(list(cache.directory.iterdir())) == 1
+
+    # E.g the source code of an editable install is modified
+    monkeypatch.setattr(load, "source_fingerprint", lambda: "modified")
+    load_ode(path, cache=cache)
+    assert len(list(cache.directory.iterdir())) == 2
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    import os
+    from gotranx.cache import DiskCache
+
+    cache = DiskCache(tmp_path, max_size=10_000)
+    cache.set("first", b"0" * 4000)
+    cache.set("second", b"1" * 4000)
+    # Make sure "first" is the most recently used entry
+    os.utime(cache._path("second"), (0, 0))
+    assert cache.get("first") == b"0" * 4000
+
+    cache.set("third", b"2" * 4000)
+    assert "first" in cache
+    assert "second" not in cache
+    assert "third" in cache
+    assert cache.size <= cache.max_size
+
+
+def test_disk_cache_get_entry_evicted_while_reading(tmp_path, monkeypatch):
+    from gotranx import cache
+
+    disk_cache = cache.DiskCache(tmp_path)
+    disk_cache.set("key", [1, 2, 3])
+
+    def utime(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(cache.os, "utime", utime)
+    assert disk_cache.get("key") == [1, 2, 3]
+
+
+def test_disk_cache_concurrent_writes_of_same_key(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from gotranx.cache import DiskCache
+
+    cache = DiskCache(tmp_path)
+    value = list(range(100_000))
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: cache.set("key", value), range(32)))
+
+    assert cache.get("key") == value
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_disk_cache_max_size_from_environment(tmp_path, monkeypatch):
+    from gotranx.cache import DiskCache, DEFAULT_MAX_SIZE
+
+    assert DiskCache(tmp_path).max_size == DEFAULT_MAX_SIZE
+    monkeypatch.setenv("GOTRANX_CACHE_MAX_SIZE", "1.5")
+    assert DiskCache(tmp_path).max_size == int(1.5 * 1024**2)
+    assert DiskCache(tmp_path, max_size=100).max_size == 100
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_odes(workers, tmp_path):
+    from gotranx.load import load_odes
+
+    paths = []
+    for i in range(3):
+        p = tmp_path / f"ode{i}.ode"
+        p.write_text(f'states(x={i})\nparameters(a=ScalarParam({i}, unit="mV"))\ndx_dt = a * x')
+        paths.append(p)
+
+    odes = load_odes(paths, workers=workers)
+    assert [ode.name for ode in odes] == ["ode0", "ode1", "ode2"]
+    assert odes == [load_ode(p) for p in paths]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_odes_reports_errors_per_file(workers, tmp_path):
+    from gotranx.load import load_odes
+    from gotranx.exceptions import BatchLoadError
+
+    good = tmp_path / "good.ode"
+    good.write_text("states(x=1)\ndx_dt = -x")
+    incomplete = tmp_path / "incomplete.ode"
+    incomplete.write_text("states(x=1, y=2)\ndx_dt = -x")
+    missing = tmp_path / "missing.ode"
+
+    with pytest.raises(BatchLoadError) as e:
+        load_odes([incomplete, good, missing], workers=workers)
+
+    assert set(e.value.errors) == {incomplete, missing}
+    assert isinstance(e.value.errors[incomplete], ComponentNotCompleteError)
+    assert isinstance(e.value.errors[missing], ODEFileNotFound)
+    assert e.value.odes[0] is None
+    assert e.value.odes[1] == load_ode(good)
+    assert e.value.odes[2] is None
+
+
+def test_expressions_are_resolved_lazily():
+    text = """
+    states("First component", x = 1, y = 1)
+    parameters("First component", a=1, b=2)
+
+    expressions("First component")
+    d = a + b * 2
+    dx_dt = a + d
+    dy_dt = -x
+    """
+    ode = ode_from_string(text, name="ode")
+    assert {x.name for x in ode.sorted_assignments()} == {"d", "dx_dt", "dy_dt"}
+    assert not ode["d"]._expr.is_resolved
+
+    assert str(ode["d"].expr) == "a + b*2"
+    assert ode["d"]._expr.is_resolved
+    # The expression is only built once
+    assert ode["d"].expr is ode["d"].expr
+    assert not ode["dx_dt"]._expr.is_resolved
+
+
+def test_identical_subexpressions_are_shared():
+    text = """
+    states("Membrane", v = -80)
+    parameters("Membrane", F=96485, R=8314, T=310)
+
+    expressions("Membrane")
+    a = exp(v * F / (R * T))
+    b = 2 * exp(v * F / (R * T))
+    dv_dt = a + b
+    """
+    ode = ode_from_string(text, name="ode")
+    assert ode["F"].symbol is atoms.make_symbol("F")
+    # b = 2 * exp(...) where exp(...) is the same object as a
+    assert ode["b"].expr.args[1] is ode["a"].expr
+
+
+def test_incremental_loader():
+    from gotranx.load import IncrementalLoader
+
+    text = """
+    states("First component", x = 1, y = 1)
+    parameters("First component", a=1, b=2)
+    parameters("Second component", c=3)
+
+    expressions("First component")
+    d = a + b * 2 - 3 / c
+    dx_dt = a + d  # mV
+    dy_dt = -x * c
+    """
+    loader = IncrementalLoader(name="ode")
+    ode = loader.load(text)
+    assert loader.num_parsed_blocks == 4
+    assert ode == ode_from_string(text, name="ode")
+
+    new_text = text.replace("c=3", "c=4")
+    new_ode = loader.load(new_text)
+    assert loader.num_parsed_blocks == 1
+    assert new_ode == ode_from_string(new_text, name="ode")
+    # Assignments in the unchanged blocks are reused
+    assert new_ode["d"].expr is ode["d"].expr
+
+
+def test_incremental_loader_gives_same_errors_as_full_load():
+    from gotranx.load import IncrementalLoader
+    from gotranx.exceptions import MissingSymbolError
+
+    loader = IncrementalLoader()
+    loader.load("states(x=1)\nparameters(a=1)\ndx_dt = a * x")
+    with pytest.raises(MissingSymbolError) as e:
+        loader.load("states(x=1)\nparameters(b=1)\ndx_dt = a * x")
+    assert e.value.line_no == 3
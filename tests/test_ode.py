@@ -1,3 +1,9 @@
+import os
+import pickle
+import subprocess
+import sys
+from pathlib import Path
+
 import pytest
 from gotranx import exceptions
 from gotranx import ode
@@ -161,3 +167,169 @@ def test_ode_dependents(parser, trans):
     assert deps["y"] == {"a", "x"}
     assert "dV_dt" not in deps
     assert "a" not in deps
+
+
+def test_ode_index(parser, trans):
+    expr = """
+    states(V=0, W=1)
+    parameters(c=1, b=2)
+    dV_dt = x * z
+    dW_dt = V
+    x = y + z + V
+    z = a - 2 * c
+    a = y + 3
+    y = 2 * V
+    """
+    tree = parser.parse(expr)
+    result = ode.make_ode(*trans.transform(tree), name="TestODE")
+
+    index = result.index
+    # The index is only computed once
+    assert result.index is index
+    assert result.sorted_assignments() is result.sorted_assignments()
+
+    assert index.sorted_assignments == result.sorted_assignments()
+    assert index.sorted_states == result.sorted_states()
+    assert index.state_index == {s.name: i for i, s in enumerate(result.sorted_states())}
+    assert index.parameter_index == {"b": 0, "c": 1}
+    assert tuple(index.monitor_index) == tuple(x.name for x in result.sorted_assignments())
+    assert index.dependencies["x"] == {"y", "z", "V"}
+    assert index.dependents["y"] == {"a", "x"}
+    assert index.missing_variables == {}
+
+    # The index is shared, so it can not be modified
+    with pytest.raises(TypeError):
+        index.state_index["V"] = 3  # type: ignore
+    with pytest.raises(TypeError):
+        result.dependents()["y"] = frozenset()  # type: ignore
+
+    copy = pickle.loads(pickle.dumps(result))
+    assert copy.index.state_index == index.state_index
+    assert copy.index.dependencies == index.dependencies
+
+
+def test_dependency_classes(parser, trans):
+    expr = """
+    states(V=0)
+    parameters(c=1, b=2)
+    one = 1
+    two = one + 1
+    p = b * c + two
+    stim = Conditional(Lt(t, 1), p, 0)
+    x = V * p
+    dV_dt = x + stim + p
+    """
+    tree = parser.parse(expr)
+    result = ode.make_ode(*trans.transform(tree), name="TestODE")
+    assert result.dependency_classes == {
+        "one": ode.DependencyClass.constant,
+        "two": ode.DependencyClass.constant,
+        "p": ode.DependencyClass.parameter,
+        "stim": ode.DependencyClass.time,
+        "x": ode.DependencyClass.state,
+        "dV_dt": ode.DependencyClass.state,
+    }
+
+
+def test_sorted_assignments_does_not_depend_on_hash_seed():
+    # The order of sets of strings depends on the hash seed
+    code = (
+        "import gotranx; "
+        "ode = gotranx.load_ode('tests/odefiles/ToRORd_dyn_chloride.ode'); "
+        "print(' '.join(ode.index.sorted_names))"
+    )
+    orders = set()
+    for seed in ("1", "2", "3"):
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            cwd=Path(__file__).parent.parent,
+        )
+        orders.add(out.stdout.splitlines()[-1])
+    assert len(orders) == 1
+
+
+def test_fingerprint(parser, trans):
+    def load(expr):
+        return ode.make_ode(*trans.transform(parser.parse(expr)), name="TestODE")
+
+    expr_first = """
+        states("A", x=1, y=2)
+        parameters("A", a=1, b=2)
+        expressions("A")
+        dx_dt = a * x + y
+        dy_dt = b * x
+        """
+    first = load(expr_first)
+    # Same ODE with the atoms in a different order
+    second = load(
+        """
+        parameters("A", b=2, a=1)
+        states("A", y=2, x=1)
+        expressions("A")
+        dy_dt = b * x
+        dx_dt = a * x + y
+        """
+    )
+    assert first.fingerprint == second.fingerprint
+    assert first.components[0].fingerprint == second.components[0].fingerprint
+    assert first == second
+    assert hash(first) == hash(second)
+    assert len({first, second}) == 1
+
+    changed_value = load(
+        """
+        states("A", x=1, y=2)
+        parameters("A", a=1, b=3)
+        expressions("A")
+        dx_dt = a * x + y
+        dy_dt = b * x
+        """
+    )
+    changed_expression = load(
+        """
+        states("A", x=1, y=2)
+        parameters("A", a=1, b=2)
+        expressions("A")
+        dx_dt = a * x - y
+        dy_dt = b * x
+        """
+    )
+    fingerprints = {first.fingerprint, changed_value.fingerprint, changed_expression.fingerprint}
+    assert len(fingerprints) == 3
+
+    # The fingerprint does not build the expressions, and
+    # does not change when the expressions are built
+    third = load(expr_first)
+    fingerprint = third.fingerprint
+    assert not any(x._expr.is_resolved for x in third.state_derivatives)
+    for x in third.state_derivatives:
+        x.expr
+    assert load(expr_first).fingerprint == fingerprint == first.fingerprint
+    assert ode.ODE(third.components, name="TestODE").fingerprint == fingerprint
+    # but modified expressions give a new fingerprint
+    assert third.remove_singularities().fingerprint == fingerprint
+    assert third.simplify().fingerprint != fingerprint
+
+
+def test_fingerprint_does_not_depend_on_hash_seed():
+    code = (
+        "import gotranx; "
+        "ode = gotranx.load_ode('tests/odefiles/ToRORd_dyn_chloride.ode'); "
+        "print(ode.fingerprint)"
+    )
+    fingerprints = set()
+    for seed in ("1", "2"):
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            cwd=Path(__file__).parent.parent,
+        )
+        fingerprints.add(out.stdout.splitlines()[-1])
+    assert len(fingerprints) == 1
@@ -0,0 +1,67 @@
+import json
+
+import gotranx
+from gotranx.cli import gotran2c
+from gotranx.profiling import profile, stage
+
+
+def test_stage_is_noop_without_profile():
+    with stage("parse"):
+        pass
+
+    with profile() as p:
+        pass
+    with stage("parse"):
+        pass
+
+    assert "parse" not in p.stages
+
+
+def test_profile_stages(tmp_path):
+    odefile = tmp_path / "lorentz.ode"
+    odefile.write_text(
+        """
+        parameters(sigma=12.0, rho=21.0, beta=2.4)
+        states(x=1.0, y=2.0, z=3.05)
+        dy_dt = x*(rho - z) - y
+        dx_dt = sigma*(-x + y)
+        dz_dt = -beta*z + x*y
+        """
+    )
+    with profile() as p:
+        ode = gotranx.load_ode(odefile)
+        gotran2c.get_code(ode, scheme=[gotranx.schemes.Scheme.generalized_rush_larsen])
+
+    for name in ["total", "load_ode", "parse", "get_code", "print", "differentiate"]:
+        assert p.stages[name].calls > 0
+        assert p.stages[name].peak_memory is None
+    assert p.stages["get_code"].calls == 1
+    assert p.stages["get_code"].time <= p.stages["total"].time
+    assert "get_code" in p.summary()
+
+
+def test_profile_nested_stages_memory():
+    with profile(trace_memory=True) as p:
+        with stage("outer"):
+            with stage("inner"):
+                data = [0] * 100_000
+            del data
+            with stage("inner"):
+                pass
+
+    assert p.stages["inner"].calls == 2
+    assert p.stages["inner"].peak_memory >= 800_000
+    assert p.stages["outer"].peak_memory >= p.stages["inner"].peak_memory
+    assert "Peak memory" in p.summary()
+
+
+def test_profile_dump(tmp_path):
+    with profile() as p:
+        with stage("a"):
+            pass
+
+    path = tmp_path / "profile.json"
+    p.dump(path)
+    data = json.loads(path.read_text())
+    assert [s["name"] for s in data["stages"]] == ["a", "total"]
+    assert data["stages"][0]["calls"] == 1
@@ -1,11 +1,13 @@
 import sys
 from unittest import mock
 
+import numpy as np
 import pytest
 from gotranx.schemes import get_scheme
 from gotranx.codegen import PythonCodeGenerator, JaxCodeGenerator
 from gotranx.codegen import RHSArgument
 from gotranx.ode import make_ode
+from gotranx.exceptions import AssignmentNotFoundInODE, ParameterNotFoundInODE
 
 
 @pytest.fixture(scope="module")
@@ -442,6 +444,242 @@ def test_python_remove_unused_rhs(ode_unused):
     )
 
 
+def test_python_remove_unused_removes_chains_of_unused_expressions(parser, trans):
+    expr = """
+    parameters(a=1, b=2)
+    states(x=1.0)
+    unused_1 = a * 2
+    unused_2 = unused_1 + 1
+    used = b * x
+    dx_dt = -used
+    """
+    ode = make_ode(*trans.transform(parser.parse(expr)))
+    assert {x.name for x in ode.sorted_assignments(remove_unused=True)} == {"used", "dx_dt"}
+    assert ode.live(["unused_2"]) == {"unused_2", "unused_1", "a"}
+
+    codegen = PythonCodeGenerator(ode, remove_unused=True)
+    rhs = codegen.rhs()
+    assert "unused" not in rhs
+    assert "a = parameters[0]" not in rhs
+    assert "b = parameters[1]" in rhs
+    # The monitor computes everything
+    monitor = codegen.monitor_values()
+    assert "unused_2 = unused_1 + 1" in monitor
+    assert "a = parameters[0]" in monitor
+
+    missing = codegen.missing_values({"unused_1": 0})
+    assert "unused_1 = 2 * a" in missing
+    assert "used = " not in missing
+    assert "b = parameters[1]" not in missing
+
+
+def test_python_print_cache(parser, trans):
+    expr = """
+    parameters(a=1.0, b=2.0)
+    states(x=1.0, y=2.0)
+    dx_dt = a * x
+    dy_dt = b * y
+    """
+    ode = make_ode(*trans.transform(parser.parse(expr)))
+    codegen = PythonCodeGenerator(ode)
+    rhs = codegen.rhs()
+    with mock.patch.object(codegen.printer, "doprint", side_effect=AssertionError("Printed twice")):
+        assert codegen.rhs() == rhs
+
+    with mock.patch.object(codegen.printer, "doprint", return_value="") as doprint:
+        codegen.scheme(get_scheme("explicit_euler"))
+    # The state derivatives are already printed by rhs
+    printed = {str(call.args[0].lhs) for call in doprint.call_args_list}
+    assert not printed & {"dx_dt", "dy_dt"}
+
+
+def test_python_cse(parser, trans):
+    expr = """
+    parameters(a=1.0, b=2.0)
+    states(x=1.0, y=2.0)
+    c = Conditional(Gt(x, 0), 1 / (a * b), 0)
+    dx_dt = exp(a * b) * x + c
+    dy_dt = -exp(a * b) * y + a * b
+    """
+    ode = make_ode(*trans.transform(parser.parse(expr)))
+    codegen = PythonCodeGenerator(ode)
+    rhs = codegen.rhs(use_cse=True)
+    # a * b is computed once and used by both state derivatives
+    assert "cse_0 = a * b" in rhs
+    assert "cse_1 = numpy.exp(cse_0)" in rhs
+    # Nothing is hoisted out of the conditional
+    assert rhs.index("cse_0 = a * b") > rhs.index("c = ")
+    assert codegen.cse_statistics["rhs"] > 0
+
+    scheme = codegen.scheme(get_scheme("forward_generalized_rush_larsen"), use_cse=True)
+    assert "cse_" in scheme
+    assert codegen.cse_statistics["forward_generalized_rush_larsen"] > 0
+
+    namespace: dict = {}
+    exec(codegen.imports() + rhs, namespace)
+    namespace_no_cse: dict = {}
+    exec(codegen.imports() + codegen.rhs(), namespace_no_cse)
+    states = np.array([1.0, 2.0])
+    parameters = np.array([1.0, 2.0])
+    assert np.allclose(
+        namespace["rhs"](0.0, states, parameters),
+        namespace_no_cse["rhs"](0.0, states, parameters),
+    )
+
+
+def test_python_frozen_parameters(parser, trans):
+    expr = """
+    parameters(a=1.0, b=2.0, F=96485.0, R=8314.0, T=310.0)
+    states(x=1.0)
+    FRT = F / (R * T)
+    dx_dt = exp(a * b) * x + FRT * b
+    """
+    ode = make_ode(*trans.transform(parser.parse(expr)))
+    codegen = PythonCodeGenerator(ode, frozen_parameters=["a", "F", "R", "T"])
+    assert codegen.frozen_parameters == {"a", "F", "R", "T"}
+
+    rhs = codegen.rhs()
+    # Only the free parameter is read from the parameters array
+    assert "b = parameters[4]" in rhs
+    assert "a = parameters" not in rhs
+    # FRT is constant and inserted where it is used
+    assert "FRT = " not in rhs
+    assert "dx_dt = 0.037435883507802616 * b + x * numpy.exp(b)" in rhs
+    # The constant is still monitored
+    assert "values[0] = 0.037435883507802616" in codegen.monitor_values()
+
+    codegen = PythonCodeGenerator(ode, frozen_parameters={"a": 2.0, "b": 3.0})
+    assert "dx_dt = 3.0 * FRT + 403.4287934927351 * x" in codegen.rhs()
+
+    with pytest.raises(ParameterNotFoundInODE):
+        PythonCodeGenerator(ode, frozen_parameters=["c"])
+
+
+def test_python_precompute(parser, trans):
+    expr = """
+    parameters(a=1.0, b=2.0)
+    states(x=1.0, y=2.0)
+    ab = a * b
+    c = 2 * ab
+    stim = Conditional(Lt(t, 1), 1, 0)
+    dx_dt = exp(b) * x + c + stim
+    dy_dt = ab
+    """
+    ode = make_ode(*trans.transform(parser.parse(expr)))
+    codegen = PythonCodeGenerator(ode, precompute=True)
+    # ab is only needed to compute c
+    assert codegen.precomputed_index == {"c": 0, "dy_dt": 1}
+
+    precompute = codegen.precompute()
+    assert "def precompute(parameters):" in precompute
+    assert "ab = a * b" in precompute
+
+    rhs = codegen.rhs()
+    assert "def rhs(t, states, parameters, precomputed):" in rhs
+    assert "c = precomputed[0]" in rhs
+    assert "dy_dt = precomputed[1]" in rhs
+    assert "ab = " not in rhs
+    assert "a = parameters" not in rhs
+
+    scheme = codegen.scheme(get_scheme("forward_explicit_euler"))
+    assert "def forward_explicit_euler(states, t, dt, parameters, precomputed):" in scheme
+
+    namespace: dict = {}
+    exec(codegen.imports() + precompute + rhs, namespace)
+    namespace_orig: dict = {}
+    exec(codegen.imports() + PythonCodeGenerator(ode).rhs(), namespace_orig)
+    states = np.array([1.0, 2.0])
+    parameters = np.array([1.0, 2.0])
+    precomputed = namespace["precompute"](parameters)
+    assert np.allclose(
+        namespace["rhs"](0.0, states, parameters, precomputed),
+        namespace_orig["rhs"](0.0, states, parameters),
+    )
+
+
+def test_python_rhs_and_monitor(parser, trans):
+    expr = """
+    parameters(a=1.0, b=2.0)
+    states(x=1.0, y=2.0)
+    ab = a * b
+    unused = 3 * x
+    z = ab * x
+    dx_dt = z + y
+    dy_dt = -x
+    """
+    ode = make_ode(*trans.transform(parser.parse(expr)))
+    codegen = PythonCodeGenerator(ode, remove_unused=True)
+    rhs = codegen.rhs(monitored=["z", "ab"])
+    assert "def rhs_and_monitor(t, states, parameters):" in rhs
+    assert "monitor[0] = z" in rhs
+    assert "monitor[1] = ab" in rhs
+    assert "return values, monitor" in rhs
+    assert "unused" not in rhs
+
+    scheme = codegen.scheme(get_scheme("forward_explicit_euler"), monitored=["z"])
+    assert "def forward_explicit_euler_and_monitor(states, t, dt, parameters):" in scheme
+
+    namespace: dict = {}
+    exec(
+        codegen.imports() + codegen.rhs() + codegen.monitor_values() + rhs + scheme,
+        namespace,
+    )
+    states = np.array([1.0, 2.0])
+    parameters = np.array([1.0, 2.0])
+    values, monitor = namespace["rhs_and_monitor"](0.0, states, parameters)
+    assert np.allclose(values, namespace["rhs"](0.0, states, parameters))
+    monitor_values = namespace["monitor_values"](0.0, states, parameters)
+    index = ode.index.monitor_index
+    assert np.allclose(monitor, monitor_values[[index["z"], index["ab"]]])
+
+    _, monitor = namespace["forward_explicit_euler_and_monitor"](states, 0.0, 0.1, parameters)
+    assert np.allclose(monitor, [monitor_values[index["z"]]])
+
+    with pytest.raises(AssignmentNotFoundInODE):
+        codegen.rhs(monitored=["x"])
+
+
+def test_python_monitored_values(parser, trans):
+    expr = """
+    parameters(a=1.0, b=2.0, c=3.0)
+    states(x=1.0, y=2.0)
+    ab = a * b
+    unused = c * y
+    z = ab * x
+    dx_dt = z + unused
+    dy_dt = -x
+    """
+    ode = make_ode(*trans.transform(parser.parse(expr)))
+    codegen = PythonCodeGenerator(ode)
+    index = codegen.monitored_index(["z", "ab"])
+    assert 'monitored = {"z": 0, "ab": 1}' in index
+    assert "def monitored_index(name: str) -> int:" in index
+
+    values = codegen.monitored_values(["z", "ab"])
+    assert "def monitored_values(t, states, parameters):" in values
+    assert "values[0] = z" in values
+    assert "values[1] = ab" in values
+    for name in ["unused", "dx_dt", "dy_dt", "y = ", "c = "]:
+        assert name not in values
+
+    namespace: dict = {}
+    exec(codegen.imports() + codegen.monitor_values() + index + values, namespace)
+    states = np.array([1.0, 2.0])
+    parameters = np.array([1.0, 2.0, 3.0])
+    monitor_values = namespace["monitor_values"](0.0, states, parameters)
+    assert np.allclose(
+        namespace["monitored_values"](0.0, states, parameters)[namespace["monitored_index"]("z")],
+        monitor_values[ode.index.monitor_index["z"]],
+    )
+    assert np.allclose(
+        namespace["monitored_values"](0.0, states, parameters),
+        monitor_values[[ode.index.monitor_index["z"], ode.index.monitor_index["ab"]]],
+    )
+
+    with pytest.raises(AssignmentNotFoundInODE):
+        codegen.monitored_values(["x"])
+
+
 def test_python_remove_unused_forward_explicit_euler(ode_unused):
     codegen_orig = PythonCodeGenerator(ode_unused)
     assert codegen_orig.scheme(get_scheme("forward_explicit_euler")) == (
@@ -854,3 +1092,40 @@ def test_conditional_times_float(parser, trans):
         "\n    return values"
         "\n"
     )
+
+
+def test_python_single_precision(ode):
+    codegen = PythonCodeGenerator(ode, precision="single")
+    assert "dtype=numpy.float32" in codegen.initial_state_values()
+    assert "dtype=numpy.float32" in codegen.initial_parameter_values()
+    assert "numpy.zeros_like(states, dtype=numpy.float32)" in codegen.rhs()
+
+    ns = {}
+    exec(codegen.imports() + codegen.initial_state_values() + codegen.rhs(), ns)
+    states = ns["init_state_values"]()
+    assert states.dtype == np.float32
+    assert ns["rhs"](0.0, states, np.ones(4, dtype=np.float32)).dtype == np.float32
+
+
+def test_python_precompute_nothing_to_hoist(parser, trans):
+    expr = """
+    parameters(a=1.0)
+    states(x=1.0)
+    dx_dt = -a * x
+    """
+    ode = make_ode(*trans.transform(parser.parse(expr)))
+    codegen = PythonCodeGenerator(ode, precompute=True)
+    assert codegen.precomputed_index == {}
+
+    # The signatures do not depend on whether there is anything to precompute
+    rhs = codegen.rhs()
+    assert "def rhs(t, states, parameters, precomputed):" in rhs
+    scheme = codegen.scheme(get_scheme("explicit_euler"))
+    assert "def explicit_euler(states, t, dt, parameters, precomputed):" in scheme
+
+    ns = {}
+    exec(codegen.imports() + codegen.precompute() + rhs, ns)
+    parameters = np.array([2.0])
+    precomputed = ns["precompute"](parameters)
+    assert precomputed.shape == (0,)
+    assert np.allclose(ns["rhs"](0.0, np.array([1.0]), parameters, precomputed), [-2.0])
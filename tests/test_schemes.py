@@ -2,7 +2,7 @@ import pytest
 import sympy
 from gotranx.ode import make_ode
 from gotranx.ode import ODE
-from gotranx import schemes
+from gotranx import profiling, schemes
 
 
 @pytest.fixture(scope="module")
@@ -90,3 +90,26 @@ def test_hybrid_rush_larsen(ode: ODE):
     )
     assert str(eqs[7]) == "dz_dt = x*y + z_int"
     assert str(eqs[8]) == "values[2] = dt*dz_dt + z"
+
+
+def test_linearizations_are_computed_once(trans, parser):
+    expr = """
+    states(x=1.0, y=2.0)
+    parameters(a=1.0)
+    dx_dt = -a*x + y
+    dy_dt = x
+    """
+    ode = make_ode(*trans.transform(parser.parse(expr)))
+    dt = sympy.Symbol("dt")
+    with profiling.profile() as p:
+        grl = schemes.generalized_rush_larsen(ode, dt)
+        schemes.hybrid_rush_larsen(ode, dt, stiff_states=["x"])
+        assert schemes.generalized_rush_larsen(ode, dt) == grl
+
+    # One derivative for each state
+    assert p.stages["differentiate"].calls == 2
+    linearization = ode.linearization("dx_dt")
+    assert str(linearization.expr) == "-a"
+    assert not linearization.is_zero
+    assert not linearization.nonzero
+    assert ode.linearization("dy_dt").is_zero
@@ -76,3 +76,35 @@ def test_jacobian_matrix(ode: ODE):
     assert str(jac[6]) == "y"
     assert str(jac[7]) == "x"
     assert str(jac[8]) == "-beta"
+
+
+@pytest.mark.parametrize(
+    "expr, expected",
+    [
+        ("x**2", "x*x"),
+        ("x**(-3)", "1/(x*x*x)"),
+        ("x**4", "x**4"),
+        ("(x + y)**2.0", "(x + y)*(x + y)"),
+        ("exp(x)**2", "exp(2*x)"),
+        ("exp(a)*exp(b)", "exp(a + b)"),
+        ("exp(x) - 1", "expm1(x)"),
+        ("2 - 2*exp(x)", "-2*expm1(x)"),
+        ("exp(x) + 1", "exp(x) + 1"),
+        ("a/d + b/d + x", "x + (a + b)/d"),
+    ],
+)
+def test_strength_reduce(expr, expected):
+    assert str(sympytools.strength_reduce(sympy.sympify(expr))) == expected
+
+
+def test_strength_reduce_unevaluated():
+    x = sympy.Symbol("x")
+    expr = sympy.Add(sympy.exp(x), sympy.Mul(-1, 1.0, evaluate=False), evaluate=False)
+    assert str(sympytools.strength_reduce(expr)) == "expm1(x)"
+    assert sympytools.strength_reduce(expr, use_expm1=False) == expr
+
+
+def test_strength_reduce_max_power():
+    x = sympy.Symbol("x")
+    assert str(sympytools.strength_reduce(x**4, max_power=4)) == "x*x*x*x"
+    assert sympytools.strength_reduce(x**2, max_power=1) == x**2
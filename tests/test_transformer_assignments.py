@@ -2,9 +2,12 @@
 import math
 
 import lark
+import pint
 import pytest
 import sympy as sp
 from gotranx.expressions import build_expression
+from gotranx.transformer import is_unit
+from gotranx import units
 from gotranx.units import ureg
 
 
@@ -462,6 +465,60 @@ def test_assignment_with_unit(expr, unit, parser, trans):
     assert x.unit == unit
 
 
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("mV", True),
+        ("millivolts", True),
+        ("mM**-1*ms**-1", True),
+        ("mS / uF", True),
+        ("(pA/pF)^2", True),
+        ("dimensionless", True),
+        ("m s", True),
+        ("mil_length", True),
+        ("1", True),
+        ("xyz", False),
+        ("group", False),
+        ("system", False),
+        ("m xyz", False),
+        ("_", False),
+        ("Some variable that we want to define", False),
+        ("mV (membrane potential)", False),
+        ("mV/", False),
+    ],
+)
+def test_is_unit(text, expected):
+    assert is_unit(text) is expected
+    if expected:
+        assert isinstance(ureg(text), pint.Quantity)
+
+
+def test_read_unit_definitions(tmp_path):
+    path = tmp_path / "units.txt"
+    path.write_text(
+        "\n".join(
+            [
+                "milli- = 1e-3 = m-",
+                "meter = [length] = m = metre",
+                "@alias meter = meterish",
+                "@defaults",
+                "    group = international",
+                "@end",
+                "@group Extra",
+                "    foot = 0.3048 * meter = ft = feet",
+                "@end",
+                "@system SI",
+                "    meter",
+                "@end",
+            ]
+        )
+    )
+    units_, prefixes = set(), set()
+    units._read_definitions(path, units_, prefixes)
+    assert units_ == {"meter", "m", "metre", "meterish", "foot", "ft", "feet"}
+    assert prefixes == {"milli", "m"}
+
+
 @pytest.mark.parametrize(
     "expr, subs, expected",
     [